@@ -1,4 +1,4 @@
-import api from "../api.js";
+import api, { getAll } from "../api.js";
 
 export const adminService = {
     getUserStats: async () => {
@@ -12,7 +12,7 @@ export const adminService = {
 
     getUsers: async (params = {}) => {
         try {
-            const response = await api.get('/admin/users', { params });
+            const response = await getAll('/admin/users', { params });
             return response.data;
         } catch (error) {
             throw error;
@@ -38,4 +38,39 @@ api.interceptors.response.use(
     }
 );
 
+// Lists are paged: the next page is in the Link header, e.g. <url?cursor=...>; rel="next"
+const parseLinks = (header) => {
+    const links = {};
+    (header || '').split(',').forEach((part) => {
+        const match = part.match(/<([^>]+)>\s*;\s*rel="([^"]+)"/);
+        if (match) {
+            links[match[2]] = match[1];
+        }
+    });
+    return links;
+};
+
+// GET a whole list by following the Link cursors. `lists` maps each link rel to the key of its
+// list in the response body (null when the body is the list itself), e.g.
+// getAll('/collaborations/', {}, { next: 'collaborations' })
+export const getAll = async (url, config = {}, lists = { next: null }) => {
+    const response = await api.get(url, config);
+    const data = response.data;
+
+    for (const [rel, key] of Object.entries(lists)) {
+        let next = parseLinks(response.headers.link)[rel];
+        while (next) {
+            const page = await api.get(next);
+            const items = key ? page.data[key] : page.data;
+            if (key) {
+                data[key] = [...data[key], ...items];
+            } else {
+                data.push(...items);
+            }
+            next = parseLinks(page.headers.link)[rel];
+        }
+    }
+    return { ...response, data };
+};
+
 export default api;
\ No newline at end of file
@@ -1,13 +1,16 @@
-import api from "../api.js";
+import api, { getAll } from "../api.js";
 
 export const proposalService = {
     // Get all proposals for entrepreneur's help requests
     getProposals: async (type = null) => {
         try {
-            const url = type
-                ? `/entrepreneur/proposals/${type}/`
-                : `/entrepreneur/proposals/`;
-            const response = await api.get(url);
+            // Without a type, both lists are paged with their own cursor
+            const response = type
+                ? await getAll(`/entrepreneur/proposals/${type}/`)
+                : await getAll('/entrepreneur/proposals/', {}, {
+                    'next-financial': 'financial_proposals',
+                    'next-technical': 'technical_proposals'
+                });
             return response.data;
         } catch (error) {
             throw error;
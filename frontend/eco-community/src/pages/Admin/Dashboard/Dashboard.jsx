@@ -16,7 +16,7 @@ import { useNavigate } from "react-router-dom";
 import { logoutUser } from "../../../Services/auth.js";
 import { adminService } from '../../../Services/Admin/UserMangement.js';
 import { Card, CardHeader, CardTitle, CardContent } from '../../../components/ui/card.jsx';
-import api from "../../../Services/api.js";
+import api, { getAll } from "../../../Services/api.js";
 import {Button} from "../../../components/ui/button.jsx";
 import UserModal from "./Form.jsx";
 import EditEventModal from "../../ONG-Associations/Events/editing/EditingEvents.jsx";
@@ -64,7 +64,7 @@ const AdminDashboard = () => {
             if (searchTerm) params.append('search', searchTerm);
             if (selectedRole) params.append('role', selectedRole);
 
-            const response = await api.get(`/admin/users?${params.toString()}`);
+            const response = await getAll(`/admin/users?${params.toString()}`);
             setUsers(response.data);
         } catch (error) {
             console.error('Error fetching users:', error);
@@ -20,7 +20,7 @@ import { useNavigate } from "react-router-dom";
 import { Card, CardContent } from '../../../components/ui/card.jsx';
 import { logoutUser } from "../../../Services/auth.js";
 import axios from "axios";
-import api from "../../../Services/api.js";
+import api, { getAll } from "../../../Services/api.js";
 
 const getDocumentDisplayName = (documentType) => {
     const documentNames = {
@@ -55,7 +55,7 @@ const AdminProject = () => {
 
     const fetchProjects = async () => {
         try {
-            const response = await api.get('/projects/');
+            const response = await getAll('/projects/');
             console.log('API Response:', response.data);
             setProjects(response.data);
             setLoading(false);
@@ -20,7 +20,7 @@ import {
     Tag,
     AlertCircle, MessageSquare
 } from 'lucide-react';
-import api from "../../../Services/api.js";
+import { getAll } from "../../../Services/api.js";
 import OpportunityDetailModal from "../../opportunityDetails/OpportunityDetails.jsx";
 
 const AnnouncePage = () => {
@@ -96,7 +96,7 @@ const AnnouncePage = () => {
             let data = [];
 
             if (selectedCategory === 'all' || selectedCategory === 'events') {
-                const eventsResponse = await api.get('/public/events/');
+                const eventsResponse = await getAll('/public/events/');
                 const eventsData = eventsResponse.data.map(event => ({
                     ...event,
                     category: 'events',
@@ -106,7 +106,7 @@ const AnnouncePage = () => {
             }
 
             if (selectedCategory === 'all' || selectedCategory === 'announcements') {
-                const announcementsResponse = await api.get('/public/announcements/');
+                const announcementsResponse = await getAll('/public/announcements/');
                 const announcementsData = announcementsResponse.data.map(announcement => ({
                     ...announcement,
                     category: 'announcements',
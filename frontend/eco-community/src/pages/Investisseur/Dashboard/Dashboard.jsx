@@ -19,7 +19,7 @@ import {
     Eye,
     MessageSquare
 } from 'lucide-react';
-import api from "../../../Services/api.js";
+import { getAll } from "../../../Services/api.js";
 import RequestDetails from "../Requests/details/RequestModal.jsx";
 import {useNavigate} from "react-router-dom";
 
@@ -41,7 +41,7 @@ const ProjectRequestsInvestorPage = () => {
 
     const fetchHelpRequests = async () => {
         try {
-            const response = await api.get('/help-requests/');
+            const response = await getAll('/help-requests/');
             setHelpRequests(response.data);
             setIsLoading(false);
         } catch (error) {
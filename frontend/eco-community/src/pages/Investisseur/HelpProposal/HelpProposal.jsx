@@ -21,7 +21,7 @@ import {
     AlertCircle,
     Trash2, MessageSquare
 } from 'lucide-react';
-import api from "../../../Services/api.js";
+import api, { getAll } from "../../../Services/api.js";
 import {Card} from "../../../components/ui/card.jsx";
 import {ProposalDetailModal} from "./Details/ProposalModal.jsx";
 
@@ -41,8 +41,8 @@ const HelpProposalsPage = () => {
         const fetchProposals = async () => {
             try {
                 const [financialResponse, technicalResponse] = await Promise.all([
-                    api.get('/proposals/financial'),
-                    api.get('/proposals/technical')
+                    getAll('/proposals/financial/'),
+                    getAll('/proposals/technical/')
                 ]);
 
                 // Format the proposals from both responses
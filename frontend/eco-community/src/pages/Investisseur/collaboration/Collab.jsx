@@ -24,7 +24,7 @@ import {
     MessageSquare
 } from 'lucide-react';
 import {Card} from "../../../components/ui/card.jsx";
-import api from "../../../Services/api.js";
+import { getAll } from "../../../Services/api.js";
 import CollaborationStats from "./stats.jsx";
 import GroupedCollaborations from "./GroupCollab.jsx";
 
@@ -39,7 +39,7 @@ const InvestorCollaboratorsPage = () => {
     const fetchData = async () => {
         try {
             setLoading(true);
-            const response = await api.get('/collaborations/');
+            const response = await getAll('/collaborations/', {}, { next: 'collaborations' });
 
             // Set the API stats
             setApiStats(response.data.stats);
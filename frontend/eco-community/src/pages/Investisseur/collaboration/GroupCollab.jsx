@@ -1,6 +1,6 @@
 import React, { useEffect, useState } from 'react';
 import { FileText, Users, Calendar, DollarSign, Search, Mail, Phone, MessageCircle, Filter, ChevronDown, ChevronUp, Eye, Download } from 'lucide-react';
-import api from "../../../Services/api.js";
+import api, { getAll } from "../../../Services/api.js";
 import {Card} from "../../../components/ui/card.jsx";
 
 const GroupedCollaborations = () => {
@@ -14,7 +14,7 @@ const GroupedCollaborations = () => {
     // Mock data fetching - replace with your actual API call
     const fetchAndGroupCollaborations = async () => {
         try {
-            const response = await api.get('/collaborations/');
+            const response = await getAll('/collaborations/', {}, { next: 'collaborations' });
             const collabs = response.data.collaborations || [];
 
             // Group collaborations by entrepreneur
@@ -79,7 +79,7 @@ const GroupedCollaborations = () => {
 
     const fetchContracts = async () => {
         try {
-            const response = await api.get('/contracts/');
+            const response = await getAll('/contracts/');
             setContracts(Array.isArray(response.data) ? response.data : []);
         } catch (err) {
             console.error('Error fetching contracts:', err);
@@ -16,7 +16,7 @@ import {
     Settings,
     CheckCircle, X, Menu
 } from 'lucide-react';
-import api from "../../../Services/api.js";
+import api, { getAll } from "../../../Services/api.js";
 import AnnouncementImage from "./AnnouncementImage.jsx";
 import AnnouncementDetailsModal from "./AnnouncementDetails.jsx";
 import EditAnnouncementModal from "./AnnouncementEdit.jsx";
@@ -43,7 +43,7 @@ const NGOAnnouncementsPage = () => {
             setLoading(true);
 
             // Fetch announcements using the Axios API instance
-            const response = await api.get('/announcements/');
+            const response = await getAll('/announcements/');
 
             // Set the announcements state with the fetched data
             setAnnouncements(response.data);
@@ -17,7 +17,7 @@ import {
     LogOut,
     Settings, X, CheckCircle, Menu
 } from 'lucide-react';
-import api from "../../../Services/api.js";
+import api, { getAll } from "../../../Services/api.js";
 import {Card} from "../../../components/ui/card.jsx";
 import EventImage from "./EventImage.jsx";
 import EventDetailsModal from "./EventDetails.jsx";
@@ -47,7 +47,7 @@ const NGOEventsPage = () => {
     const fetchEvents = async () => {
         try {
             setLoading(true);
-            const response = await api.get('/events/');
+            const response = await getAll('/events/');
             setEvents(response.data);
             setError(null);
         } catch (err) {
@@ -15,7 +15,7 @@ import {
     AlertCircle,
     X, Menu
 } from 'lucide-react';
-import api from "../../../Services/api.js";
+import { getAll } from "../../../Services/api.js";
 import OpportunityDetailModal from "../../opportunityDetails/OpportunityDetails.jsx";
 
 const OpportunityPage = () => {
@@ -91,7 +91,7 @@ const OpportunityPage = () => {
             let data = [];
 
             if (selectedCategory === 'all' || selectedCategory === 'events') {
-                const eventsResponse = await api.get('/public/events/');
+                const eventsResponse = await getAll('/public/events/');
                 const eventsData = eventsResponse.data.map(event => ({
                     ...event,
                     category: 'events',
@@ -101,7 +101,7 @@ const OpportunityPage = () => {
             }
 
             if (selectedCategory === 'all' || selectedCategory === 'announcements') {
-                const announcementsResponse = await api.get('/public/announcements/');
+                const announcementsResponse = await getAll('/public/announcements/');
                 const announcementsData = announcementsResponse.data.map(announcement => ({
                     ...announcement,
                     category: 'announcements',
@@ -21,7 +21,7 @@ import {
     Trash
 } from 'lucide-react';
 import HelpRequestDetails from "../details/RequestModal.jsx";
-import api from "../../../../Services/api.js";
+import api, { getAll } from "../../../../Services/api.js";
 import {Card} from "../../../../components/ui/card.jsx";
 
 const HelpRequestsListPage = () => {
@@ -43,7 +43,7 @@ const HelpRequestsListPage = () => {
 
     const fetchHelpRequests = async () => {
         try {
-            const response = await api.get('/help-requests/');
+            const response = await getAll('/help-requests/');
             setHelpRequests(response.data);
             setIsLoading(false);
         } catch (error) {
@@ -6,7 +6,7 @@ import {
     DollarSign,
     HandPlatter,
 } from "lucide-react";
-import api from "../../../../Services/api.js";
+import api, { getAll } from "../../../../Services/api.js";
 import Alert from "../../../../components/ui/alert.jsx";
 import * as PropTypes from "prop-types";
 import {useNavigate, useSearchParams} from "react-router-dom";
@@ -57,7 +57,7 @@ const HelpRequestForm = () => {
 
     const fetchProjects = async () => {
         try {
-            const response = await api.get('/projects/');
+            const response = await getAll('/projects/');
             if (response.ok) {
                 const data = await response.json();
                 setProjects(data);
@@ -2,7 +2,7 @@ import React, {useEffect, useState} from 'react';
 import { logoutUser } from "../../../Services/auth.js";
 import {FileText, HelpCircle, Info, Users, Calendar, BarChart2, Settings, LogOut, Menu, X, DollarSign, Search, Wrench, Mail, Phone, Building, Filter, HelpingHand, Download, ChevronDown, ChevronUp, Eye, MessageCircle } from 'lucide-react';
 import {Card} from "../../../components/ui/card.jsx";
-import api from "../../../Services/api.js";
+import { getAll } from "../../../Services/api.js";
 import InvestorStats from "./stats.jsx";
 import EntrepreneurGroupedCollaborations from "./GroupCollaboration.jsx";
 
@@ -17,7 +17,7 @@ const CollaboratorPage = () => {
     const fetchData = async () => {
         try {
             setIsLoading(true);
-            const response = await api.get('/collaborations/');
+            const response = await getAll('/collaborations/', {}, { next: 'collaborations' });
 
             // Set the API stats
             setApiStats(response.data.stats);
@@ -4,7 +4,7 @@ import { logoutUser } from "../../../Services/auth.js";
 
 import { Search, Plus, BarChart2, FileText, Settings, LogOut, Menu, X, Calendar, MapPin, Users, DollarSign, HelpCircle, Info, HandHelping, Trash2 } from 'lucide-react';
 
-import api from "../../../Services/api.js";
+import api, { getAll } from "../../../Services/api.js";
 import {ProjectDetailsCard} from "./detail/ProjectModal.jsx";
 
 
@@ -28,7 +28,7 @@ const ProjectsPage = () => {
     // Add this console log in the frontend
     const fetchProjects = async () => {
         try {
-            const response = await api.get('/projects/');
+            const response = await getAll('/projects/');
             console.log('API Response:', response.data);
             setProjects(response.data || []);
         } catch (error) {
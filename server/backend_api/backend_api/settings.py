@@ -51,26 +51,36 @@ REST_FRAMEWORK = {
         'rest_framework.permissions.IsAuthenticated',
     ),
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        # Reads the user from token claims (main/authentication.py)
+        'main.authentication.StatelessJWTAuthentication',
     ),
     'DEFAULT_RENDERER_CLASSES': [
         'rest_framework.renderers.JSONRenderer',
         'rest_framework.renderers.BrowsableAPIRenderer',  # For browsable API
     ],
+    # Keyset pagination on (created_at, id) for every list endpoint; clients follow the cursor
+    # in the Link header (frontend: getAll in src/Services/api.js)
+    'DEFAULT_PAGINATION_CLASS': 'main.pagination.KeysetPagination',
+    'PAGE_SIZE': 100,
 }
 
+# Upper bound for the ?page_size= query parameter on list endpoints
+API_MAX_PAGE_SIZE = 500
+
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(minutes=60),
     'REFRESH_TOKEN_LIFETIME': timedelta(days=1),
 }
 
 MIDDLEWARE = [
+    'main.middleware.PerformanceMiddleware',  # No-op unless PERF_INSTRUMENTATION is set
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'main.middleware.ProfileMiddleware',  # request.profile, the user's role profile
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -100,8 +110,85 @@ WSGI_APPLICATION = 'backend_api.wsgi.application'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Uploads get content-hashed names and signed URLs valid MEDIA_URL_TTL to twice that (main/media.py)
+STORAGES = {
+    'default': {'BACKEND': 'main.media.SignedMediaStorage'},
+    'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+}
+MEDIA_URL_TTL = 3600
+
+EVENT_IMAGE_MAX_SIZE = 5 * 1024 * 1024  # Bytes; multipart uploads are refused while they are read (main/uploads.py)
+
+# Copies of uploaded images made by the worker (main/images.py), each also written as WebP.
+# 'crop' fills the exact size, otherwise the image is shrunk to fit in it
+IMAGE_VARIANTS = {
+    'thumb': {'size': (320, 320), 'crop': True},
+    'medium': {'size': (1024, 1024), 'crop': False},
+}
+
 WKHTMLTOPDF_PATH = 'C:\\Program Files\\wkhtmltopdf\\bin\\wkhtmltopdf.exe'  # Adjust path as needed
 
+# Contract downloads (main/delivery.py): 'django' streams the file, 'nginx' sends X-Accel-Redirect to
+# FILE_DELIVERY_INTERNAL_PREFIX (an internal location aliased to MEDIA_ROOT), 'sendfile' sends X-Sendfile
+FILE_DELIVERY = os.environ.get('FILE_DELIVERY', 'django')
+FILE_DELIVERY_INTERNAL_PREFIX = '/protected/'
+
+# Contract PDFs (main/pdf.py): 'wkhtmltopdf', or 'text' (pure Python, no styling) for development and tests.
+# Without wkhtmltopdf, render jobs fail and retry and contracts stay pending.
+PDF_RENDER_BACKEND = os.environ.get('PDF_RENDER_BACKEND', 'wkhtmltopdf')
+PDF_RENDER_CONCURRENCY = 2  # Renders running at once per process
+PDF_RENDER_TIMEOUT = 60  # Seconds before a wkhtmltopdf process is killed
+
+# Background jobs (manage.py runworker)
+JOB_MAX_ATTEMPTS = 5  # Attempts before a job moves to the dead state
+JOB_RETRY_BACKOFF = 10  # Seconds before the first retry, doubled on every failure
+JOB_LOCK_TIMEOUT = 600  # Seconds after which a running job is considered abandoned
+
+# Per-request Server-Timing header (queries, DB, serializer and render time)
+PERF_INSTRUMENTATION = os.environ.get('PERF_INSTRUMENTATION', '0') == '1'
+PERF_SAMPLE_RATE = float(os.environ.get('PERF_SAMPLE_RATE', 1.0))  # Fraction of requests measured
+PERF_LOG = os.environ.get('PERF_LOG', '0') == '1'  # Also log one JSON line per measured request
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'main.performance': {'handlers': ['console'], 'level': 'INFO', 'propagate': False},
+    },
+}
+
+# Cache: local memory by default, files with CACHE_DIR, Redis with REDIS_URL (needs the redis package)
+# Local memory is per process: public feeds are then not cached (main/caching.py) and every
+# request loads its user to check the blocked flag (main/authentication.py). With several
+# processes on several hosts, use Redis.
+if os.environ.get('REDIS_URL'):
+    CACHES = {'default': {'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+                          'LOCATION': os.environ['REDIS_URL']}}
+elif os.environ.get('CACHE_DIR'):
+    CACHES = {'default': {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+                          'LOCATION': os.environ['CACHE_DIR']}}
+else:
+    CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+PUBLIC_FEED_CACHE_TIMEOUT = 300  # Seconds; saving or deleting an item invalidates its feed at once
+
+# Email, sent by the worker through the outbox (main/mail.py)
+# For a local debugging server: EMAIL_HOST=localhost EMAIL_PORT=1025 EMAIL_USE_SSL=0
+EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
+EMAIL_HOST = os.environ.get('EMAIL_HOST', 'smtp.gmail.com')
+EMAIL_PORT = int(os.environ.get('EMAIL_PORT', 465))
+EMAIL_USE_SSL = os.environ.get('EMAIL_USE_SSL', '1') == '1'
+# The account is only read from the environment; the worker refuses to send over SMTP without it
+EMAIL_HOST_USER = os.environ.get('EMAIL_HOST_USER', '')
+EMAIL_HOST_PASSWORD = os.environ.get('EMAIL_HOST_PASSWORD', '')
+DEFAULT_FROM_EMAIL = EMAIL_HOST_USER
+EMAIL_TIMEOUT = 30
+EMAIL_OUTBOX_BATCH_SIZE = 50  # Emails sent per claim over the open connection
+EMAIL_MAX_ATTEMPTS = 5
+
 
 # Database
 # https://docs.djangoproject.com/en/5.1/ref/settings/#databases
@@ -163,6 +250,8 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 # During development
 CORS_ALLOW_ALL_ORIGINS = True  # Only for development!
+# Read by the frontend: Link holds the next page of a list
+CORS_EXPOSE_HEADERS = ['Link']
 
 # For production, specify allowed origins:
 # CORS_ALLOWED_ORIGINS = [
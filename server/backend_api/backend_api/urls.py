@@ -16,10 +16,13 @@ Including another URLconf
 """
 from django.contrib import admin
 from django.conf import settings
-from django.conf.urls.static import static
-from django.urls import path,include
+from django.urls import path,include,re_path
+
+from main.media import serve_media
 
 urlpatterns = [
     path('admin/', admin.site.urls),
-    path('api/', include('main.urls'))
-] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+    path('api/', include('main.urls')),
+    # Signed media URLs (main/media.py)
+    re_path(rf'^{settings.MEDIA_URL.strip("/")}/(?P<name>.+)$', serve_media, name='media'),
+]
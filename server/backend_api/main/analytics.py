@@ -0,0 +1,98 @@
+#analytics.py
+
+#Monthly rollups for the admin dashboard
+from collections import defaultdict
+from datetime import datetime
+
+from django.db import transaction
+from django.db.models import Count, Q, Sum, DateField
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+
+from .models import AnalyticsRollup, Project, HelpRequest, FinancialProposal, TechnicalProposal
+
+# For each source model: the path to the project sector and the counters it feeds.
+# Every row is bucketed by the month of its own created_at.
+ROLLUP_SOURCES = [
+    (Project, 'sector', {
+        'projects': Count('id'),
+    }),
+    (HelpRequest, 'project__sector', {
+        'help_requests': Count('id'),
+        'financial_requests': Count('id', filter=Q(request_type='financial')),
+        'technical_requests': Count('id', filter=Q(request_type='technical')),
+        'completed_requests': Count('id', filter=Q(status='completed')),
+        'requested_projects': Count('project', distinct=True),
+        'amount_requested': Sum('financialrequest__amount_requested', filter=Q(request_type='financial')),
+    }),
+    (FinancialProposal, 'help_request__project__sector', {
+        'financial_proposals': Count('id'),
+        'accepted_financial_proposals': Count('id', filter=Q(status='accepted')),
+        'accepted_investment': Sum('investment_amount', filter=Q(status='accepted')),
+    }),
+    (TechnicalProposal, 'help_request__project__sector', {
+        'technical_proposals': Count('id'),
+        'accepted_technical_proposals': Count('id', filter=Q(status='accepted')),
+    }),
+]
+
+
+def month_of(value):
+    """First day of the month of an aware datetime, in the current time zone (like TruncMonth)"""
+    return timezone.localtime(value).date().replace(day=1)
+
+
+def month_bounds(month):
+    start = timezone.make_aware(datetime(month.year, month.month, 1))
+    if month.month == 12:
+        end = timezone.make_aware(datetime(month.year + 1, 1, 1))
+    else:
+        end = timezone.make_aware(datetime(month.year, month.month + 1, 1))
+    return start, end
+
+
+def refresh_bucket(month, sector):
+    """Recompute the counters of one (month, sector) bucket from the source tables"""
+    start, end = month_bounds(month)
+    counters = {}
+    for model, sector_path, aggregates in ROLLUP_SOURCES:
+        values = model.objects.filter(
+            **{sector_path: sector, 'created_at__gte': start, 'created_at__lt': end}
+        ).aggregate(**aggregates)
+        counters.update({name: value or 0 for name, value in values.items()})
+
+    AnalyticsRollup.objects.update_or_create(month=month, sector=sector, defaults=counters)
+
+
+def schedule_refresh(buckets):
+    """Refresh the given (month, sector) buckets once the current transaction commits"""
+    buckets = {(month, sector) for month, sector in buckets if month and sector}
+
+    def refresh():
+        for month, sector in buckets:
+            refresh_bucket(month, sector)
+
+    if buckets:
+        transaction.on_commit(refresh)
+
+
+@transaction.atomic
+def rebuild_rollups():
+    """Recompute every bucket from scratch; returns the number of rollup rows written"""
+    buckets = defaultdict(dict)
+    for model, sector_path, aggregates in ROLLUP_SOURCES:
+        rows = model.objects.annotate(
+            rollup_month=TruncMonth('created_at', output_field=DateField())
+        ).values('rollup_month', sector_path).annotate(**aggregates).order_by()
+
+        for row in rows:
+            key = (row.pop('rollup_month'), row.pop(sector_path))
+            buckets[key].update({name: value or 0 for name, value in row.items()})
+
+    AnalyticsRollup.objects.all().delete()
+    AnalyticsRollup.objects.bulk_create([
+        AnalyticsRollup(month=month, sector=sector, **counters)
+        for (month, sector), counters in buckets.items()
+        if month and sector
+    ])
+    return len(buckets)
@@ -0,0 +1,124 @@
+#authentication.py
+
+#Stateless JWT authentication
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.functional import SimpleLazyObject, empty
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from .caching import cache_is_shared
+
+# Profile relation of each role; admins have none
+ROLE_PROFILES = {
+    'entrepreneur': 'entrepreneur',
+    'investor': 'investor',
+    'ONG-Association': 'organization',
+}
+
+
+def profile_id_of(user):
+    relation = ROLE_PROFILES.get(user.role)
+    profile = getattr(user, relation, None) if relation else None
+    return profile.pk if profile else None
+
+
+class UserToken(RefreshToken):
+    """Refresh token carrying the claims StatelessJWTAuthentication reads; access tokens inherit them"""
+
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        token['role'] = user.role
+        token['profile_id'] = profile_id_of(user)
+        token['is_staff'] = user.is_staff
+        token['is_blocked'] = user.is_blocked
+        return token
+
+
+#Blocked users denylist and changed claims
+def denylist_key(user_id):
+    return f'auth_denylist:{user_id}'
+
+
+def claims_key(user_id):
+    return f'auth_claims:{user_id}'
+
+
+def token_timeout():
+    # Tokens issued before a change expire within the access token lifetime
+    return settings.SIMPLE_JWT['ACCESS_TOKEN_LIFETIME'].total_seconds()
+
+
+def deny_user(user_id):
+    cache.set(denylist_key(user_id), True, timeout=token_timeout())
+
+
+def allow_user(user_id):
+    cache.delete(denylist_key(user_id))
+
+
+def update_claims(user_id, claims):
+    """Record a user's new claims ({'role': ..., 'is_staff': ...}): tokens carrying other values are refused"""
+    cache.set(claims_key(user_id), claims, timeout=token_timeout())
+
+
+class ClaimsUser(SimpleLazyObject):
+    """
+    The user of a token, answering from its claims and loading the User row on first access
+    to anything else (a profile, a field not in the token, use as a query value, ...).
+    """
+    CLAIMS = ('role', 'profile_id', 'is_staff', 'is_blocked')
+
+    def __init__(self, func, claims):
+        self.__dict__['_claims'] = claims
+        super().__init__(func)
+
+    def __getattr__(self, name):
+        if self._wrapped is empty and name in self._claims:
+            return self._claims[name]
+        return super().__getattr__(name)
+
+    def __bool__(self):
+        return True
+
+    def __copy__(self):
+        if self._wrapped is empty:
+            return type(self)(self._setupfunc, self._claims)
+        return super().__copy__()
+
+    @property
+    def loaded(self):
+        return self._wrapped is not empty
+
+
+class StatelessJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication without the per-request user query. Tokens issued by UserToken carry the
+    role, profile id and staff/blocked flags; blocking a user denylists them in the cache until
+    their tokens expire, and changing their role or staff flag refuses the tokens carrying the
+    old values. Older tokens without these claims fall back to loading the user, and so does
+    every token when the cache is process-local (another process may have made the change).
+    """
+
+    def get_user(self, validated_token):
+        if not cache_is_shared() or \
+                not all(claim in validated_token for claim in (api_settings.USER_ID_CLAIM,) + ClaimsUser.CLAIMS):
+            user = super().get_user(validated_token)
+            if user.is_blocked:
+                raise AuthenticationFailed('User is inactive', code='user_inactive')
+            return user
+
+        user_id = validated_token[api_settings.USER_ID_CLAIM]
+        state = cache.get_many([denylist_key(user_id), claims_key(user_id)])
+        if validated_token['is_blocked'] or state.get(denylist_key(user_id)):
+            raise AuthenticationFailed('User is inactive', code='user_inactive')
+        current_claims = state.get(claims_key(user_id), {})
+        if any(validated_token[claim] != value for claim, value in current_claims.items()):
+            raise AuthenticationFailed('Token claims are outdated', code='token_not_valid')
+
+        claims = {claim: validated_token[claim] for claim in ClaimsUser.CLAIMS}
+        claims.update(id=user_id, pk=user_id, is_active=True, is_authenticated=True, is_anonymous=False)
+        return ClaimsUser(lambda: self.user_model.objects.get(**{api_settings.USER_ID_FIELD: user_id}), claims)
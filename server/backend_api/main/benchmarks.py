@@ -0,0 +1,170 @@
+#benchmarks.py
+
+#Endpoint benchmarks, run with: python manage.py test main.benchmarks
+# BENCH_SCALE    users in the seeded dataset (see seed.Seeder), default 50
+# BENCH_REPEAT   timed requests per route and role, default 10
+# BENCH_REPORT   where to write the JSON report, default bench_reports/bench_report.json (gitignored)
+import json
+import os
+import statistics
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from .authentication import UserToken
+from .seed import seed_dataset
+from .urls import urlpatterns
+
+ROLES = ['entrepreneur', 'investor', 'ONG-Association', 'admin']
+
+# Two datasets, the second with more rows behind every route for the measured users; a route
+# whose query count differs between them runs queries per row (N+1)
+SMALL_SEED = dict(users=10, projects_per_entrepreneur=1, requests_per_project=2, proposals_per_request=2,
+                  items_per_organization=1)
+LARGE_SEED = dict(users=30, projects_per_entrepreneur=3, requests_per_project=4, proposals_per_request=3,
+                  items_per_organization=3)
+
+
+def route_kwargs(seeded):
+    """Path parameters of every GET route, pointing at objects owned by the first user of each role"""
+    return {
+        'user/profile/': {},
+        'users/<int:user_id>/profile/': {'user_id': seeded['users']['entrepreneur'].pk},
+        'project-list-create': {},
+        'project-detail': {'pk': seeded['project'].pk},
+        'help_requests_create': {},
+        'help_request_detail': {'pk': seeded['financial_help_request'].pk},
+        'help-request-accepted-amount': {'pk': seeded['financial_help_request'].pk},
+        'help-proposals': {'proposal_type': 'financial'},
+        'help-proposal-detail': {'proposal_type': 'financial', 'pk': seeded['financial_proposal'].pk},
+        'entrepreneur-proposals': {},
+        'entrepreneur-proposals-by-type': {'proposal_type': 'technical'},
+        'entrepreneur-proposal-detail': {'proposal_type': 'technical', 'pk': seeded['technical_proposal'].pk},
+        'contract-list': {},
+        'contract-detail': {'proposal_type': 'financial', 'proposal_id': seeded['financial_proposal'].pk},
+        'contract-view-download': {'contract_id': seeded['contract'].pk, 'action': 'view'},
+        'collaboration-list': {},
+        'announcements': {},
+        'announcement-detail': {'pk': seeded['announcement'].pk},
+        'event-create': {},
+        'event-detail': {'event_id': seeded['event'].pk},
+        'public-announcements': {},
+        'public-announcement-detail': {'pk': seeded['announcement'].pk},
+        'public-events': {},
+        'public-event-detail': {'event_id': seeded['event'].pk},
+        'admin-users': {},
+        'admin-user-update': {'user_id': seeded['users']['investor'].pk},
+        'admin-user-stats': {},
+        'admin-analytics': {},
+    }
+
+
+def get_routes():
+    """(key, pattern) for every API route with a GET handler, keyed by name or route string"""
+    routes = []
+    for pattern in urlpatterns:
+        view_class = getattr(pattern.callback, 'view_class', None)
+        if view_class is None or not hasattr(view_class, 'get'):
+            # Media files, and POST-only endpoints (login, uploads, status updates)
+            continue
+        routes.append((pattern.name or str(pattern.pattern), pattern))
+    return routes
+
+
+def build_url(key, pattern, kwargs):
+    if pattern.name:
+        return reverse(pattern.name, kwargs=kwargs)
+    route = str(pattern.pattern)
+    for name, value in kwargs.items():
+        route = route.replace(f'<int:{name}>', str(value)).replace(f'<str:{name}>', str(value))
+    return f'/api/{route}'
+
+
+def percentile(timings, fraction):
+    ordered = sorted(timings)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+class EndpointBenchmark(TestCase):
+    scale = int(os.environ.get('BENCH_SCALE', 50))
+    repeat = int(os.environ.get('BENCH_REPEAT', 10))
+    report_path = os.environ.get('BENCH_REPORT', os.path.join(settings.BASE_DIR, 'bench_reports', 'bench_report.json'))
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.seeded = seed_dataset(users=cls.scale)
+
+    def client_for(self, role, seeded=None):
+        # Record server errors in the report instead of aborting the run
+        client = APIClient(raise_request_exception=False)
+        token = UserToken.for_user((seeded or self.seeded)['users'][role]).access_token
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        return client
+
+    def measure(self, client, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(url)
+        # Read now: every following request resets the connection's query log
+        query_count = len(queries)
+
+        timings = []
+        for _ in range(self.repeat):
+            start = time.perf_counter()
+            client.get(url)
+            timings.append((time.perf_counter() - start) * 1000)
+
+        return {
+            'status': response.status_code,
+            'queries': query_count,
+            'p50_ms': round(statistics.median(timings), 2),
+            'p95_ms': round(percentile(timings, 0.95), 2),
+            'bytes': len(response.content),
+        }
+
+    def test_endpoints(self):
+        kwargs = route_kwargs(self.seeded)
+        routes = get_routes()
+        missing = [key for key, _ in routes if key not in kwargs]
+        self.assertFalse(missing, f'Add path parameters for new routes to route_kwargs: {missing}')
+
+        results = {}
+        for role in ROLES:
+            client = self.client_for(role)
+            for key, pattern in routes:
+                url = build_url(key, pattern, kwargs[key])
+                results[f'{key} [{role}]'] = dict(url=url, **self.measure(client, url))
+
+        os.makedirs(os.path.dirname(os.path.abspath(self.report_path)), exist_ok=True)
+        with open(self.report_path, 'w') as report:
+            json.dump({'scale': self.scale, 'repeat': self.repeat, 'results': results}, report,
+                      indent=2, sort_keys=True)
+
+    def count_queries(self, **seed_options):
+        """Queries of every GET route for the first users of each role of a new seeded run"""
+        # Rolled back afterwards, so the small and large datasets do not add up
+        with transaction.atomic():
+            seeded = seed_dataset(**seed_options)
+            kwargs = route_kwargs(seeded)
+            counts = {}
+            for role in ROLES:
+                client = self.client_for(role, seeded)
+                for key, pattern in get_routes():
+                    # Cached feeds would hide their queries
+                    cache.clear()
+                    with CaptureQueriesContext(connection) as queries:
+                        client.get(build_url(key, pattern, kwargs[key]))
+                    counts[f'{key} [{role}]'] = len(queries)
+            transaction.set_rollback(True)
+        return counts
+
+    def test_query_counts_do_not_grow_with_rows(self):
+        small, large = self.count_queries(**SMALL_SEED), self.count_queries(**LARGE_SEED)
+        growing = [f'{route}: {small[route]} queries, {large[route]} with more rows'
+                   for route in small if large[route] != small[route]]
+        self.assertFalse(growing, 'Queries per row:\n' + '\n'.join(growing))
@@ -0,0 +1,97 @@
+#caching.py
+
+#Cached public feeds (announcements, events)
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import transaction
+from rest_framework.response import Response
+
+from .conditional import list_validators, not_modified_response, set_validators
+from .pagination import KeysetPagination
+
+
+def cache_is_shared():
+    """
+    False for the process-local caches (LocMemCache, DummyCache): each worker process has its
+    own, so an invalidation made by one is never seen by the others.
+    """
+    return not isinstance(caches['default'], (LocMemCache, DummyCache))
+
+
+def new_feed_version():
+    # Milliseconds: a version seeded after an eviction is above the versions used before it,
+    # unless the feed was bumped more than once per millisecond since its last seed
+    return int(time.time() * 1000)
+
+
+def feed_version(name):
+    """Current version of a feed; cached pages of older versions are never read again"""
+    key = f'feed_version:{name}'
+    version = cache.get(key)
+    if version is None:
+        version = new_feed_version()
+        if not cache.add(key, version, timeout=None):
+            # Seeded meanwhile by another process
+            version = cache.get(key, version)
+    return version
+
+
+def bump_feed_version(name):
+    try:
+        cache.incr(f'feed_version:{name}')
+    except ValueError:
+        # Evicted or never read: a new seed makes the old keys unreachable
+        cache.add(f'feed_version:{name}', new_feed_version(), timeout=None)
+
+
+def invalidate_feed(name):
+    """Bump the feed version once the current transaction commits"""
+    transaction.on_commit(lambda: bump_feed_version(name))
+
+
+def feed_cache_key(name, request):
+    url = hashlib.md5(request.build_absolute_uri().encode(), usedforsecurity=False).hexdigest()
+    return f'feed:{name}:{feed_version(name)}:{url}'
+
+
+def feed_response(request, name, queryset, serializer_class):
+    """
+    A page of a public feed, served from the cache when possible. The cached entry keeps
+    the serialized page with its ETag, Last-Modified and Link header, so a cache hit answers
+    both plain and conditional requests without touching the database. With a process-local
+    cache the feed is not cached, as the other processes would never see its invalidation.
+    """
+    key = feed_cache_key(name, request) if cache_is_shared() else None
+    cached = cache.get(key) if key else None
+
+    if cached is None:
+        etag, last_modified = list_validators(request, queryset)
+    else:
+        etag, last_modified = cached['etag'], cached['last_modified']
+
+    # The newest updated_at does not move when a row is deleted: only the ETag tells
+    not_modified = not_modified_response(request, etag, last_modified, check_last_modified=False)
+    if not_modified:
+        return not_modified
+
+    if cached is None:
+        paginator = KeysetPagination()
+        page = paginator.paginate_queryset(queryset, request)
+        cached = {
+            'data': list(serializer_class(page, many=True).data),
+            'link': paginator.get_link_header(),
+            'etag': etag,
+            'last_modified': last_modified,
+        }
+        if key:
+            cache.set(key, cached, timeout=getattr(settings, 'PUBLIC_FEED_CACHE_TIMEOUT', 300))
+
+    response = Response(cached['data'])
+    if cached['link']:
+        response['Link'] = cached['link']
+    return set_validators(response, etag, last_modified)
@@ -0,0 +1,48 @@
+#conditional.py
+
+#Conditional GET (ETag / Last-Modified) for list endpoints
+import hashlib
+
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+
+from .media import url_expiry
+
+
+def list_validators(request, queryset, field='updated_at'):
+    """
+    ETag and Last-Modified of a filtered list, from one aggregate query: the newest `field`
+    catches inserts and edits, the row count catches deletes. The full path is part of the
+    ETag so every page, filter and page size has its own, and so is the expiry of the signed
+    media URLs in the list. Last-Modified is informative only: a delete or unpublish leaves
+    the newest date unchanged, so lists revalidate on the ETag alone (see not_modified_response).
+    """
+    version = queryset.order_by().aggregate(last_modified=Max(field), count=Count('pk'))
+    last_modified = version['last_modified']
+    key = f"{request.get_full_path()}|{version['count']}|{last_modified.isoformat() if last_modified else ''}|" \
+          f"{url_expiry()}"
+    etag = quote_etag(hashlib.md5(key.encode(), usedforsecurity=False).hexdigest())
+    return etag, last_modified
+
+
+def not_modified_response(request, etag, last_modified, check_last_modified=True):
+    """
+    A 304 response when the client's If-None-Match / If-Modified-Since still match, else None.
+    Without check_last_modified, If-Modified-Since is ignored and only the ETag can give a 304.
+    """
+    response = get_conditional_response(
+        request,
+        etag=etag,
+        last_modified=int(last_modified.timestamp()) if last_modified and check_last_modified else None
+    )
+    return set_validators(response, etag, last_modified) if response else None
+
+
+def set_validators(response, etag, last_modified):
+    response['ETag'] = etag
+    if last_modified:
+        response['Last-Modified'] = http_date(last_modified.timestamp())
+    # Clients may keep the list but must revalidate it on every poll
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
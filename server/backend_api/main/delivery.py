@@ -0,0 +1,109 @@
+#delivery.py
+
+#Protected file delivery (contract PDFs)
+import hashlib
+import os
+import re
+from datetime import datetime, timezone as dt_timezone
+from urllib.parse import quote
+
+from django.conf import settings
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+
+from .conditional import not_modified_response, set_validators
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+CHUNK_SIZE = 64 * 1024
+
+
+def file_validators(path, name):
+    """ETag and Last-Modified of a stored file, from one stat() call"""
+    stat = os.stat(path)
+    etag = '"%s"' % hashlib.md5(f'{name}|{stat.st_size}|{stat.st_mtime_ns}'.encode(),
+                                usedforsecurity=False).hexdigest()
+    return etag, datetime.fromtimestamp(int(stat.st_mtime), tz=dt_timezone.utc), stat.st_size
+
+
+def parse_range(header, size):
+    """
+    (start, end) of a single byte range, inclusive; None to send the whole file (no header,
+    several ranges, or a syntax the server may ignore) and False when it cannot be satisfied.
+    """
+    match = RANGE_RE.match(header.replace(' ', '')) if header else None
+    if not match or match.groups() == ('', ''):
+        return None
+
+    first, last = match.groups()
+    if first:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+    else:
+        # Suffix range: the last N bytes
+        start, end = max(size - int(last), 0), size - 1
+    if start > end or start >= size:
+        return False
+    return start, end
+
+
+def read_range(path, start, length):
+    with open(path, 'rb') as f:
+        f.seek(start)
+        while length > 0:
+            chunk = f.read(min(CHUNK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+
+
+def offloaded_response(name, path, content_type):
+    """
+    Empty response telling the front server which file to send: nginx (X-Accel-Redirect to an
+    internal location serving MEDIA_ROOT) or Apache/lighttpd (X-Sendfile). Ranges are left to it.
+    """
+    response = HttpResponse(content_type=content_type)
+    if getattr(settings, 'FILE_DELIVERY', 'django') == 'nginx':
+        response['X-Accel-Redirect'] = getattr(settings, 'FILE_DELIVERY_INTERNAL_PREFIX', '/protected/') + \
+            quote(name)
+    else:
+        response['X-Sendfile'] = path
+    return response
+
+
+def file_response(request, field_file, content_type, disposition):
+    """
+    Send a stored file once the caller has checked access. Conditional requests get a 304 from
+    the file's ETag / Last-Modified; with FILE_DELIVERY set to 'nginx' or 'sendfile' the transfer
+    is handed to the front server, otherwise single byte ranges are served here.
+    """
+    path = field_file.path
+    etag, last_modified, size = file_validators(path, field_file.name)
+
+    not_modified = not_modified_response(request, etag, last_modified)
+    if not_modified:
+        return not_modified
+
+    if getattr(settings, 'FILE_DELIVERY', 'django') in ('nginx', 'sendfile'):
+        response = offloaded_response(field_file.name, path, content_type)
+    else:
+        byte_range = parse_range(request.META.get('HTTP_RANGE'), size)
+        if_range = request.META.get('HTTP_IF_RANGE')
+        if byte_range and if_range and if_range != etag:
+            # The client's partial copy is outdated: send the whole file
+            byte_range = None
+
+        if byte_range is False:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{size}'
+        elif byte_range:
+            start, end = byte_range
+            response = StreamingHttpResponse(read_range(path, start, end - start + 1), status=206,
+                                             content_type=content_type)
+            response['Content-Range'] = f'bytes {start}-{end}/{size}'
+            response['Content-Length'] = str(end - start + 1)
+        else:
+            response = FileResponse(open(path, 'rb'), content_type=content_type)
+        response['Accept-Ranges'] = 'bytes'
+
+    response['Content-Disposition'] = disposition
+    return set_validators(response, etag, last_modified)
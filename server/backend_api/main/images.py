@@ -0,0 +1,196 @@
+#images.py
+
+#Resized and WebP variants of uploaded images
+import logging
+import os
+from io import BytesIO
+
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+
+logger = logging.getLogger(__name__)
+
+# Image field of each model with variants; ProjectDocument only for IMAGE_DOCUMENT_TYPES
+IMAGE_FIELDS = {
+    'main.User': 'profile_image',
+    'main.Announcement': 'image',
+    'main.Event': 'image',
+    'main.ProjectDocument': 'file',
+}
+IMAGE_DOCUMENT_TYPES = ('project_photos',)
+
+DEFAULT_VARIANTS = {
+    'thumb': {'size': (320, 320), 'crop': True},  # Fixed size, cropped to fill
+    'medium': {'size': (1024, 1024), 'crop': False},  # Fits in the box, keeps the aspect ratio
+}
+
+
+def image_field_of(instance):
+    """Name of the instance's image field, None when it has no variants"""
+    field_name = IMAGE_FIELDS.get(instance._meta.label)
+    if instance._meta.label == 'main.ProjectDocument' and instance.document_type not in IMAGE_DOCUMENT_TYPES:
+        return None
+    return field_name
+
+
+def variants_outdated(instance):
+    """True when the image was replaced since its variants were made, or never had any"""
+    field_name = image_field_of(instance)
+    if not field_name:
+        return False
+    image = getattr(instance, field_name)
+    return bool(image) and instance.image_variants.get('source') != image.name
+
+
+def scheduled_key(instance):
+    return f'image_variants:{instance._meta.label}:{instance.pk}:{getattr(instance, image_field_of(instance)).name}'
+
+
+def schedule_variants(instance):
+    """Queue the variants of a newly saved image, once per image"""
+    from .jobs import enqueue
+
+    if cache.add(scheduled_key(instance), True, timeout=getattr(settings, 'JOB_LOCK_TIMEOUT', 600)):
+        enqueue('images.generate_variants', {
+            'model': instance._meta.label,
+            'pk': instance.pk,
+            'name': getattr(instance, image_field_of(instance)).name
+        })
+
+
+def schedule_backfill(instance):
+    """
+    An image without variants was listed: unless its own job is queued, queue one job making
+    the variants of every such image, so a page of legacy images costs one insert at most.
+    """
+    from .jobs import enqueue
+
+    if cache.get(scheduled_key(instance)):
+        return
+    if cache.add('image_variants:backfill', True, timeout=getattr(settings, 'JOB_LOCK_TIMEOUT', 600)):
+        enqueue('images.backfill_variants')
+
+
+def resize(image, size, crop):
+    from PIL import Image, ImageOps
+
+    if crop:
+        return ImageOps.fit(image, size, Image.Resampling.LANCZOS)
+    image = image.copy()
+    image.thumbnail(size, Image.Resampling.LANCZOS)
+    return image
+
+
+def encode(image, image_format):
+    buffer = BytesIO()
+    if image_format == 'WEBP':
+        image.save(buffer, 'WEBP', quality=80, method=4)
+    elif image_format == 'PNG':
+        image.save(buffer, 'PNG', optimize=True)
+    else:
+        image.convert('RGB').save(buffer, 'JPEG', quality=82, optimize=True, progressive=True)
+    return buffer.getvalue()
+
+
+def generate_variants(instance):
+    """
+    Write every variant of IMAGE_VARIANTS in the image's own format (PNG when it has
+    transparency, JPEG otherwise) and in WebP, then record their names on the instance:
+    {'source': image name, 'thumb': ..., 'thumb_webp': ..., ...}.
+    """
+    # Pillow is only needed by the worker
+    from PIL import Image, ImageOps, UnidentifiedImageError
+
+    field_name = image_field_of(instance)
+    image_file = getattr(instance, field_name)
+    storage = image_file.storage
+    variants = {'source': image_file.name}
+
+    try:
+        with storage.open(image_file.name) as f:
+            image = ImageOps.exif_transpose(Image.open(f))
+            image.load()
+    except (UnidentifiedImageError, Image.DecompressionBombError, OSError) as e:
+        # Not an image Pillow can read: recorded so it is not tried again
+        logger.warning(f"No variants for {instance._meta.label} {instance.pk} ({image_file.name}): {str(e)}")
+        return save_variants(instance, variants)
+
+    has_alpha = image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info)
+    image = image.convert('RGBA' if has_alpha else 'RGB')
+    image_format, extension = ('PNG', 'png') if has_alpha else ('JPEG', 'jpg')
+
+    root = os.path.splitext(os.path.basename(image_file.name))[0]
+    directory = os.path.dirname(image_file.name)
+    for variant, options in getattr(settings, 'IMAGE_VARIANTS', DEFAULT_VARIANTS).items():
+        resized = resize(image, tuple(options['size']), options.get('crop', False))
+        for key, variant_format, variant_extension in ((variant, image_format, extension),
+                                                       (f'{variant}_webp', 'WEBP', 'webp')):
+            variants[key] = storage.save(f'variants/{directory}/{root}.{variant}.{variant_extension}',
+                                         ContentFile(encode(resized, variant_format)))
+    return save_variants(instance, variants)
+
+
+def save_variants(instance, variants):
+    old_variants = instance.image_variants
+    instance.image_variants = variants
+    # updated_at too, so the ETag and Last-Modified of lists showing the variants change;
+    # post_save invalidates the cached feeds listing the instance
+    auto_now_fields = [field.name for field in instance._meta.concrete_fields if getattr(field, 'auto_now', False)]
+    instance.save(update_fields=['image_variants', *auto_now_fields])
+
+    storage = getattr(instance, image_field_of(instance)).storage
+    for key, name in old_variants.items():
+        if key != 'source' and name not in variants.values():
+            storage.delete(name)
+    return variants
+
+
+def generate_pending_variants(model, pk, name):
+    """Job body: skipped when the image was replaced or deleted meanwhile (its own job handles it)"""
+    instance = apps.get_model(model).objects.filter(pk=pk).first()
+    field_name = image_field_of(instance) if instance else None
+    if not field_name or getattr(instance, field_name).name != name:
+        return None
+    if instance.image_variants.get('source') == name:
+        return instance.image_variants
+    return generate_variants(instance)
+
+
+def backfill_variants():
+    """Job body: make the missing variants of every image; returns how many were made"""
+    generated = 0
+    for label, field_name in IMAGE_FIELDS.items():
+        instances = apps.get_model(label).objects.exclude(**{field_name: ''}).exclude(
+            **{f'{field_name}__isnull': True}
+        )
+        if label == 'main.ProjectDocument':
+            instances = instances.filter(document_type__in=IMAGE_DOCUMENT_TYPES)
+        for instance in instances.iterator():
+            if variants_outdated(instance):
+                generate_variants(instance)
+                generated += 1
+    cache.delete('image_variants:backfill')
+    return generated
+
+
+def variant_urls(instance, request=None):
+    """
+    URLs of the variants of the instance's image, None until they exist. Images uploaded
+    before variants existed get them queued here (see schedule_backfill).
+    """
+    field_name = image_field_of(instance)
+    if not field_name or not getattr(instance, field_name):
+        return None
+    if variants_outdated(instance):
+        schedule_backfill(instance)
+        return None
+
+    storage = getattr(instance, field_name).storage
+    urls = {}
+    for key, name in instance.image_variants.items():
+        if key != 'source':
+            url = storage.url(name)
+            urls[key] = request.build_absolute_uri(url) if request else url
+    return urls or None
@@ -0,0 +1,147 @@
+#jobs.py
+
+#Database-backed job queue
+import logging
+import socket
+import threading
+import traceback
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+_tasks = {}
+
+
+def task(name):
+    """Register a function as a job task: @task('contracts.render_pdf')"""
+    def register(func):
+        _tasks[name] = func
+        return func
+    return register
+
+
+def get_task(name):
+    # Tasks are registered when main.tasks is imported
+    from . import tasks  # noqa: F401
+    try:
+        return _tasks[name]
+    except KeyError:
+        raise LookupError(f"Unknown job task: {name}")
+
+
+def enqueue(task_name, payload=None, run_at=None, max_attempts=None):
+    """Store a job for the workers; it is visible to them once the current transaction commits"""
+    return Job.objects.create(
+        task=task_name,
+        payload=payload or {},
+        run_at=run_at or timezone.now(),
+        max_attempts=max_attempts or getattr(settings, 'JOB_MAX_ATTEMPTS', 5)
+    )
+
+
+def retry_delay(attempts):
+    """Exponential backoff: JOB_RETRY_BACKOFF seconds, doubled for every failed attempt, capped at an hour"""
+    base = getattr(settings, 'JOB_RETRY_BACKOFF', 10)
+    return timedelta(seconds=min(base * 2 ** (attempts - 1), 3600))
+
+
+def claim_jobs(worker_id, limit=1):
+    """Mark up to `limit` due jobs as running for this worker and return them"""
+    now = timezone.now()
+    due = Job.objects.filter(status='queued', run_at__lte=now).order_by('run_at', 'id')
+    claim = {'status': 'running', 'locked_by': worker_id, 'locked_at': now, 'attempts': F('attempts') + 1}
+
+    if connection.features.has_select_for_update_skip_locked:
+        # Concurrent workers skip each other's rows instead of waiting on them
+        with transaction.atomic():
+            job_ids = list(due.select_for_update(skip_locked=True).values_list('id', flat=True)[:limit])
+            Job.objects.filter(id__in=job_ids).update(**claim)
+    else:
+        # SQLite: claim candidates one by one, the status check makes each update a compare-and-swap
+        job_ids = [
+            job_id for job_id in due.values_list('id', flat=True)[:limit]
+            if Job.objects.filter(id=job_id, status='queued').update(**claim)
+        ]
+
+    return list(Job.objects.filter(id__in=job_ids).order_by('run_at', 'id'))
+
+
+def run_job(job):
+    """Run a claimed job, then mark it done, schedule a retry or move it to the dead state"""
+    try:
+        get_task(job.task)(**job.payload)
+    except Exception as e:
+        job.last_error = f"{e}\n{traceback.format_exc()}"
+        if job.attempts >= job.max_attempts:
+            job.status = 'dead'
+            job.finished_at = timezone.now()
+            logger.error(f"Job {job.pk} ({job.task}) is dead after {job.attempts} attempts: {str(e)}")
+        else:
+            job.status = 'queued'
+            job.run_at = timezone.now() + retry_delay(job.attempts)
+            logger.warning(f"Job {job.pk} ({job.task}) failed, retry at {job.run_at}: {str(e)}")
+    else:
+        job.status = 'done'
+        job.last_error = ''
+        job.finished_at = timezone.now()
+
+    job.locked_by = ''
+    job.locked_at = None
+    job.save(update_fields=['status', 'run_at', 'last_error', 'finished_at', 'locked_by', 'locked_at', 'updated_at'])
+    return job
+
+
+def requeue_stale_jobs():
+    """Give back jobs whose worker died while running them; returns how many were requeued"""
+    timeout = timedelta(seconds=getattr(settings, 'JOB_LOCK_TIMEOUT', 600))
+    stale = Job.objects.filter(status='running', locked_at__lt=timezone.now() - timeout)
+
+    stale.filter(attempts__gte=F('max_attempts')).update(
+        status='dead', locked_by='', locked_at=None, last_error='Worker stopped while running the job',
+        finished_at=timezone.now()
+    )
+    return stale.update(status='queued', locked_by='', locked_at=None)
+
+
+class Worker:
+    """Polls the jobs table and runs due jobs one at a time"""
+
+    def __init__(self, poll_interval=1.0, stop_event=None):
+        self.worker_id = f"{socket.gethostname()}-{uuid.uuid4().hex[:8]}"
+        self.poll_interval = poll_interval
+        self.stop_event = stop_event or threading.Event()
+        self.processed = 0
+
+    def run_once(self):
+        """Run the next due job; returns False when there was nothing to do"""
+        close_old_connections()
+        jobs = claim_jobs(self.worker_id)
+        for job in jobs:
+            run_job(job)
+            self.processed += 1
+        return bool(jobs)
+
+    def run(self, burst=False):
+        """Work until stopped, or until the queue is empty when burst is set"""
+        last_requeue = timezone.now()
+        try:
+            while not self.stop_event.is_set():
+                if self.run_once():
+                    continue
+                if burst:
+                    break
+
+                if timezone.now() - last_requeue > timedelta(minutes=1):
+                    requeue_stale_jobs()
+                    last_requeue = timezone.now()
+                self.stop_event.wait(self.poll_interval)
+        finally:
+            connection.close()
@@ -0,0 +1,119 @@
+#mail.py
+
+#Email outbox: views store messages, the worker sends them in batches
+import logging
+import threading
+from contextlib import suppress
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .jobs import enqueue
+from .models import OutboxEmail
+
+logger = logging.getLogger(__name__)
+
+# One SMTP connection per worker thread, kept open between batches
+_local = threading.local()
+
+
+def queue_email(to, subject, contents):
+    """Store an email in the outbox; the worker sends it once the transaction commits"""
+    with transaction.atomic():
+        email = OutboxEmail.objects.create(recipient=to, subject=subject, body='\n'.join(contents))
+        enqueue('emails.flush_outbox')
+    return email
+
+
+def check_smtp_credentials():
+    """The SMTP account comes from EMAIL_HOST_USER / EMAIL_HOST_PASSWORD in the environment"""
+    local_hosts = ('localhost', '127.0.0.1')
+    if settings.EMAIL_BACKEND == 'django.core.mail.backends.smtp.EmailBackend' and \
+            settings.EMAIL_HOST not in local_hosts and not (settings.EMAIL_HOST_USER and settings.EMAIL_HOST_PASSWORD):
+        raise ImproperlyConfigured("Set EMAIL_HOST_USER and EMAIL_HOST_PASSWORD to send emails")
+
+
+def get_smtp_connection():
+    connection = getattr(_local, 'connection', None)
+    if connection is None:
+        connection = _local.connection = get_connection(fail_silently=False)
+    return connection
+
+
+def reset_smtp_connection():
+    """Drop the thread's connection so the next batch reconnects"""
+    connection = getattr(_local, 'connection', None)
+    _local.connection = None
+    if connection is not None:
+        with suppress(Exception):
+            connection.close()
+
+
+def claim_emails(after_id, limit):
+    """Mark up to `limit` pending emails as sending; the status check makes each update a compare-and-swap"""
+    now = timezone.now()
+    stale = now - timedelta(seconds=getattr(settings, 'JOB_LOCK_TIMEOUT', 600))
+    candidates = OutboxEmail.objects.filter(
+        Q(status='pending') | Q(status='sending', locked_at__lt=stale),
+        id__gt=after_id
+    ).order_by('id').values_list('id', 'status')[:limit]
+
+    return [
+        email_id for email_id, email_status in candidates
+        if OutboxEmail.objects.filter(id=email_id, status=email_status).update(
+            status='sending', locked_at=now, attempts=F('attempts') + 1
+        )
+    ]
+
+
+def send_email(connection, email):
+    message = EmailMessage(
+        subject=email.subject,
+        body=email.body,
+        from_email=settings.DEFAULT_FROM_EMAIL,
+        to=[email.recipient],
+        connection=connection
+    )
+    message.send()
+
+
+def flush_outbox(batch_size=None):
+    """Send every pending email over one SMTP connection; returns (sent, to retry)"""
+    batch_size = batch_size or getattr(settings, 'EMAIL_OUTBOX_BATCH_SIZE', 50)
+    max_attempts = getattr(settings, 'EMAIL_MAX_ATTEMPTS', 5)
+    sent, retry, last_id = 0, 0, 0
+    # Before claiming anything, so the emails keep their attempts until the account is set
+    check_smtp_credentials()
+
+    while True:
+        email_ids = claim_emails(last_id, batch_size)
+        if not email_ids:
+            break
+        last_id = email_ids[-1]
+
+        for email in OutboxEmail.objects.filter(id__in=email_ids).order_by('id'):
+            try:
+                connection = get_smtp_connection()
+                # No-op when the connection is already open, and keeps send() from closing it
+                connection.open()
+                send_email(connection, email)
+            except Exception as e:
+                reset_smtp_connection()
+                email.status = 'failed' if email.attempts >= max_attempts else 'pending'
+                email.last_error = str(e)
+                retry += email.status == 'pending'
+                logger.warning(f"Error sending email {email.pk} to {email.recipient}: {str(e)}")
+            else:
+                email.status = 'sent'
+                email.last_error = ''
+                email.sent_at = timezone.now()
+                sent += 1
+            email.locked_at = None
+            email.save(update_fields=['status', 'last_error', 'sent_at', 'locked_at'])
+
+    return sent, retry
@@ -0,0 +1,49 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+# Runs in a fresh interpreter, like a gunicorn worker booting
+STARTUP_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+import django
+django.setup()
+setup_done = time.perf_counter()
+from django.urls import get_resolver
+get_resolver().url_patterns
+end = time.perf_counter()
+heavy = [name for name in ('pdfkit', 'yagmail', 'PIL.Image') if name in sys.modules]
+print(json.dumps({'setup': setup_done - start, 'urls': end - setup_done, 'heavy': heavy}))
+"""
+
+
+class Command(BaseCommand):
+    help = 'Measure django.setup() and URL resolver import time in fresh processes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=10, help='Number of processes to start')
+
+    def handle(self, *args, **options):
+        env = dict(os.environ, DJANGO_SETTINGS_MODULE=os.environ.get('DJANGO_SETTINGS_MODULE', settings.SETTINGS_MODULE))
+        runs = []
+        for _ in range(options['repeat']):
+            output = subprocess.run(
+                [sys.executable, '-c', STARTUP_SCRIPT],
+                cwd=settings.BASE_DIR, env=env, capture_output=True, text=True, check=True
+            ).stdout
+            runs.append(json.loads(output.strip().splitlines()[-1]))
+
+        for phase in ('setup', 'urls'):
+            timings = [run[phase] * 1000 for run in runs]
+            self.stdout.write(
+                f'{phase:>6}: median {statistics.median(timings):.1f} ms, '
+                f'min {min(timings):.1f} ms, max {max(timings):.1f} ms'
+            )
+        total = [(run['setup'] + run['urls']) * 1000 for run in runs]
+        self.stdout.write(f' total: median {statistics.median(total):.1f} ms over {len(runs)} runs')
+        self.stdout.write(f'Heavy modules loaded at startup: {", ".join(runs[-1]["heavy"]) or "none"}')
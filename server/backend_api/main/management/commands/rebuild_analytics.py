@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from main.analytics import rebuild_rollups
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the monthly analytics rollups from the project, help request and proposal tables'
+
+    def handle(self, *args, **options):
+        count = rebuild_rollups()
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {count} analytics rollup rows'))
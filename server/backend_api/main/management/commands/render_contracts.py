@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from main.contract import ContractHandler
+from main.models import Contract
+
+
+class Command(BaseCommand):
+    help = 'Render the PDF of contracts still waiting for it (e.g. after a worker restart)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--retry-failed', action='store_true', help='Also retry contracts whose render failed')
+
+    def handle(self, *args, **options):
+        statuses = ['pending_render', 'failed'] if options['retry_failed'] else ['pending_render']
+        contract_ids = Contract.objects.filter(render_status__in=statuses).values_list('id', flat=True)
+
+        rendered = failed = 0
+        for contract_id in contract_ids.iterator():
+            contract = ContractHandler.render_contract_pdf(contract_id)
+            if contract.render_status == 'rendered':
+                rendered += 1
+            else:
+                failed += 1
+                self.stderr.write(f'Contract {contract_id}: {contract.render_error}')
+
+        self.stdout.write(self.style.SUCCESS(f'Rendered {rendered} contracts, {failed} failed'))
@@ -0,0 +1,56 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, DecimalField, F, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+from main.models import HelpRequest, FinancialProposal, TechnicalProposal
+
+
+def accepted_subquery(model, aggregate):
+    accepted = model.objects.filter(help_request=OuterRef('pk'), status='accepted').order_by()
+    return Subquery(accepted.values('help_request').annotate(value=aggregate).values('value'))
+
+
+def expected_ledger():
+    """accepted_amount / accepted_count recomputed from the proposals"""
+    return {
+        'accepted_amount': Coalesce(
+            accepted_subquery(FinancialProposal, Sum('investment_amount')), Value(0),
+            output_field=DecimalField(max_digits=12, decimal_places=2)
+        ),
+        'accepted_count': (
+            Coalesce(accepted_subquery(FinancialProposal, Count('id')), Value(0)) +
+            Coalesce(accepted_subquery(TechnicalProposal, Count('id')), Value(0))
+        ),
+    }
+
+
+class Command(BaseCommand):
+    help = 'Recompute the accepted amount and count of help requests from their accepted proposals'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Only report the help requests that are off')
+
+    @transaction.atomic
+    def handle(self, *args, **options):
+        expected = expected_ledger()
+        mismatched = HelpRequest.objects.annotate(
+            expected_amount=expected['accepted_amount'],
+            expected_count=expected['accepted_count']
+        ).exclude(
+            accepted_amount=F('expected_amount'),
+            accepted_count=F('expected_count')
+        ).values_list('id', 'accepted_amount', 'expected_amount', 'accepted_count', 'expected_count')
+
+        rows = list(mismatched)
+        for help_request_id, amount, expected_amount, count, expected_count in rows:
+            self.stdout.write(
+                f'Help request {help_request_id}: amount {amount} -> {expected_amount}, count {count} -> {expected_count}'
+            )
+
+        if options['dry_run']:
+            self.stdout.write(f'{len(rows)} help requests need repair')
+            return
+
+        HelpRequest.objects.filter(id__in=[row[0] for row in rows]).update(**expected)
+        self.stdout.write(self.style.SUCCESS(f'Repaired {len(rows)} help requests'))
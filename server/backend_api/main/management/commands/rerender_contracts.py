@@ -0,0 +1,168 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.core.exceptions import ValidationError
+from django.core.files.base import ContentFile
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from main.contract import ContractHandler
+from main.models import Contract
+from main.pdf import RendererUnavailable, create_backend
+
+PROPOSAL_RELATIONS = ['help_request__entrepreneur__user', 'help_request__project', 'investor__user']
+
+_backend = None
+
+
+def init_worker():
+    # Spawned workers (Windows, macOS) start without Django; forked ones already have it
+    django.setup()
+
+
+def render_pdf(html_content):
+    """Runs in a worker process: (pdf bytes, None) or (None, error)"""
+    global _backend
+    try:
+        if _backend is None:
+            _backend = create_backend()
+        return _backend.render(html_content), None
+    except Exception as e:
+        return None, str(e)
+
+
+def read_checkpoint(path):
+    if path and os.path.exists(path):
+        with open(path) as checkpoint:
+            return int(checkpoint.read().strip() or 0)
+    return 0
+
+
+def write_checkpoint(path, contract_id):
+    # Written aside then renamed, so an interrupted run never leaves a truncated checkpoint
+    with open(f'{path}.tmp', 'w') as checkpoint:
+        checkpoint.write(str(contract_id))
+    os.replace(f'{path}.tmp', path)
+
+
+class Command(BaseCommand):
+    help = 'Regenerate the HTML and PDF of every contract, e.g. after a contract template change'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=os.cpu_count() or 1,
+                            help='Rendering processes; 0 renders in this process')
+        parser.add_argument('--batch-size', type=int, default=50, help='Contracts rendered and saved together')
+        parser.add_argument('--checkpoint', help='File holding the last saved contract id; the run resumes after it')
+        parser.add_argument('--keep-html', action='store_true',
+                            help='Render the stored HTML instead of regenerating it from the templates')
+        parser.add_argument('--dry-run', action='store_true', help='Only count the contracts that would be rendered')
+
+    def handle(self, *args, **options):
+        start_after = read_checkpoint(options['checkpoint'])
+        contracts = Contract.objects.filter(pk__gt=start_after).order_by('pk')
+        total = contracts.count()
+        if start_after:
+            self.stdout.write(f'Resuming after contract {start_after}')
+
+        if options['dry_run']:
+            self.stdout.write(f'{total} contracts would be rendered')
+            return
+
+        try:
+            # Fails here rather than marking every contract failed
+            create_backend()
+        except RendererUnavailable as e:
+            raise CommandError(str(e))
+
+        if not options['keep_html']:
+            contracts = contracts.select_related(
+                'financial_proposal__help_request__financialrequest',
+                *[f'financial_proposal__{relation}' for relation in PROPOSAL_RELATIONS],
+                *[f'technical_proposal__{relation}' for relation in PROPOSAL_RELATIONS],
+            )
+
+        executor = None
+        if options['processes'] > 0:
+            executor = ProcessPoolExecutor(max_workers=options['processes'], initializer=init_worker)
+
+        self.rendered = self.failed = 0
+        started = time.perf_counter()
+        try:
+            batch = []
+            for contract in contracts.iterator(chunk_size=options['batch_size']):
+                batch.append(contract)
+                if len(batch) == options['batch_size']:
+                    self.render_batch(batch, executor, options)
+                    self.report(total, started)
+                    batch = []
+            if batch:
+                self.render_batch(batch, executor, options)
+                self.report(total, started)
+        finally:
+            if executor:
+                executor.shutdown()
+
+        if options['checkpoint'] and os.path.exists(options['checkpoint']):
+            os.remove(options['checkpoint'])
+        self.stdout.write(self.style.SUCCESS(f'Rendered {self.rendered} contracts, {self.failed} failed'))
+
+    def render_batch(self, batch, executor, options):
+        renderable = []
+        self.stored_html = {contract.pk: contract.html_content for contract in batch}
+        for contract in batch:
+            if not options['keep_html']:
+                try:
+                    # Dated as created, not as re-rendered
+                    contract.html_content = ContractHandler.generate_html_content(
+                        contract.get_proposal(), contract.contract_type, contract.created_at
+                    )
+                except ValidationError as e:
+                    self.mark_failed(contract, e.messages[0])
+                    continue
+            renderable.append(contract)
+
+        documents = [contract.html_content for contract in renderable]
+        results = executor.map(render_pdf, documents) if executor else map(render_pdf, documents)
+
+        old_files = []
+        for contract, (pdf_content, error) in zip(renderable, results):
+            if error:
+                self.mark_failed(contract, error)
+                continue
+            if contract.pdf_file:
+                old_files.append(contract.pdf_file.name)
+            contract.pdf_file.save(ContractHandler.pdf_filename(contract), ContentFile(pdf_content), save=False)
+            contract.render_status = 'rendered'
+            contract.render_error = ''
+            contract.rendered_at = timezone.now()
+            self.rendered += 1
+
+        with transaction.atomic():
+            Contract.objects.bulk_update(
+                batch, ['html_content', 'pdf_file', 'render_status', 'render_error', 'rendered_at']
+            )
+        if options['checkpoint']:
+            write_checkpoint(options['checkpoint'], batch[-1].pk)
+
+        # Replaced files are only removed once the rows point at the new ones
+        storage = Contract._meta.get_field('pdf_file').storage
+        for name in old_files:
+            storage.delete(name)
+
+    def mark_failed(self, contract, error):
+        if contract.pdf_file:
+            # The previous PDF stays valid: keep it with the HTML it was rendered from
+            contract.html_content = self.stored_html[contract.pk]
+            contract.render_status = 'rendered'
+        else:
+            contract.render_status = 'failed'
+        contract.render_error = error
+        self.failed += 1
+
+    def report(self, total, started):
+        done = self.rendered + self.failed
+        rate = done / (time.perf_counter() - started)
+        self.stdout.write(f'{done}/{total} contracts ({self.failed} failed), {rate:.1f}/s')
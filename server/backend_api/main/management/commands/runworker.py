@@ -0,0 +1,51 @@
+import signal
+import threading
+
+from django.core.management.base import BaseCommand
+
+from main.jobs import Worker, requeue_stale_jobs
+from main.pdf import renderer_stats
+
+
+class Command(BaseCommand):
+    help = 'Run background job workers (contract PDFs, emails, images)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, default=1, help='Number of worker threads')
+        parser.add_argument('--poll-interval', type=float, default=1.0,
+                            help='Seconds to wait when the queue is empty')
+        parser.add_argument('--burst', action='store_true', help='Exit once the queue is empty')
+
+    def handle(self, *args, **options):
+        stop_event = threading.Event()
+        if threading.current_thread() is threading.main_thread():
+            signal.signal(signal.SIGTERM, lambda *_: stop_event.set())
+
+        requeued = requeue_stale_jobs()
+        if requeued:
+            self.stdout.write(f'Requeued {requeued} stale jobs')
+
+        workers = [Worker(options['poll_interval'], stop_event) for _ in range(options['concurrency'])]
+        threads = [
+            threading.Thread(target=worker.run, kwargs={'burst': options['burst']}, name=worker.worker_id)
+            for worker in workers
+        ]
+        self.stdout.write(f'Starting {len(threads)} workers')
+        for thread in threads:
+            thread.start()
+
+        try:
+            while any(thread.is_alive() for thread in threads):
+                for thread in threads:
+                    thread.join(timeout=1)
+        except KeyboardInterrupt:
+            stop_event.set()
+            for thread in threads:
+                thread.join()
+
+        processed = sum(worker.processed for worker in workers)
+        self.stdout.write(self.style.SUCCESS(f'Workers stopped after {processed} jobs'))
+
+        stats = renderer_stats()
+        if stats:
+            self.stdout.write(f'PDF renderer: {stats}')
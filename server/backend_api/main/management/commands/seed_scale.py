@@ -0,0 +1,52 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from main.seed import Seeder, SEED_PASSWORD
+
+
+class Command(BaseCommand):
+    help = 'Bulk-create a synthetic dataset (users, projects, help requests, proposals, contracts, events)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000,
+                            help='Total users: 50%% entrepreneurs, 40%% investors, 10%% organizations')
+        parser.add_argument('--projects-per-entrepreneur', type=int, default=2)
+        parser.add_argument('--requests-per-project', type=int, default=2,
+                            help='Help requests per project, alternating financial and technical')
+        parser.add_argument('--proposals-per-request', type=int, default=2,
+                            help='Proposals per help request; the first one is accepted')
+        parser.add_argument('--items-per-organization', type=int, default=3,
+                            help='Announcements and events per organization')
+        parser.add_argument('--months', type=int, default=12, help='Spread creation dates over this many months')
+        parser.add_argument('--seed', type=int, default=42, help='Random seed, the same seed gives the same data')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Rows per INSERT')
+        parser.add_argument('--chunk-size', type=int, default=1000, help='Entrepreneurs per transaction')
+        parser.add_argument('--prefix', help='Email prefix of this run; by default the next free "run<n>-" '
+                                              'once seeded users exist, so runs never collide')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        seeder = Seeder(
+            users=options['users'],
+            projects_per_entrepreneur=options['projects_per_entrepreneur'],
+            requests_per_project=options['requests_per_project'],
+            proposals_per_request=options['proposals_per_request'],
+            items_per_organization=options['items_per_organization'],
+            months=options['months'],
+            seed=options['seed'],
+            batch_size=options['batch_size'],
+            chunk_size=options['chunk_size'],
+            prefix=options['prefix'],
+            log=lambda message: self.stdout.write(message)
+        )
+        seeder.run()
+
+        for model, count in seeder.counts.items():
+            self.stdout.write(f'{model}: {count}')
+        elapsed = time.perf_counter() - started
+        total = sum(seeder.counts.values())
+        self.stdout.write(self.style.SUCCESS(
+            f'Created {total} rows in {elapsed:.1f}s ({total / elapsed:.0f} rows/s). '
+            f'Seeded emails start with "{seeder.prefix}"; every seeded user logs in with the password "{SEED_PASSWORD}"'
+        ))
@@ -0,0 +1,88 @@
+#media.py
+
+#Uploaded media: content-hashed names, signed expiring URLs, cacheable delivery
+import hashlib
+import mimetypes
+import os
+import time
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.core.files.storage import FileSystemStorage, default_storage
+from django.core.signing import Signer
+from django.http import FileResponse, Http404, HttpResponseForbidden
+from django.utils.crypto import constant_time_compare
+from django.utils.cache import patch_cache_control
+
+signer = Signer(salt='main.media')
+
+
+def url_expiry(now=None):
+    """
+    Expiry of URLs signed now. It is rounded to the MEDIA_URL_TTL window so every response of a
+    window links the same URL and browsers reuse their copy; URLs stay valid one to two windows.
+    """
+    ttl = getattr(settings, 'MEDIA_URL_TTL', 3600)
+    now = int(now if now is not None else time.time())
+    return (now // ttl + 2) * ttl
+
+
+def media_signature(name, expires):
+    return signer.signature(f'{name}:{expires}')
+
+
+class SignedMediaStorage(FileSystemStorage):
+    """
+    Default storage. Saved files get the hash of their content in their name, so a name always
+    holds the same bytes, and url() returns a signed URL that expires (see serve_media).
+    """
+
+    def save(self, name, content, max_length=None):
+        digest = hashlib.sha256()
+        if hasattr(content, 'chunks'):
+            for chunk in content.chunks():
+                digest.update(chunk)
+        else:
+            digest.update(content.read())
+        content.seek(0)
+
+        root, ext = os.path.splitext(name)
+        return super().save(f'{root}.{digest.hexdigest()[:12]}{ext}', content, max_length=max_length)
+
+    def url(self, name):
+        expires = url_expiry()
+        query = urlencode({'expires': expires, 'signature': media_signature(name, expires)})
+        return f'{super().url(name)}?{query}'
+
+
+def serve_media(request, name):
+    """
+    Media files for holders of a valid signed URL, without touching the database. The bytes are
+    sent by the front server when FILE_DELIVERY is 'nginx' or 'sendfile', by Django otherwise.
+    """
+    try:
+        expires = int(request.GET['expires'])
+        signature = request.GET['signature']
+    except (KeyError, ValueError):
+        return HttpResponseForbidden('Signed URL required')
+    remaining = expires - int(time.time())
+    if remaining <= 0 or not constant_time_compare(signature, media_signature(name, expires)):
+        return HttpResponseForbidden('Invalid or expired URL')
+
+    try:
+        path = default_storage.path(name)
+    except SuspiciousFileOperation:
+        raise Http404
+    if not os.path.isfile(path):
+        raise Http404
+
+    if getattr(settings, 'FILE_DELIVERY', 'django') in ('nginx', 'sendfile'):
+        from .delivery import offloaded_response  # delivery -> conditional -> media
+
+        response = offloaded_response(name, path, mimetypes.guess_type(name)[0] or 'application/octet-stream')
+    else:
+        response = FileResponse(open(path, 'rb'))
+    # A name never changes content, so the file can be kept until the URL expires
+    patch_cache_control(response, private=True, max_age=remaining, immutable=True)
+    return response
@@ -0,0 +1,175 @@
+#middleware.py
+import json
+import logging
+import random
+import time
+from contextlib import ExitStack
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.utils.functional import SimpleLazyObject
+from rest_framework import serializers
+
+from .authentication import ROLE_PROFILES, ClaimsUser
+
+logger = logging.getLogger('main.performance')
+
+# Timings of the request being handled, None when it is not sampled
+current_timings = ContextVar('current_timings', default=None)
+
+
+class RequestTimings:
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.queries = 0
+        self.db = 0.0
+        self.serialize = 0.0
+        self.render = 0.0
+        self.serializer_depth = 0
+
+    def record_query(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db += time.perf_counter() - start
+            self.queries += 1
+
+    def as_dict(self):
+        return {
+            'queries': self.queries,
+            'db_ms': round(self.db * 1000, 1),
+            'serialize_ms': round(self.serialize * 1000, 1),
+            'render_ms': round(self.render * 1000, 1),
+            'total_ms': round((time.perf_counter() - self.start) * 1000, 1),
+        }
+
+    def server_timing(self):
+        values = self.as_dict()
+        return ', '.join([
+            f'db;dur={values["db_ms"]};desc="{values["queries"]} queries"',
+            f'serialize;dur={values["serialize_ms"]}',
+            f'render;dur={values["render_ms"]}',
+            f'total;dur={values["total_ms"]}',
+        ])
+
+
+def timed_data(data_property):
+    """Wrap a serializer `data` property to add its time to the current request"""
+    def data(serializer):
+        timings = current_timings.get()
+        if timings is None or timings.serializer_depth:
+            # Not sampled, or already measured by an outer serializer
+            return data_property.fget(serializer)
+
+        timings.serializer_depth += 1
+        start = time.perf_counter()
+        try:
+            return data_property.fget(serializer)
+        finally:
+            timings.serialize += time.perf_counter() - start
+            timings.serializer_depth -= 1
+    return property(data)
+
+
+_serializers_instrumented = False
+
+
+def instrument_serializers():
+    global _serializers_instrumented
+    if _serializers_instrumented:
+        return
+    for cls in (serializers.BaseSerializer, serializers.Serializer, serializers.ListSerializer):
+        cls.data = timed_data(cls.__dict__['data'])
+    _serializers_instrumented = True
+
+
+class PerformanceMiddleware:
+    """
+    Measure SQL queries, DB time, serializer time and render time per request and
+    send them back in a Server-Timing header (and a log line when PERF_LOG is set).
+    Removed from the middleware chain entirely unless PERF_INSTRUMENTATION is set.
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'PERF_INSTRUMENTATION', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.sample_rate = getattr(settings, 'PERF_SAMPLE_RATE', 1.0)
+        self.log = getattr(settings, 'PERF_LOG', False)
+        instrument_serializers()
+
+    def __call__(self, request):
+        if self.sample_rate < 1 and random.random() >= self.sample_rate:
+            return self.get_response(request)
+
+        timings = RequestTimings()
+        token = current_timings.set(timings)
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(timings.record_query))
+                response = self.get_response(request)
+        finally:
+            current_timings.reset(token)
+
+        response['Server-Timing'] = timings.server_timing()
+        if self.log:
+            logger.info(json.dumps({
+                'method': request.method,
+                'path': request.path,
+                'status': response.status_code,
+                **timings.as_dict()
+            }))
+        return response
+
+    def process_template_response(self, request, response):
+        # DRF responses are rendered right after this hook returns
+        timings = current_timings.get()
+        if timings is not None:
+            render_start = time.perf_counter()
+            response.add_post_render_callback(
+                lambda rendered: setattr(timings, 'render', time.perf_counter() - render_start)
+            )
+        return response
+
+
+def resolve_profile(user):
+    """
+    The Entrepreneur, Investor or Organization row of the user's role, None for admins and
+    anonymous users. Loaded with its user in one joined query, which also fills a user that
+    was authenticated from token claims and caches the profile on it (user.entrepreneur, ...).
+    """
+    relation = ROLE_PROFILES.get(getattr(user, 'role', None)) if user.is_authenticated else None
+    if relation is None:
+        return None
+
+    related = get_user_model()._meta.get_field(relation)
+    claims_only = isinstance(user, ClaimsUser) and not user.loaded
+    if not claims_only and related.is_cached(user):
+        return related.get_cached_value(user)
+
+    profile = related.related_model.objects.select_related('user').filter(user_id=user.pk).first()
+    if not claims_only:
+        related.set_cached_value(user, profile)
+    elif profile is not None:
+        user._wrapped = profile.user
+    return profile
+
+
+class ProfileMiddleware:
+    """
+    Set request.profile to the authenticated user's role profile, resolved on first access
+    (after DRF authentication) and at most once per request. Test it with isinstance(), not
+    `is None`: it is a lazy object even when the user has no profile.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.profile = SimpleLazyObject(lambda: resolve_profile(request.user))
+        return self.get_response(request)
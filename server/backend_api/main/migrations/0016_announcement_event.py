@@ -0,0 +1,101 @@
+# Generated by Django 5.1.5 on 2026-10-18 17:50
+
+import django.core.validators
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('main', '0015_contract_collaboration'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Announcement',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('title', models.CharField(max_length=200)),
+                ('type', models.CharField(choices=[('funding', 'Financement'), ('training', 'Formation'), ('partnership', 'Partenariat'), ('event', 'Événement'), ('opportunity', 'Opportunité')], max_length=20)),
+                ('description', models.TextField()),
+                ('location', models.CharField(max_length=100)),
+                ('deadline', models.DateField()),
+                ('budget', models.DecimalField(blank=True, decimal_places=2, max_digits=12, null=True)),
+                ('requirements', models.JSONField(default=list)),
+                ('contact_email', models.EmailField(max_length=254)),
+                ('contact_phone', models.CharField(blank=True, max_length=20)),
+                ('image', models.ImageField(blank=True, null=True, upload_to='announcements/')),
+                ('status', models.CharField(choices=[('draft', 'Brouillon'), ('published', 'Publié')], default='draft', max_length=20)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'announcements',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='Event',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('title', models.CharField(max_length=200)),
+                ('status', models.CharField(choices=[('draft', 'Draft'), ('published', 'Published')], default='draft', max_length=20)),
+                ('type', models.CharField(choices=[('forum', 'forum'), ('workshop', 'workshop'), ('webinars', 'webinars'), ('conference', 'conference')], max_length=20)),
+                ('description', models.TextField()),
+                ('image', models.ImageField(blank=True, null=True, upload_to='events/')),
+                ('date', models.DateField()),
+                ('time', models.TimeField()),
+                ('location', models.CharField(max_length=300)),
+                ('capacity', models.PositiveIntegerField(validators=[django.core.validators.MinValueValidator(1)])),
+                ('registration_deadline', models.DateField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'events',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.AddField(
+            model_name='entrepreneur',
+            name='bio',
+            field=models.TextField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='investor',
+            name='bio',
+            field=models.TextField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='organization',
+            name='bio',
+            field=models.TextField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='profile_image',
+            field=models.ImageField(blank=True, null=True, upload_to='profile_images/'),
+        ),
+        migrations.AlterField(
+            model_name='organization',
+            name='founded_year',
+            field=models.IntegerField(validators=[django.core.validators.MinValueValidator(1900), django.core.validators.MaxValueValidator(2026)]),
+        ),
+        migrations.AlterField(
+            model_name='project',
+            name='sector',
+            field=models.CharField(choices=[('agriculture', 'Agriculture'), ('technology', 'Technologie'), ('crafts', 'Artisanat'), ('commerce', 'Commerce'), ('education', 'Éducation'), ('healthcare', 'Santé'), ('tourism', 'Tourisme'), ('manufacturing', 'Industrie'), ('services', 'Services')], max_length=50),
+        ),
+        migrations.AddField(
+            model_name='announcement',
+            name='organization',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='announcements', to='main.organization'),
+        ),
+        migrations.AddField(
+            model_name='event',
+            name='organization',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='events', to='main.organization'),
+        ),
+    ]
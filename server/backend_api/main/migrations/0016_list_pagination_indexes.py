@@ -0,0 +1,49 @@
+# Generated by Django 5.1.5 on 2026-10-18 17:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0016_announcement_event'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='collaboration',
+            index=models.Index(fields=['-start_date', '-id'], name='collab_start_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='contract',
+            index=models.Index(fields=['-created_at', '-id'], name='contract_created_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='financialproposal',
+            index=models.Index(fields=['-created_at', '-id'], name='finproposal_created_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='helprequest',
+            index=models.Index(fields=['-created_at', '-id'], name='helprequest_created_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='project',
+            index=models.Index(fields=['-created_at', '-id'], name='project_created_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='technicalproposal',
+            index=models.Index(fields=['-created_at', '-id'], name='techproposal_created_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['-created_at', '-id'], name='user_created_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='announcement',
+            index=models.Index(fields=['-created_at', '-id'], name='announcement_created_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(fields=['-created_at', '-id'], name='event_created_id_idx'),
+        ),
+    ]
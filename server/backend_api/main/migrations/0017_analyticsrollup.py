@@ -0,0 +1,39 @@
+# Generated by Django 5.1.5 on 2026-10-18 17:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0016_list_pagination_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AnalyticsRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField()),
+                ('sector', models.CharField(choices=[('agriculture', 'Agriculture'), ('technology', 'Technologie'), ('crafts', 'Artisanat'), ('commerce', 'Commerce'), ('education', 'Éducation'), ('healthcare', 'Santé'), ('tourism', 'Tourisme'), ('manufacturing', 'Industrie'), ('services', 'Services')], max_length=50)),
+                ('projects', models.PositiveIntegerField(default=0)),
+                ('help_requests', models.PositiveIntegerField(default=0)),
+                ('financial_requests', models.PositiveIntegerField(default=0)),
+                ('technical_requests', models.PositiveIntegerField(default=0)),
+                ('completed_requests', models.PositiveIntegerField(default=0)),
+                ('requested_projects', models.PositiveIntegerField(default=0)),
+                ('amount_requested', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+                ('financial_proposals', models.PositiveIntegerField(default=0)),
+                ('technical_proposals', models.PositiveIntegerField(default=0)),
+                ('accepted_financial_proposals', models.PositiveIntegerField(default=0)),
+                ('accepted_technical_proposals', models.PositiveIntegerField(default=0)),
+                ('accepted_investment', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'analytics_rollups',
+                'ordering': ['month', 'sector'],
+                'constraints': [models.UniqueConstraint(fields=('month', 'sector'), name='unique_rollup_month_sector')],
+            },
+        ),
+    ]
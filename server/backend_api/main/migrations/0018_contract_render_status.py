@@ -0,0 +1,35 @@
+# Generated by Django 5.1.5 on 2026-10-18 17:54
+
+from django.db import migrations, models
+
+
+def mark_existing_contracts_rendered(apps, schema_editor):
+    # Contracts created before background rendering already have their PDF
+    Contract = apps.get_model('main', 'Contract')
+    Contract.objects.exclude(pdf_file='').update(render_status='rendered')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0017_analyticsrollup'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='contract',
+            name='render_error',
+            field=models.TextField(blank=True),
+        ),
+        migrations.AddField(
+            model_name='contract',
+            name='render_status',
+            field=models.CharField(choices=[('pending_render', 'Pending render'), ('rendered', 'Rendered'), ('failed', 'Render failed')], default='pending_render', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='contract',
+            name='rendered_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.RunPython(mark_existing_contracts_rendered, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 5.1.5 on 2026-10-18 18:04
+
+from django.db import migrations, models
+from django.db.models import Count, DecimalField, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+
+def fill_accepted_ledger(apps, schema_editor):
+    HelpRequest = apps.get_model('main', 'HelpRequest')
+
+    def accepted(model_name, aggregate):
+        proposals = apps.get_model('main', model_name).objects.filter(
+            help_request=OuterRef('pk'), status='accepted'
+        ).order_by()
+        return Subquery(proposals.values('help_request').annotate(value=aggregate).values('value'))
+
+    HelpRequest.objects.update(
+        accepted_amount=Coalesce(
+            accepted('FinancialProposal', Sum('investment_amount')), Value(0),
+            output_field=DecimalField(max_digits=12, decimal_places=2)
+        ),
+        accepted_count=(
+            Coalesce(accepted('FinancialProposal', Count('id')), Value(0)) +
+            Coalesce(accepted('TechnicalProposal', Count('id')), Value(0))
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0020_outboxemail'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='helprequest',
+            name='accepted_amount',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=12),
+        ),
+        migrations.AddField(
+            model_name='helprequest',
+            name='accepted_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(fill_accepted_ledger, migrations.RunPython.noop),
+    ]
@@ -6,10 +6,11 @@ from django.contrib.auth.models import AbstractUser
 from django.core.validators import MinValueValidator, MaxValueValidator
 from datetime import datetime
 from django.core.files.base import ContentFile
-import pdfkit
 from django.core.exceptions import ValidationError
 
-from django.db.models import Q
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
 import logging
 
 from .contract import ContractHandler
@@ -29,6 +30,7 @@ class User(AbstractUser):
     updated_at = models.DateTimeField(auto_now=True)
     is_blocked = models.BooleanField(default=False)
     profile_image = models.ImageField(upload_to='profile_images/', null=True, blank=True)
+    image_variants = models.JSONField(default=dict, blank=True)  # Resized copies, see images.py
 
     groups = models.ManyToManyField(
         'auth.Group',
@@ -43,6 +45,30 @@ class User(AbstractUser):
 
     class Meta:
         db_table = 'users'
+        indexes = [
+            models.Index(fields=['-created_at', '-id'], name='user_created_id_idx'),
+        ]
+
+    # Fields copied into access tokens (authentication.UserToken) that a change must revoke
+    claim_fields = ('role', 'is_staff')
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Claims as stored, to detect changes on save
+        instance._loaded_claims = instance.claims()
+        return instance
+
+    def claims(self):
+        # From __dict__ so loading a row with deferred fields does not fetch them
+        return tuple(self.__dict__.get(field) for field in self.claim_fields)
+
+    def claims_changed(self):
+        return getattr(self, '_loaded_claims', None) not in (None, self.claims())
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        self._loaded_claims = self.claims()
 
 
 class Entrepreneur(models.Model):
@@ -123,6 +149,9 @@ class Project(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['-created_at', '-id'], name='project_created_id_idx'),
+        ]
 
     def __str__(self):
         return f"{self.project_name} - {self.get_status_display()}"
@@ -154,6 +183,7 @@ class ProjectDocument(models.Model):
     project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name='documents')
     document_type = models.CharField(max_length=50, choices=DOCUMENT_TYPES)
     file = models.FileField(upload_to='project_documents/%Y/%m/%d/')
+    image_variants = models.JSONField(default=dict, blank=True)  # project_photos only, see images.py
     uploaded_at = models.DateTimeField(auto_now_add=True)
     is_required = models.BooleanField(default=False)
 
@@ -187,9 +217,47 @@ class HelpRequest(models.Model):
     specific_need = models.CharField(max_length=255)
     description = models.TextField()
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    # Ledger of accepted proposals, only written with conditional F() updates
+    accepted_amount = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    accepted_count = models.PositiveIntegerField(default=0)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    LEDGER_FIELDS = ('accepted_amount', 'accepted_count')
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['-created_at', '-id'], name='helprequest_created_id_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        # Never write the ledger back from a possibly stale instance
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.LEDGER_FIELDS
+            ]
+        super().save(*args, **kwargs)
+
+    def record_acceptance(self, amount=0, max_amount=None, max_count=None):
+        """Count an accepted proposal in one UPDATE; returns False when it would go over capacity"""
+        help_requests = HelpRequest.objects.filter(pk=self.pk)
+        if max_amount is not None:
+            help_requests = help_requests.filter(accepted_amount__lte=max_amount - amount)
+        if max_count is not None:
+            help_requests = help_requests.filter(accepted_count__lt=max_count)
+        return bool(help_requests.update(
+            accepted_amount=F('accepted_amount') + amount,
+            accepted_count=F('accepted_count') + 1
+        ))
+
+    def release_acceptance(self, amount=0):
+        """Remove an accepted proposal from the ledger"""
+        HelpRequest.objects.filter(pk=self.pk).update(
+            accepted_amount=F('accepted_amount') - amount,
+            accepted_count=F('accepted_count') - 1
+        )
+
 
 class FinancialRequest(models.Model):
     help_request = models.OneToOneField(HelpRequest, on_delete=models.CASCADE)
@@ -242,6 +310,48 @@ class HelpProposal(models.Model):
     class Meta:
         abstract = True
 
+    # Subclasses define record_acceptance(), adding the proposal to the help request ledger
+    # (False when the request is full), and the capacity_error raised then
+    ledger_fields = ('help_request_id',)  # Fields an accepted proposal's ledger share depends on
+    ledger_change_error = "The help request and amount of an accepted proposal cannot change"
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Status and ledger share as stored, to detect acceptance changes on save
+        instance._loaded_status = instance.__dict__.get('status')
+        instance._loaded_ledger = instance.ledger_key()
+        return instance
+
+    def ledger_amount(self):
+        return 0
+
+    def ledger_key(self):
+        # From __dict__ so loading a row with deferred fields does not fetch them
+        return tuple(self.__dict__.get(field) for field in self.ledger_fields)
+
+    def save(self, *args, **kwargs):
+        was_accepted = getattr(self, '_loaded_status', None) == 'accepted'
+        is_accepted = self.status == 'accepted'
+        if was_accepted and self.ledger_key() != self._loaded_ledger:
+            # The ledger holds the share recorded at acceptance
+            raise ValidationError(self.ledger_change_error)
+
+        with transaction.atomic():
+            if is_accepted and not was_accepted and not self.record_acceptance():
+                raise ValidationError(self.capacity_error)
+            if was_accepted and not is_accepted:
+                self.help_request.release_acceptance(self.ledger_amount())
+            super().save(*args, **kwargs)
+        self._loaded_status = self.status
+        self._loaded_ledger = self.ledger_key()
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            if getattr(self, '_loaded_status', None) == 'accepted':
+                self.help_request.release_acceptance(self.ledger_amount())
+            return super().delete(*args, **kwargs)
+
 
 class FinancialProposal(HelpProposal):
     help_request = models.ForeignKey(
@@ -261,22 +371,23 @@ class FinancialProposal(HelpProposal):
     timeline = models.TextField()
     additional_terms = models.TextField(blank=True, null=True)
 
-    def save(self, *args, **kwargs):
-        if self.status == 'accepted':
-            # Calculate total accepted amount for this help request
-            accepted_proposals = FinancialProposal.objects.filter(
-                help_request=self.help_request,
-                status='accepted'
-            ).exclude(id=self.id)
+    class Meta:
+        indexes = [
+            models.Index(fields=['-created_at', '-id'], name='finproposal_created_id_idx'),
+        ]
 
-            total_accepted = sum(p.investment_amount for p in accepted_proposals)
-            total_with_current = total_accepted + self.investment_amount
+    capacity_error = "Accepting this proposal would exceed the requested amount"
 
-            # Check if total accepted amount would exceed requested amount
-            if total_with_current > self.help_request.financialrequest.amount_requested:
-                raise ValidationError("Total accepted investments would exceed requested amount")
+    ledger_fields = ('help_request_id', 'investment_amount')
 
-        super().save(*args, **kwargs)
+    def ledger_amount(self):
+        return self.investment_amount
+
+    def record_acceptance(self):
+        return self.help_request.record_acceptance(
+            amount=self.investment_amount,
+            max_amount=self.help_request.financialrequest.amount_requested
+        )
 
 
 class TechnicalProposal(HelpProposal):
@@ -299,6 +410,17 @@ class TechnicalProposal(HelpProposal):
     additional_resources = models.TextField(blank=True, null=True)
     expected_outcomes = models.TextField()
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['-created_at', '-id'], name='techproposal_created_id_idx'),
+        ]
+
+    capacity_error = "Another technical proposal is already accepted"
+
+    def record_acceptance(self):
+        # A technical request takes a single accepted proposal
+        return self.help_request.record_acceptance(max_count=1)
+
 logger = logging.getLogger(__name__)
 class Contract(models.Model):
     CONTRACT_TYPES = [
@@ -320,13 +442,27 @@ class Contract(models.Model):
         null=True,
         blank=True
     )
+    RENDER_STATUS_CHOICES = [
+        ('pending_render', 'Pending render'),
+        ('rendered', 'Rendered'),
+        ('failed', 'Render failed')
+    ]
+
     contract_type = models.CharField(max_length=20, choices=CONTRACT_TYPES)
     pdf_file = models.FileField(upload_to='contracts/')
     html_content = models.TextField()
+    render_status = models.CharField(max_length=20, choices=RENDER_STATUS_CHOICES, default='pending_render')
+    render_error = models.TextField(blank=True)
+    rendered_at = models.DateTimeField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     signature_entrepreneur = models.DateTimeField(null=True, blank=True)
     signature_investor = models.DateTimeField(null=True, blank=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['-created_at', '-id'], name='contract_created_id_idx'),
+        ]
+
     def clean(self):
         # Ensure only one type of proposal is set
         if (self.financial_proposal and self.technical_proposal) or \
@@ -372,6 +508,9 @@ class Collaboration(models.Model):
 
     class Meta:
         unique_together = ['entrepreneur', 'investor', 'project', 'contract']
+        indexes = [
+            models.Index(fields=['-start_date', '-id'], name='collab_start_id_idx'),
+        ]
 
 
 #Anouncement creation
@@ -400,6 +539,7 @@ class Announcement(models.Model):
     contact_email = models.EmailField()
     contact_phone = models.CharField(max_length=20, blank=True)
     image = models.ImageField(upload_to='announcements/', null=True, blank=True)
+    image_variants = models.JSONField(default=dict, blank=True)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='draft')
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -407,6 +547,9 @@ class Announcement(models.Model):
     class Meta:
         db_table = 'announcements'
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['-created_at', '-id'], name='announcement_created_id_idx'),
+        ]
 
 #Event creation
 class Event(models.Model):
@@ -444,6 +587,7 @@ class Event(models.Model):
         null=True,
         blank=True
     )
+    image_variants = models.JSONField(default=dict, blank=True)
 
     date = models.DateField()
     time = models.TimeField()
@@ -461,10 +605,114 @@ class Event(models.Model):
     class Meta:
         db_table = 'events'
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['-created_at', '-id'], name='event_created_id_idx'),
+        ]
 
     def __str__(self):
         return f"{self.title} - {self.date}"
 
     @property
     def is_draft(self):
-        return self.status == 'draft'
\ No newline at end of file
+        return self.status == 'draft'
+
+#Admin analytics
+class AnalyticsRollup(models.Model):
+    """
+    Per-month, per-sector counters behind the admin analytics dashboard.
+    Kept up to date by the signals in signals.py and rebuilt with `manage.py rebuild_analytics`.
+    """
+    month = models.DateField()
+    sector = models.CharField(max_length=50, choices=Project.SECTOR_CHOICES)
+
+    # Projects created during the month
+    projects = models.PositiveIntegerField(default=0)
+
+    # Help requests created during the month
+    help_requests = models.PositiveIntegerField(default=0)
+    financial_requests = models.PositiveIntegerField(default=0)
+    technical_requests = models.PositiveIntegerField(default=0)
+    completed_requests = models.PositiveIntegerField(default=0)
+    requested_projects = models.PositiveIntegerField(default=0)  # Distinct projects with a help request
+    amount_requested = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+
+    # Proposals created during the month
+    financial_proposals = models.PositiveIntegerField(default=0)
+    technical_proposals = models.PositiveIntegerField(default=0)
+    accepted_financial_proposals = models.PositiveIntegerField(default=0)
+    accepted_technical_proposals = models.PositiveIntegerField(default=0)
+    accepted_investment = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'analytics_rollups'
+        constraints = [
+            models.UniqueConstraint(fields=['month', 'sector'], name='unique_rollup_month_sector')
+        ]
+        ordering = ['month', 'sector']
+
+    def __str__(self):
+        return f"{self.month:%b %y} - {self.sector}"
+
+
+#Background jobs
+class Job(models.Model):
+    """A unit of deferred work, run by `manage.py runworker` (see jobs.py)"""
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('dead', 'Dead')  # Gave up after max_attempts
+    ]
+
+    task = models.CharField(max_length=100)
+    payload = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='queued')
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=5)
+    run_at = models.DateTimeField(default=timezone.now)
+    locked_by = models.CharField(max_length=100, blank=True)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = 'jobs'
+        indexes = [
+            models.Index(fields=['status', 'run_at'], name='job_status_run_at_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.task} #{self.pk} - {self.status}"
+
+
+class OutboxEmail(models.Model):
+    """An email waiting to be sent by the worker (see mail.py)"""
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('sending', 'Sending'),
+        ('sent', 'Sent'),
+        ('failed', 'Failed')  # Gave up after EMAIL_MAX_ATTEMPTS
+    ]
+
+    recipient = models.EmailField()
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = 'email_outbox'
+        indexes = [
+            models.Index(fields=['status', 'id'], name='outbox_status_id_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.subject} to {self.recipient} - {self.status}"
@@ -0,0 +1,103 @@
+#pagination.py
+import base64
+import json
+from datetime import datetime
+
+from django.conf import settings
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Opaque-cursor pagination over (<ordering_field>, id), newest first.
+
+    The cursor stores the position of the last row of the page, so rows inserted
+    while a client is paging never shift the following pages. The list itself
+    stays the response body; the next page is advertised in a Link header.
+    Every list is paged, PAGE_SIZE rows by default and API_MAX_PAGE_SIZE at most.
+    """
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def __init__(self, ordering_field='created_at', cursor_query_param=None, link_rel='next'):
+        self.ordering_field = ordering_field
+        if cursor_query_param:
+            self.cursor_query_param = cursor_query_param
+        self.link_rel = link_rel
+        self.next_cursor = None
+        self.request = None
+
+    def get_page_size(self, request):
+        max_page_size = getattr(settings, 'API_MAX_PAGE_SIZE', 500)
+        page_size = api_settings.PAGE_SIZE or max_page_size
+        try:
+            requested = int(request.query_params[self.page_size_query_param])
+            if requested > 0:
+                page_size = requested
+        except (KeyError, ValueError):
+            pass
+        return min(page_size, max_page_size)
+
+    def encode_cursor(self, obj):
+        position = {'v': getattr(obj, self.ordering_field).isoformat(), 'id': obj.pk}
+        return base64.urlsafe_b64encode(json.dumps(position).encode()).decode().rstrip('=')
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            padded = encoded + '=' * (-len(encoded) % 4)
+            position = json.loads(base64.urlsafe_b64decode(padded.encode()))
+            return datetime.fromisoformat(position['v']), int(position['id'])
+        except (TypeError, ValueError, KeyError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        queryset = queryset.order_by(f'-{self.ordering_field}', '-id')
+        page_size = self.get_page_size(request)
+        cursor = self.decode_cursor(request)
+        if cursor:
+            value, pk = cursor
+            queryset = queryset.filter(
+                Q(**{f'{self.ordering_field}__lt': value}) |
+                Q(**{self.ordering_field: value, 'id__lt': pk})
+            )
+
+        # Fetch one extra row to know whether there is a next page
+        results = list(queryset[:page_size + 1])
+        if len(results) > page_size:
+            results = results[:page_size]
+            self.next_cursor = self.encode_cursor(results[-1])
+        else:
+            self.next_cursor = None
+        return results
+
+    def get_next_link(self):
+        if self.next_cursor is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.next_cursor)
+
+    def get_link_header(self):
+        next_link = self.get_next_link()
+        return f'<{next_link}>; rel="{self.link_rel}"' if next_link else None
+
+    def get_paginated_response(self, data, status=None):
+        return paginated_response(data, self, status=status)
+
+
+def paginated_response(data, *paginators, status=None):
+    """Build a Response whose Link header advertises the next page of every paginator"""
+    response = Response(data, status=status)
+    links = [link for link in (p.get_link_header() for p in paginators) if link]
+    if links:
+        response['Link'] = ', '.join(links)
+    return response
@@ -0,0 +1,208 @@
+#pdf.py
+
+#PDF rendering for contracts
+import html
+import logging
+import os
+import re
+import shutil
+import subprocess
+import textwrap
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.utils.html import strip_tags
+
+logger = logging.getLogger(__name__)
+
+WKHTMLTOPDF_OPTIONS = [
+    '--page-size', 'A4',
+    '--margin-top', '0.75in',
+    '--margin-right', '0.75in',
+    '--margin-bottom', '0.75in',
+    '--margin-left', '0.75in',
+    '--encoding', 'UTF-8',
+    '--no-outline',
+]
+
+
+class RendererUnavailable(RuntimeError):
+    """No PDF renderer can run here (wkhtmltopdf missing): nothing can be rendered until it is fixed"""
+
+
+class WkhtmltopdfBackend:
+    """wkhtmltopdf reading the HTML on stdin and writing the PDF to stdout, no temporary files"""
+    name = 'wkhtmltopdf'
+
+    def __init__(self, binary, timeout=60):
+        self.command = [binary, '--quiet', *WKHTMLTOPDF_OPTIONS, '-', '-']
+        self.timeout = timeout
+
+    @staticmethod
+    def find_binary():
+        candidates = [
+            getattr(settings, 'WKHTMLTOPDF_PATH', None),
+            shutil.which('wkhtmltopdf'),
+            'C:\\Program Files\\wkhtmltopdf\\bin\\wkhtmltopdf.exe',  # Windows
+        ]
+        return next((path for path in candidates if path and os.path.exists(path)), None)
+
+    def render(self, html_content):
+        result = subprocess.run(self.command, input=html_content.encode('utf-8'), capture_output=True,
+                                timeout=self.timeout)
+        # wkhtmltopdf exits with 1 on page warnings (a missing image, ...) but still writes the PDF
+        if not result.stdout.startswith(b'%PDF'):
+            raise RuntimeError(f"wkhtmltopdf exited with {result.returncode}: "
+                               f"{result.stderr.decode(errors='replace').strip()}")
+        return result.stdout
+
+
+class TextBackend:
+    """
+    Pure-Python fallback for hosts without wkhtmltopdf: the text of the document, without
+    styling, on A4 pages in Helvetica.
+    """
+    name = 'text'
+    page_width, page_height, margin = 595, 842, 54
+    font_size, leading, line_width = 11, 15, 90
+
+    def text_lines(self, html_content):
+        content = re.sub(r'(?is)<(head|style|script)\b.*?</\1>', '', html_content)
+        content = re.sub(r'(?i)<br\s*/?>|</(p|div|h[1-6]|li|tr)>', '\n', content)
+        lines = []
+        for line in html.unescape(strip_tags(content)).splitlines():
+            line = ' '.join(line.split())
+            if line or (lines and lines[-1]):
+                lines.extend(textwrap.wrap(line, self.line_width) or [''])
+        return lines
+
+    @staticmethod
+    def escape(line):
+        return line.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)')
+
+    def render(self, html_content):
+        lines = self.text_lines(html_content) or ['']
+        per_page = (self.page_height - 2 * self.margin) // self.leading
+        pages = [lines[i:i + per_page] for i in range(0, len(lines), per_page)]
+
+        # 1 catalog, 2 page tree, 3 font, then a page and its content stream per page
+        objects = [b'<< /Type /Catalog /Pages 2 0 R >>', None,
+                   b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>']
+        page_refs = []
+        for page in pages:
+            text = '\n'.join(f'({self.escape(line)}) Tj T*' for line in page)
+            stream = (f'BT /F1 {self.font_size} Tf {self.leading} TL '
+                      f'{self.margin} {self.page_height - self.margin} Td\n{text}\nET').encode('cp1252', 'replace')
+            page_refs.append(f'{len(objects) + 1} 0 R')
+            objects.append(f'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {self.page_width} {self.page_height}] '
+                           f'/Resources << /Font << /F1 3 0 R >> >> /Contents {len(objects) + 2} 0 R >>'.encode())
+            objects.append(b'<< /Length %d >>\nstream\n%s\nendstream' % (len(stream), stream))
+        objects[1] = f'<< /Type /Pages /Kids [{" ".join(page_refs)}] /Count {len(pages)} >>'.encode()
+
+        pdf = bytearray(b'%PDF-1.4\n')
+        offsets = []
+        for number, body in enumerate(objects, start=1):
+            offsets.append(len(pdf))
+            pdf += b'%d 0 obj\n%s\nendobj\n' % (number, body)
+        xref = len(pdf)
+        pdf += b'xref\n0 %d\n0000000000 65535 f \n' % (len(objects) + 1)
+        pdf += b''.join(b'%010d 00000 n \n' % offset for offset in offsets)
+        pdf += b'trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n' % (len(objects) + 1, xref)
+        return bytes(pdf)
+
+
+class PDFRenderer:
+    """
+    A backend behind a fixed pool of render threads. Every thread of the process (job workers,
+    bulk renders) shares the pool, so at most `concurrency` renders run at once; the pool and
+    the resolved backend stay up between jobs.
+    """
+
+    def __init__(self, backend, concurrency=2):
+        self.backend = backend
+        self.concurrency = concurrency
+        self.executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='pdf-render')
+        self.lock = threading.Lock()
+        self.renders = 0
+        self.failures = 0
+        self.bytes = 0
+        self.render_seconds = 0.0
+        self.first_start = None
+        self.last_end = None
+
+    def render(self, html_content):
+        return self.executor.submit(self._render, html_content).result()
+
+    def render_many(self, documents):
+        """Render several documents in parallel, results in the same order"""
+        return list(self.executor.map(self._render, documents))
+
+    def _render(self, html_content):
+        start = time.perf_counter()
+        with self.lock:
+            if self.first_start is None:
+                self.first_start = start
+        try:
+            pdf_content = self.backend.render(html_content)
+        except Exception:
+            with self.lock:
+                self.failures += 1
+            raise
+        finally:
+            end = time.perf_counter()
+            with self.lock:
+                self.render_seconds += end - start
+                self.last_end = end
+
+        with self.lock:
+            self.renders += 1
+            self.bytes += len(pdf_content)
+        logger.info(f"Rendered {len(pdf_content)} bytes with {self.backend.name} in {(end - start) * 1000:.0f} ms")
+        return pdf_content
+
+    def stats(self):
+        with self.lock:
+            elapsed = (self.last_end - self.first_start) if self.first_start is not None else 0
+            return {
+                'backend': self.backend.name,
+                'concurrency': self.concurrency,
+                'renders': self.renders,
+                'failures': self.failures,
+                'bytes': self.bytes,
+                'avg_ms': round(self.render_seconds / self.renders * 1000, 1) if self.renders else None,
+                'renders_per_second': round(self.renders / elapsed, 2) if elapsed else None,
+            }
+
+
+def create_backend():
+    """
+    The backend named by PDF_RENDER_BACKEND: wkhtmltopdf, or 'text' for development and tests.
+    A missing wkhtmltopdf raises RendererUnavailable instead of silently rendering plain text.
+    """
+    if getattr(settings, 'PDF_RENDER_BACKEND', 'wkhtmltopdf') == 'text':
+        return TextBackend()
+
+    binary = WkhtmltopdfBackend.find_binary()
+    if not binary:
+        raise RendererUnavailable("PDF generation tool (wkhtmltopdf) not found; set PDF_RENDER_BACKEND=text "
+                                  "to render plain text PDFs in development")
+    return WkhtmltopdfBackend(binary, timeout=getattr(settings, 'PDF_RENDER_TIMEOUT', 60))
+
+
+_renderer = None
+_renderer_lock = threading.Lock()
+
+
+def get_renderer():
+    global _renderer
+    with _renderer_lock:
+        if _renderer is None:
+            _renderer = PDFRenderer(create_backend(), getattr(settings, 'PDF_RENDER_CONCURRENCY', 2))
+        return _renderer
+
+
+def renderer_stats():
+    """Counters of this process's renderer, None when nothing was rendered"""
+    return _renderer.stats() if _renderer is not None else None
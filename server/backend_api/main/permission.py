@@ -1,15 +1,17 @@
 # permissions.py
 from rest_framework import permissions
 
+from .models import Entrepreneur, Investor
+
 
 class IsProposalOwnerOrRequestEntrepreneur(permissions.BasePermission):
     def has_object_permission(self, request, view, obj):
         # Investor can only view/edit their own proposals
-        if hasattr(request.user, 'investor'):
-            return obj.investor == request.user.investor
+        if isinstance(request.profile, Investor):
+            return obj.investor_id == request.profile.pk
 
         # Entrepreneur can view proposals on their requests
-        if hasattr(request.user, 'entrepreneur'):
-            return obj.help_request.entrepreneur == request.user.entrepreneur
+        if isinstance(request.profile, Entrepreneur):
+            return obj.help_request.entrepreneur_id == request.profile.pk
 
-        return False
\ No newline at end of file
+        return False
@@ -0,0 +1,294 @@
+#seed.py
+
+#Synthetic dataset for benchmarks and load tests (manage.py seed_scale)
+import random
+from collections import defaultdict
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.utils import timezone
+
+from .analytics import rebuild_rollups
+from .caching import bump_feed_version
+from .models import User, Entrepreneur, Investor, Organization, Project, ProjectDocument, HelpRequest, \
+    FinancialRequest, TechnicalRequest, FinancialProposal, TechnicalProposal, Contract, Collaboration, \
+    Announcement, Event
+
+SEED_PASSWORD = 'benchmark-password'
+SECTORS = [sector for sector, _ in Project.SECTOR_CHOICES]
+INVESTMENT_TYPES = ['equity', 'loan', 'grant', 'revenue-sharing']
+SUPPORT_TYPES = ['mentoring', 'development', 'review', 'consulting']
+EXPERIENCE_LEVELS = ['junior', 'intermediate', 'senior', 'expert']
+CITIES = ['Yaounde', 'Douala', 'Bafoussam', 'Garoua', 'Bamenda', 'Kribi']
+
+
+def split_users(users):
+    """Share of each role in `users`: 50% entrepreneurs, 40% investors, 10% organizations, at least one each"""
+    organizations = max(1, users // 10)
+    investors = max(1, users * 4 // 10)
+    entrepreneurs = max(1, users - investors - organizations)
+    return entrepreneurs, investors, organizations
+
+
+def month_start(months_ago):
+    today = timezone.localdate().replace(day=1)
+    year, month = divmod(today.year * 12 + today.month - 1 - months_ago, 12)
+    return timezone.make_aware(datetime(year, month + 1, 1, 12))
+
+
+class Seeder:
+    """
+    Bulk-creates a consistent dataset in chunks of entrepreneurs, each chunk in its own transaction.
+
+    Every project gets two documents and `requests_per_project` help requests alternating financial and
+    technical; each request gets proposals from several investors, the first one accepted with its
+    contract and collaboration. Values are drawn from a seeded RNG so two runs produce the same data.
+    Entrepreneurs take the last `months` months in turn and their rows are created in their month, so
+    analytics and date-ordered lists span several months.
+
+    Seeded emails are unique per run: the first run uses entrepreneur0@seed.example.com, ...; later runs
+    (or a run after a failed one) get the next free 'run<n>-' prefix unless `prefix` is given, so seeding
+    again never collides with rows an earlier run committed.
+    """
+
+    def __init__(self, users=50, projects_per_entrepreneur=2, requests_per_project=2, proposals_per_request=2,
+                 items_per_organization=3, months=12, seed=42, batch_size=1000, chunk_size=1000, log=None,
+                 prefix=None):
+        self.entrepreneurs, self.investors, self.organizations = split_users(users)
+        self.projects_per_entrepreneur = projects_per_entrepreneur
+        self.requests_per_project = requests_per_project
+        self.proposals_per_request = proposals_per_request
+        self.items_per_organization = items_per_organization
+        self.months = max(1, months)
+        self.rng = random.Random(seed)
+        self.batch_size = batch_size
+        self.chunk_size = chunk_size
+        self.log = log or (lambda message: None)
+        self.password = make_password(SEED_PASSWORD)
+        self.prefix = prefix
+        self.counts = {}
+        self.samples = {'users': {}}
+
+    @staticmethod
+    def free_prefix():
+        seeded = User.objects.filter(email__endswith='@seed.example.com')
+        if not seeded.exists():
+            return ''
+        run = 2
+        while seeded.filter(email__startswith=f'run{run}-').exists():
+            run += 1
+        return f'run{run}-'
+
+    def bulk_create(self, model, objects):
+        created = model.objects.bulk_create(objects, batch_size=self.batch_size)
+        self.counts[model.__name__] = self.counts.get(model.__name__, 0) + len(created)
+        return created
+
+    def backdate(self, model, objects, dates, field='created_at'):
+        """Set `field` of each object to its date: auto_now_add ignores values given to bulk_create"""
+        ids_by_date = defaultdict(list)
+        for obj, created_at in zip(objects, dates):
+            ids_by_date[created_at].append(obj.pk)
+        for created_at, ids in ids_by_date.items():
+            for i in range(0, len(ids), self.batch_size):
+                model.objects.filter(pk__in=ids[i:i + self.batch_size]).update(**{field: created_at})
+
+    def create_users(self, role, prefix, start, count, **extra):
+        emails = [f'{self.prefix}{prefix}{i}@seed.example.com' for i in range(start, start + count)]
+        return self.bulk_create(User, [
+            User(username=email, email=email, role=role, first_name=prefix.title(), last_name=str(i),
+                 password=self.password, **extra)
+            for i, email in zip(range(start, start + count), emails)
+        ])
+
+    def chunks(self, total):
+        for start in range(0, total, self.chunk_size):
+            yield start, min(self.chunk_size, total - start)
+
+    def run(self):
+        if self.prefix is None:
+            self.prefix = self.free_prefix()
+        self.seed_investors()
+        self.seed_organizations()
+        with transaction.atomic():
+            self.samples['users']['admin'] = self.create_users('admin', 'admin', 0, 1, is_staff=True)[0]
+
+        for start, count in self.chunks(self.entrepreneurs):
+            with transaction.atomic():
+                self.seed_entrepreneurs(start, count)
+            self.log(f'Entrepreneurs {start + count}/{self.entrepreneurs}')
+
+        rebuild_rollups()
+        # bulk_create sends no signals, so cached public feeds are dropped here
+        bump_feed_version('announcements')
+        bump_feed_version('events')
+        return self.samples
+
+    def seed_investors(self):
+        self.investor_ids = []
+        for start, count in self.chunks(self.investors):
+            with transaction.atomic():
+                users = self.create_users('investor', 'investor', start, count)
+                investors = self.bulk_create(Investor, [
+                    Investor(user=user, first_name=user.first_name, last_name=user.last_name) for user in users
+                ])
+            self.investor_ids.extend(investor.pk for investor in investors)
+            self.samples['users'].setdefault('investor', users[0])
+            self.log(f'Investors {start + count}/{self.investors}')
+
+    def seed_organizations(self):
+        rng, today = self.rng, date.today()
+        for start, count in self.chunks(self.organizations):
+            with transaction.atomic():
+                users = self.create_users('ONG-Association', 'organization', start, count)
+                organizations = self.bulk_create(Organization, [
+                    Organization(user=user, organization_name=f'Organization {start + i}',
+                                 registration_number=f'REG-{self.prefix}{start + i}',
+                                 founded_year=rng.randint(1990, 2020))
+                    for i, user in enumerate(users)
+                ])
+                announcements = self.bulk_create(Announcement, [
+                    Announcement(organization=organization, title=f'Announcement {i}', type='funding',
+                                 description='Seeded announcement', location=rng.choice(CITIES),
+                                 deadline=today + timedelta(days=rng.randint(7, 90)),
+                                 budget=Decimal(rng.randrange(100000, 10000000, 50000)),
+                                 contact_email=organization.user.email, status='published')
+                    for organization in organizations
+                    for i in range(self.items_per_organization)
+                ])
+                events = self.bulk_create(Event, [
+                    Event(organization=organization, title=f'Event {i}', type='forum', description='Seeded event',
+                          date=today + timedelta(days=30 + i), time=time(rng.randint(8, 17)),
+                          location=rng.choice(CITIES), capacity=rng.randint(20, 500),
+                          registration_deadline=today + timedelta(days=20 + i), status='published')
+                    for organization in organizations
+                    for i in range(self.items_per_organization)
+                ])
+            self.samples['users'].setdefault('ONG-Association', users[0])
+            self.samples.setdefault('announcement', announcements[0] if announcements else None)
+            self.samples.setdefault('event', events[0] if events else None)
+            self.log(f'Organizations {start + count}/{self.organizations}')
+
+    def seed_entrepreneurs(self, start, count):
+        rng = self.rng
+        users = self.create_users('entrepreneur', 'entrepreneur', start, count)
+        entrepreneurs = self.bulk_create(Entrepreneur, [
+            Entrepreneur(user=user, first_name=user.first_name, last_name=user.last_name) for user in users
+        ])
+        month_of_entrepreneur = {
+            entrepreneur.pk: month_start((start + i) % self.months) for i, entrepreneur in enumerate(entrepreneurs)
+        }
+
+        projects = self.bulk_create(Project, [
+            Project(user_id=entrepreneur.user_id, entrepreneur=entrepreneur, project_name=f'Project {start + i}-{j}',
+                    sector=rng.choice(SECTORS), description='Seeded project', target_audience='Local communities',
+                    estimated_budget=Decimal(rng.randrange(1000000, 50000000, 100000)), financing_plan='Mixed',
+                    status=rng.choice(['pending', 'approved', 'approved', 'rejected']))
+            for i, entrepreneur in enumerate(entrepreneurs)
+            for j in range(self.projects_per_entrepreneur)
+        ])
+        self.bulk_create(ProjectDocument, [
+            ProjectDocument(project=project, document_type=document_type,
+                            file=f'project_documents/seed/{project.pk}-{document_type}.bin')
+            for project in projects
+            for document_type in ('project_photos', 'business_register')
+        ])
+
+        # Values are drawn first so the acceptance ledger can be written with the help requests
+        plans = []
+        for project in projects:
+            for k in range(self.requests_per_project):
+                request_type = 'financial' if k % 2 == 0 else 'technical'
+                requested = Decimal(rng.randrange(500000, 10000000, 50000))
+                amounts = [(requested / self.proposals_per_request).quantize(Decimal('1'))
+                           for _ in range(self.proposals_per_request)]
+                plans.append((project, request_type, requested, amounts))
+
+        help_requests = self.bulk_create(HelpRequest, [
+            HelpRequest(project=project, entrepreneur_id=project.entrepreneur_id, request_type=request_type,
+                        specific_need=f'{request_type.title()} need', description='Seeded help request',
+                        status=rng.choice(['pending', 'pending', 'completed']),
+                        accepted_count=1 if self.proposals_per_request else 0,
+                        accepted_amount=amounts[0] if request_type == 'financial' and amounts else 0)
+            for project, request_type, requested, amounts in plans
+        ])
+        self.bulk_create(FinancialRequest, [
+            FinancialRequest(help_request=help_request, amount_requested=requested,
+                             interest_rate=Decimal(rng.randrange(0, 1500)) / 100, duration_months=rng.choice([6, 12, 24]))
+            for help_request, (_, request_type, requested, _) in zip(help_requests, plans)
+            if request_type == 'financial'
+        ])
+        self.bulk_create(TechnicalRequest, [
+            TechnicalRequest(help_request=help_request, expertise_needed='Irrigation',
+                             estimated_duration=rng.randint(7, 180))
+            for help_request, (_, request_type, _, _) in zip(help_requests, plans)
+            if request_type == 'technical'
+        ])
+
+        financial_proposals, technical_proposals = [], []
+        for i, (help_request, (_, request_type, _, amounts)) in enumerate(zip(help_requests, plans)):
+            # Requests of one project go to the same investors
+            first_investor = (start * self.projects_per_entrepreneur + i // self.requests_per_project)
+            for j in range(self.proposals_per_request):
+                common = dict(help_request=help_request,
+                              investor_id=self.investor_ids[(first_investor + j) % len(self.investor_ids)],
+                              status='accepted' if j == 0 else rng.choice(['pending', 'refused']))
+                if request_type == 'financial':
+                    financial_proposals.append(FinancialProposal(
+                        investment_amount=amounts[j], investment_type=rng.choice(INVESTMENT_TYPES),
+                        payment_schedule='monthly', expected_return='5%', timeline='12 months', **common
+                    ))
+                else:
+                    technical_proposals.append(TechnicalProposal(
+                        expertise='Irrigation systems', experience_level=rng.choice(EXPERIENCE_LEVELS),
+                        availability='Weekdays', support_duration='3 months', support_type=rng.choice(SUPPORT_TYPES),
+                        proposed_approach='On-site visits', expected_outcomes='Working irrigation', **common
+                    ))
+        self.bulk_create(FinancialProposal, financial_proposals)
+        self.bulk_create(TechnicalProposal, technical_proposals)
+
+        accepted = [p for p in financial_proposals + technical_proposals if p.status == 'accepted']
+        contracts = self.bulk_create(Contract, [
+            Contract(
+                financial_proposal=proposal if isinstance(proposal, FinancialProposal) else None,
+                technical_proposal=proposal if isinstance(proposal, TechnicalProposal) else None,
+                contract_type='financial' if isinstance(proposal, FinancialProposal) else 'technical',
+                html_content='<p>Seeded contract</p>'
+            )
+            for proposal in accepted
+        ])
+        collaborations = self.bulk_create(Collaboration, [
+            Collaboration(entrepreneur_id=proposal.help_request.entrepreneur_id, investor_id=proposal.investor_id,
+                          project_id=proposal.help_request.project_id, contract=contract,
+                          collaboration_type=contract.contract_type)
+            for proposal, contract in zip(accepted, contracts)
+        ])
+
+        def months(entrepreneur_ids):
+            return [month_of_entrepreneur[entrepreneur_id] for entrepreneur_id in entrepreneur_ids]
+
+        self.backdate(Project, projects, months(p.entrepreneur_id for p in projects))
+        self.backdate(HelpRequest, help_requests, months(r.entrepreneur_id for r in help_requests))
+        for model, proposals in ((FinancialProposal, financial_proposals), (TechnicalProposal, technical_proposals)):
+            self.backdate(model, proposals, months(p.help_request.entrepreneur_id for p in proposals))
+        self.backdate(Contract, contracts, months(p.help_request.entrepreneur_id for p in accepted))
+        self.backdate(Collaboration, collaborations, months(c.entrepreneur_id for c in collaborations),
+                      field='start_date')
+
+        if start == 0:
+            # Projects and help requests are absent when their per-parent counts are 0
+            self.samples['users']['entrepreneur'] = users[0]
+            self.samples.update({
+                'project': projects[0] if projects else None,
+                'financial_help_request': help_requests[0] if help_requests else None,
+                'financial_proposal': financial_proposals[0] if financial_proposals else None,
+                'technical_proposal': technical_proposals[0] if technical_proposals else None,
+                'contract': contracts[0] if contracts else None,
+            })
+
+
+def seed_dataset(users=50, **options):
+    """Seed a dataset and return the first user of every role and one object of each kind they own"""
+    return Seeder(users=users, **options).run()
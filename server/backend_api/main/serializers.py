@@ -2,13 +2,25 @@ import decimal
 import json
 
 from django.contrib.auth.password_validation import validate_password
+from django.core.exceptions import ObjectDoesNotExist
 from rest_framework import serializers
 
 # Create your serializers here.
-from django.conf import settings
 from rest_framework import serializers
 from .models import User, Entrepreneur, Organization, Investor, Project, ProjectDocument, TechnicalRequest, HelpRequest, \
     FinancialRequest, FinancialProposal, TechnicalProposal, Collaboration, Contract, Announcement, Event
+from .images import variant_urls
+
+
+class ImageVariantsField(serializers.ReadOnlyField):
+    """URLs of the resized / WebP copies of the object's image (images.py), None until they exist"""
+
+    def __init__(self, **kwargs):
+        kwargs['source'] = '*'
+        super().__init__(**kwargs)
+
+    def to_representation(self, instance):
+        return variant_urls(instance, self.context.get('request'))
 
 
 class EntrepreneurSerializer(serializers.ModelSerializer):
@@ -63,10 +75,11 @@ class UserProfileSerializer(serializers.ModelSerializer):
     email = serializers.EmailField()
     phone = serializers.CharField()
     profile_image = serializers.ImageField(read_only=True)
+    image_variants = ImageVariantsField()
 
     class Meta:
         model = User
-        fields = ['email', 'phone', 'profile_image']
+        fields = ['email', 'phone', 'profile_image', 'image_variants']
 
 
 class EntrepreneurProfileSerializer(serializers.ModelSerializer):
@@ -156,6 +169,14 @@ class PasswordResetConfirmSerializer(serializers.Serializer):
             raise serializers.ValidationError("Passwords do not match")
         return data
 
+def get_related_or_none(obj, name):
+    """Return a one-to-one related object, or None when it does not exist"""
+    try:
+        return getattr(obj, name)
+    except ObjectDoesNotExist:
+        return None
+
+
 # Admin handling users
 class UserListSerializer(serializers.ModelSerializer):
     name = serializers.SerializerMethodField()
@@ -166,17 +187,19 @@ class UserListSerializer(serializers.ModelSerializer):
         fields = ['id', 'email', 'role', 'name', 'status', 'is_active', 'created_at']
 
     def get_name(self, obj):
+        # Profiles are read through the reverse one-to-ones, so a queryset with
+        # select_related('entrepreneur', 'investor', 'organization') costs no extra query
         if obj.role == 'ONG-Association':
-            org = Organization.objects.filter(user=obj).first()
+            org = get_related_or_none(obj, 'organization')
             return org.organization_name if org else ''
 
         if obj.role == 'entrepreneur':
-            entrepreneur = Entrepreneur.objects.filter(user=obj).first()
+            entrepreneur = get_related_or_none(obj, 'entrepreneur')
             if entrepreneur:
                 return f"{entrepreneur.first_name} {entrepreneur.last_name}"
 
         if obj.role == 'investor':
-            investor = Investor.objects.filter(user=obj).first()
+            investor = get_related_or_none(obj, 'investor')
             if investor:
                 return f"{investor.first_name} {investor.last_name}"
 
@@ -412,9 +435,11 @@ class UserUpdateSerializer(serializers.ModelSerializer):
 
 #Project
 class ProjectDocumentSerializer(serializers.ModelSerializer):
+    image_variants = ImageVariantsField()
+
     class Meta:
         model = ProjectDocument
-        fields = ['id', 'document_type', 'file', 'uploaded_at', 'is_required']
+        fields = ['id', 'document_type', 'file', 'image_variants', 'uploaded_at', 'is_required']
         extra_kwargs = {
             'file': {'required': True},
             'document_type': {'required': True}
@@ -425,6 +450,7 @@ class ProjectSerializer(serializers.ModelSerializer):
     status_display = serializers.CharField(source='get_status_display', read_only=True)
     entrepreneur_name = serializers.SerializerMethodField()
     project_image = serializers.SerializerMethodField()
+    project_image_variants = serializers.SerializerMethodField()
 
     class Meta:
         model = Project
@@ -433,7 +459,7 @@ class ProjectSerializer(serializers.ModelSerializer):
             'specific_objectives', 'target_audience', 'estimated_budget',
             'financing_plan', 'status', 'status_display', 'admin_comments',
             'created_at', 'updated_at', 'documents', 'entrepreneur_name',
-            'project_image'
+            'project_image', 'project_image_variants'
         ]
         read_only_fields = ['status', 'admin_comments', 'created_at', 'updated_at', 'user', 'entrepreneur']
 
@@ -460,15 +486,28 @@ class ProjectSerializer(serializers.ModelSerializer):
     def get_entrepreneur_name(self, obj):
         return f"{obj.entrepreneur.first_name} {obj.entrepreneur.last_name}"
 
+    @staticmethod
+    def project_photo(obj):
+        # Pick the photo from documents.all() so a prefetched queryset is reused
+        return min(
+            (doc for doc in obj.documents.all() if doc.document_type == 'project_photos'),
+            key=lambda doc: doc.pk,
+            default=None
+        )
+
     def get_project_image(self, obj):
-        project_image = obj.documents.filter(document_type='project_photos').first()
+        project_image = self.project_photo(obj)
         if project_image and project_image.file:
             request = self.context.get('request')
             if request:
                 return request.build_absolute_uri(project_image.file.url)
-            return f"{settings.MEDIA_URL}{project_image.file}"
+            return project_image.file.url
         return None
 
+    def get_project_image_variants(self, obj):
+        project_image = self.project_photo(obj)
+        return variant_urls(project_image, self.context.get('request')) if project_image else None
+
 
 class FinancialRequestSerializer(serializers.ModelSerializer):
     total_repayment = serializers.SerializerMethodField()
@@ -507,8 +546,8 @@ class HelpRequestSerializer(serializers.ModelSerializer):
         model = HelpRequest
         fields = ['id', 'project', 'entrepreneur','entrepreneur_details', 'project_details', 'request_type', 'specific_need',
                   'description', 'status', 'financial_details', 'technical_details',
-                  'created_at', 'updated_at']
-        read_only_fields = ['entrepreneur', 'status']
+                  'accepted_amount', 'accepted_count', 'created_at', 'updated_at']
+        read_only_fields = ['entrepreneur', 'status', 'accepted_amount', 'accepted_count']
 
     def get_entrepreneur_details(self, obj):
         return {
@@ -558,6 +597,17 @@ class BaseHelpProposalSerializer(serializers.ModelSerializer):
     investor_name = serializers.SerializerMethodField()
     help_request_details = serializers.SerializerMethodField()
 
+    def validate(self, attrs):
+        # The help request ledger holds the share of answered proposals (HelpProposal.ledger_fields)
+        if self.instance is not None and self.instance.status != 'pending':
+            changed = [field for field in ('help_request', 'investment_amount')
+                       if field in attrs and attrs[field] != getattr(self.instance, field)]
+            if changed:
+                raise serializers.ValidationError(
+                    {field: "Cannot change once the proposal is accepted or refused" for field in changed}
+                )
+        return attrs
+
     def get_investor_name(self, obj):
         return f"{obj.investor.first_name} {obj.investor.last_name}"
 
@@ -601,7 +651,7 @@ class ContractSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Contract
-        fields = ['id', 'contract_type', 'pdf_file', 'proposal_details']
+        fields = ['id', 'contract_type', 'pdf_file', 'render_status', 'proposal_details']
 
     def get_contract_type(self, obj):
         return 'financial' if obj.financial_proposal else 'technical'
@@ -654,6 +704,8 @@ class CollaborationStatsSerializer(serializers.Serializer):
 
 #Organisation announcement
 class AnnouncementSerializer(serializers.ModelSerializer):
+    image_variants = ImageVariantsField()
+
     class Meta:
         model = Announcement
         fields = '__all__'
@@ -744,10 +796,12 @@ class EventSerializer(serializers.ModelSerializer):
     """
     Enhanced serializer for Event model with comprehensive validation
     """
+    image_variants = ImageVariantsField()
+
     class Meta:
         model = Event
         fields = [
-            'id', 'title', 'type', 'description', 'image',
+            'id', 'title', 'type', 'description', 'image', 'image_variants',
             'date', 'time', 'location', 'capacity',
             'registration_deadline', 'status'
         ]
@@ -0,0 +1,142 @@
+#signals.py
+from django.db import transaction
+from django.db.models import DateField
+from django.db.models.functions import TruncMonth
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from .analytics import month_of, schedule_refresh
+from .authentication import allow_user, deny_user, update_claims
+from .caching import invalidate_feed
+from .images import schedule_variants, variants_outdated
+from .models import User, Project, ProjectDocument, HelpRequest, FinancialRequest, FinancialProposal, TechnicalProposal, \
+    Announcement, Event
+
+
+#Analytics rollups
+def project_sector(project_id):
+    return Project.objects.filter(pk=project_id).values_list('sector', flat=True).first()
+
+
+def help_request_sector(help_request_id):
+    return Project.objects.filter(help_requests=help_request_id).values_list('sector', flat=True).first()
+
+
+def project_activity_months(project_id):
+    """Months holding help requests or proposals of a project"""
+    months = set()
+    for queryset in (
+        HelpRequest.objects.filter(project_id=project_id),
+        FinancialProposal.objects.filter(help_request__project_id=project_id),
+        TechnicalProposal.objects.filter(help_request__project_id=project_id),
+    ):
+        months.update(
+            queryset.annotate(rollup_month=TruncMonth('created_at', output_field=DateField()))
+            .values_list('rollup_month', flat=True).distinct().order_by()
+        )
+    return months
+
+
+@receiver(pre_save, sender=Project)
+def remember_project_sector(sender, instance, **kwargs):
+    instance._rollup_sector = project_sector(instance.pk) if instance.pk else None
+
+
+@receiver(pre_save, sender=HelpRequest)
+def remember_help_request_project(sender, instance, **kwargs):
+    instance._rollup_project_id = HelpRequest.objects.filter(pk=instance.pk).values_list(
+        'project_id', flat=True
+    ).first() if instance.pk else None
+
+
+@receiver(post_save, sender=Project)
+def rollup_project_saved(sender, instance, created, **kwargs):
+    buckets = {(month_of(instance.created_at), instance.sector)}
+    old_sector = getattr(instance, '_rollup_sector', None)
+    if not created and old_sector and old_sector != instance.sector:
+        # Everything attached to the project moves to the new sector
+        months = project_activity_months(instance.pk) | {month_of(instance.created_at)}
+        buckets |= {(month, sector) for month in months for sector in (old_sector, instance.sector)}
+    schedule_refresh(buckets)
+
+
+@receiver(pre_delete, sender=Project)
+def rollup_project_deleted(sender, instance, **kwargs):
+    months = project_activity_months(instance.pk) | {month_of(instance.created_at)}
+    schedule_refresh({(month, instance.sector) for month in months})
+
+
+@receiver(post_save, sender=HelpRequest)
+@receiver(pre_delete, sender=HelpRequest)
+def rollup_help_request_changed(sender, instance, **kwargs):
+    month = month_of(instance.created_at)
+    if HelpRequest.project.is_cached(instance):
+        buckets = {(month, instance.project.sector)}
+    else:
+        buckets = {(month, project_sector(instance.project_id))}
+
+    old_project_id = getattr(instance, '_rollup_project_id', None)
+    if old_project_id and old_project_id != instance.project_id:
+        buckets.add((month, project_sector(old_project_id)))
+    schedule_refresh(buckets)
+
+
+@receiver(post_save, sender=FinancialRequest)
+@receiver(pre_delete, sender=FinancialRequest)
+def rollup_financial_request_changed(sender, instance, **kwargs):
+    help_request = HelpRequest.objects.filter(pk=instance.help_request_id).values_list(
+        'created_at', 'project__sector'
+    ).first()
+    if help_request:
+        created_at, sector = help_request
+        schedule_refresh({(month_of(created_at), sector)})
+
+
+@receiver(post_save, sender=FinancialProposal)
+@receiver(post_save, sender=TechnicalProposal)
+@receiver(pre_delete, sender=FinancialProposal)
+@receiver(pre_delete, sender=TechnicalProposal)
+def rollup_proposal_changed(sender, instance, **kwargs):
+    schedule_refresh({(month_of(instance.created_at), help_request_sector(instance.help_request_id))})
+
+
+#Public feed cache
+@receiver(post_save, sender=Announcement)
+@receiver(post_delete, sender=Announcement)
+def announcement_changed(sender, instance, **kwargs):
+    invalidate_feed('announcements')
+
+
+@receiver(post_save, sender=Event)
+@receiver(post_delete, sender=Event)
+def event_changed(sender, instance, **kwargs):
+    invalidate_feed('events')
+
+
+#Blocked users denylist and changed claims
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, **kwargs):
+    if instance.is_blocked or not instance.is_active:
+        transaction.on_commit(lambda: deny_user(instance.pk))
+    else:
+        transaction.on_commit(lambda: allow_user(instance.pk))
+    # Runs before User.save() records the new claims as loaded
+    if instance.claims_changed():
+        user_id, claims = instance.pk, dict(zip(instance.claim_fields, instance.claims()))
+        transaction.on_commit(lambda: update_claims(user_id, claims))
+
+
+@receiver(post_delete, sender=User)
+def user_deleted(sender, instance, **kwargs):
+    user_id = instance.pk
+    transaction.on_commit(lambda: deny_user(user_id))
+
+
+#Image variants
+@receiver(post_save, sender=User)
+@receiver(post_save, sender=Announcement)
+@receiver(post_save, sender=Event)
+@receiver(post_save, sender=ProjectDocument)
+def image_saved(sender, instance, **kwargs):
+    if variants_outdated(instance):
+        schedule_variants(instance)
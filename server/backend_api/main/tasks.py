@@ -0,0 +1,32 @@
+#tasks.py
+
+#Job tasks run by `manage.py runworker`
+from .contract import ContractHandler
+from .images import backfill_variants, generate_pending_variants
+from .jobs import task
+from .mail import flush_outbox
+
+
+@task('contracts.render_pdf')
+def render_contract_pdf(contract_id):
+    contract = ContractHandler.render_contract_pdf(contract_id)
+    if contract.render_status == 'failed':
+        # Let the queue retry with backoff
+        raise RuntimeError(contract.render_error)
+
+
+@task('emails.flush_outbox')
+def send_outbox_emails():
+    sent, retry = flush_outbox()
+    if retry:
+        raise RuntimeError(f"{retry} emails could not be sent")
+
+
+@task('images.generate_variants')
+def generate_image_variants(model, pk, name):
+    generate_pending_variants(model, pk, name)
+
+
+@task('images.backfill_variants')
+def backfill_image_variants():
+    backfill_variants()
@@ -1,3 +1,1376 @@
-from django.test import TestCase
+import base64
+import hashlib
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+from datetime import timedelta
+from io import BytesIO, StringIO
+from types import SimpleNamespace
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.core import mail
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured, ValidationError
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile, TemporaryUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import Sum
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from PIL import Image
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from . import jobs
+from .authentication import UserToken
+from .seed import Seeder, seed_dataset
+from .caching import bump_feed_version, feed_version
+from .mail import flush_outbox, queue_email, reset_smtp_connection
+from .contract import ContractHandler
+from .pdf import PDFRenderer, RendererUnavailable, TextBackend, WkhtmltopdfBackend, create_backend
+from .permission import IsProposalOwnerOrRequestEntrepreneur
+from .models import User, Entrepreneur, Investor, Organization, Project, ProjectDocument, HelpRequest, \
+    FinancialRequest, TechnicalRequest, FinancialProposal, TechnicalProposal, AnalyticsRollup, Contract, Job, \
+    OutboxEmail, Announcement, Event
+
+
+def create_entrepreneur(email='entrepreneur@example.com'):
+    user = User.objects.create(username=email, email=email, role='entrepreneur')
+    entrepreneur = Entrepreneur.objects.create(user=user, first_name='Awa', last_name='Ngono')
+    return user, entrepreneur
+
+
+def create_projects(user, entrepreneur, count):
+    projects = Project.objects.bulk_create([
+        Project(
+            user=user,
+            entrepreneur=entrepreneur,
+            project_name=f'Project {i}',
+            sector='agriculture',
+            target_audience='Farmers',
+            estimated_budget=1000000,
+            financing_plan='Loan'
+        )
+        for i in range(count)
+    ])
+    ProjectDocument.objects.bulk_create(
+        [
+            ProjectDocument(project=project, document_type='project_photos', file=f'project_documents/{project.pk}.jpg')
+            for project in projects
+        ] + [
+            ProjectDocument(project=project, document_type='business_register', file=f'project_documents/{project.pk}.pdf')
+            for project in projects
+        ]
+    )
+    return projects
+
+
+def create_help_requests(entrepreneur, projects, count):
+    """Alternate financial and technical requests over the given projects"""
+    help_requests = HelpRequest.objects.bulk_create([
+        HelpRequest(
+            project=projects[i % len(projects)],
+            entrepreneur=entrepreneur,
+            request_type='financial' if i % 2 == 0 else 'technical',
+            specific_need=f'Need {i}',
+            description='Description'
+        )
+        for i in range(count)
+    ])
+    FinancialRequest.objects.bulk_create([
+        FinancialRequest(help_request=help_request, amount_requested=500000, duration_months=12)
+        for help_request in help_requests if help_request.request_type == 'financial'
+    ])
+    TechnicalRequest.objects.bulk_create([
+        TechnicalRequest(help_request=help_request, expertise_needed='Irrigation', estimated_duration=30)
+        for help_request in help_requests if help_request.request_type == 'technical'
+    ])
+    return help_requests
+
+
+# Project
+@override_settings(API_MAX_PAGE_SIZE=1000)
+class ProjectListQueryCountTests(TestCase):
+    def setUp(self):
+        self.user, self.entrepreneur = create_entrepreneur()
+        self.admin = User.objects.create(username='admin@example.com', email='admin@example.com',
+                                         role='admin', is_staff=True)
+        self.client = APIClient()
+
+    def assert_constant_queries(self, user):
+        self.client.force_authenticate(user=user)
+        created = 0
+        for size in (10, 100, 1000):
+            create_projects(self.user, self.entrepreneur, size - created)
+            created = size
+
+            # One query for projects (with the entrepreneur joined) and one for their documents
+            with self.assertNumQueries(2):
+                response = self.client.get('/api/projects/', {'page_size': 1000})
+
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(len(response.data), size)
+
+    def test_admin_list_runs_constant_queries(self):
+        self.assert_constant_queries(self.admin)
+
+    def test_entrepreneur_list_runs_constant_queries(self):
+        self.assert_constant_queries(self.user)
+
+    def test_project_image_is_picked_from_prefetched_documents(self):
+        project = create_projects(self.user, self.entrepreneur, 1)[0]
+        self.client.force_authenticate(user=self.user)
+
+        response = self.client.get('/api/projects/')
+
+        self.assertEqual(response.data[0]['entrepreneur_name'], 'Awa Ngono')
+        self.assertTrue(response.data[0]['project_image'].startswith(
+            f'http://testserver/media/project_documents/{project.pk}.jpg?expires='))
+        self.assertEqual(len(response.data[0]['documents']), 2)
+
+
+# Help requests
+@override_settings(API_MAX_PAGE_SIZE=1000)
+class HelpRequestListQueryCountTests(TestCase):
+    def setUp(self):
+        self.user, self.entrepreneur = create_entrepreneur()
+        self.projects = create_projects(self.user, self.entrepreneur, 10)
+        self.investor = User.objects.create(username='investor@example.com', email='investor@example.com',
+                                            role='investor')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.investor)
+
+    def test_query_count_is_constant(self):
+        created = 0
+        for count in (10, 100, 1000):
+            create_help_requests(self.entrepreneur, self.projects, count - created)
+            created = count
+
+            with self.assertNumQueries(2):
+                response = self.client.get('/api/help-requests/', {'page_size': 1000})
+
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(len(response.data), count)
+
+        help_request = next(r for r in response.data if r['request_type'] == 'financial')
+        self.assertEqual(help_request['entrepreneur_details']['email'], 'entrepreneur@example.com')
+        self.assertEqual(len(help_request['project_details']['documents']), 2)
+        self.assertEqual(help_request['financial_details']['duration_months'], 12)
+        self.assertIsNone(help_request['technical_details'])
+
+
+# Admin handling users
+class UserListQueryCountTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create(username='admin@example.com', email='admin@example.com',
+                                         role='admin', is_staff=True)
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.admin)
+
+    def create_users(self, count, offset=0):
+        for i in range(offset, offset + count):
+            entrepreneur, _ = create_entrepreneur(f'entrepreneur{i}@example.com')
+            investor = User.objects.create(username=f'investor{i}@example.com', email=f'investor{i}@example.com',
+                                           role='investor')
+            Investor.objects.create(user=investor, first_name='Jean', last_name=f'Mballa{i}')
+            organization = User.objects.create(username=f'ong{i}@example.com', email=f'ong{i}@example.com',
+                                               role='ONG-Association')
+            Organization.objects.create(user=organization, organization_name=f'ONG {i}',
+                                        registration_number=str(i), founded_year=2000)
+
+    def test_user_list_runs_one_query(self):
+        self.create_users(3)
+        with self.assertNumQueries(1):
+            small = self.client.get('/api/admin/users')
+
+        self.create_users(20, offset=3)
+        with self.assertNumQueries(1):
+            large = self.client.get('/api/admin/users')
+
+        self.assertEqual(len(small.data), 10)
+        self.assertEqual(len(large.data), 70)
+        names = {user['email']: user['name'] for user in large.data}
+        self.assertEqual(names['entrepreneur0@example.com'], 'Awa Ngono')
+        self.assertEqual(names['investor4@example.com'], 'Jean Mballa4')
+        self.assertEqual(names['ong7@example.com'], 'ONG 7')
+        self.assertEqual(names['admin@example.com'], '')
+
+
+# Pagination
+class KeysetPaginationTests(TestCase):
+    def setUp(self):
+        self.user, self.entrepreneur = create_entrepreneur()
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def fetch_all(self, page_size, insert_between_pages=0):
+        seen = []
+        url, params = '/api/projects/', {'page_size': page_size}
+        while url:
+            response = self.client.get(url, params)
+            self.assertEqual(response.status_code, 200)
+            self.assertLessEqual(len(response.data), page_size)
+            seen.extend(project['id'] for project in response.data)
+
+            if insert_between_pages:
+                create_projects(self.user, self.entrepreneur, insert_between_pages)
+
+            link = response.get('Link')
+            url, params = (link[1:link.index('>')], None) if link else (None, None)
+        return seen
+
+    def test_pages_cover_every_row_once(self):
+        projects = create_projects(self.user, self.entrepreneur, 25)
+
+        seen = self.fetch_all(page_size=10)
+
+        self.assertEqual(seen, sorted((p.pk for p in projects), reverse=True))
+
+    def test_rows_inserted_while_paging_do_not_shift_pages(self):
+        projects = create_projects(self.user, self.entrepreneur, 25)
+
+        seen = self.fetch_all(page_size=10, insert_between_pages=3)
+
+        self.assertEqual(seen, sorted((p.pk for p in projects), reverse=True))
+
+    @override_settings(API_MAX_PAGE_SIZE=5)
+    def test_page_size_is_capped(self):
+        create_projects(self.user, self.entrepreneur, 8)
+
+        response = self.client.get('/api/projects/', {'page_size': 50})
+
+        self.assertEqual(len(response.data), 5)
+        self.assertIn('rel="next"', response['Link'])
+
+    @override_settings(REST_FRAMEWORK={**settings.REST_FRAMEWORK, 'PAGE_SIZE': 5})
+    def test_lists_without_parameters_are_capped_at_page_size(self):
+        create_projects(self.user, self.entrepreneur, 8)
+
+        response = self.client.get('/api/projects/')
+
+        self.assertEqual(len(response.data), 5)
+        self.assertIn('rel="next"', response['Link'])
+
+    def test_invalid_cursor_is_rejected(self):
+        response = self.client.get('/api/projects/', {'cursor': 'not-a-cursor'})
+
+        self.assertEqual(response.status_code, 404)
+
+
+# Statistics of the application
+class AnalyticsRollupTests(TestCase):
+    counters = ['month', 'sector', 'projects', 'help_requests', 'financial_requests', 'technical_requests',
+                'completed_requests', 'requested_projects', 'amount_requested', 'financial_proposals',
+                'technical_proposals', 'accepted_financial_proposals', 'accepted_technical_proposals',
+                'accepted_investment']
+
+    def setUp(self):
+        self.user, self.entrepreneur = create_entrepreneur()
+        investor_user = User.objects.create(username='investor@example.com', email='investor@example.com',
+                                            role='investor')
+        self.investor = Investor.objects.create(user=investor_user, first_name='Jean', last_name='Mballa')
+        self.admin = User.objects.create(username='admin@example.com', email='admin@example.com',
+                                         role='admin', is_staff=True)
+
+    def create_activity(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            project = Project.objects.create(user=self.user, entrepreneur=self.entrepreneur,
+                                             project_name='Ferme', sector='agriculture', target_audience='Farmers',
+                                             estimated_budget=5000000, financing_plan='Loan')
+            Project.objects.create(user=self.user, entrepreneur=self.entrepreneur, project_name='App',
+                                   sector='technology', target_audience='Youth', estimated_budget=1000,
+                                   financing_plan='Equity')
+            financial = HelpRequest.objects.create(project=project, entrepreneur=self.entrepreneur,
+                                                   request_type='financial', specific_need='Seeds',
+                                                   description='Seeds')
+            FinancialRequest.objects.create(help_request=financial, amount_requested=2000000, duration_months=12)
+            technical = HelpRequest.objects.create(project=project, entrepreneur=self.entrepreneur,
+                                                   request_type='technical', specific_need='Irrigation',
+                                                   description='Irrigation', status='completed')
+            proposal = FinancialProposal.objects.create(help_request=financial, investor=self.investor,
+                                                        investment_amount=500000, investment_type='loan',
+                                                        payment_schedule='monthly', expected_return='5%',
+                                                        timeline='12 months')
+            TechnicalProposal.objects.create(help_request=technical, investor=self.investor, expertise='Water',
+                                             experience_level='senior', availability='Weekends',
+                                             support_duration='3 months', support_type='mentoring',
+                                             proposed_approach='Visits', expected_outcomes='Yield')
+        with self.captureOnCommitCallbacks(execute=True):
+            proposal.status = 'accepted'
+            proposal.save()
+        return project
+
+    def snapshot(self):
+        return list(AnalyticsRollup.objects.order_by('month', 'sector').values(*self.counters))
+
+    def test_signals_keep_rollup_in_sync_with_rebuild(self):
+        project = self.create_activity()
+
+        incremental = self.snapshot()
+        call_command('rebuild_analytics', stdout=StringIO())
+        self.assertEqual(incremental, self.snapshot())
+
+        agriculture = AnalyticsRollup.objects.get(sector='agriculture')
+        self.assertEqual(agriculture.help_requests, 2)
+        self.assertEqual(agriculture.requested_projects, 1)
+        self.assertEqual(agriculture.completed_requests, 1)
+        self.assertEqual(agriculture.accepted_investment, 500000)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            project.sector = 'commerce'
+            project.save()
+        self.assertEqual(AnalyticsRollup.objects.get(sector='agriculture').help_requests, 0)
+        self.assertEqual(AnalyticsRollup.objects.get(sector='commerce').accepted_financial_proposals, 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            project.delete()
+        incremental = [row for row in self.snapshot() if row['projects'] or row['help_requests']]
+        call_command('rebuild_analytics', stdout=StringIO())
+        self.assertEqual(incremental, self.snapshot())
+
+    def test_dashboard_reads_only_the_rollup(self):
+        self.create_activity()
+        client = APIClient()
+        client.force_authenticate(user=self.admin)
+
+        # Totals, months and sectors, each summed by the database
+        with self.assertNumQueries(3):
+            response = client.get('/api/admin/analytics/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['overview']['total_projects']['value'], '2')
+        self.assertEqual(response.data['overview']['financial_help']['value'], '1')
+        self.assertEqual(response.data['overview']['success_rate']['value'], '50.0%')
+        self.assertEqual(response.data['monthly_stats'][0]['transactions'], 2000000.0)
+        self.assertEqual(response.data['proposal_stats'][0]['technical_proposal'], 1)
+        self.assertEqual(sorted(item['name'] for item in response.data['sector_data']),
+                         ['Agriculture', 'Technologie'])
+
+
+#Contract and collaborations
+class ProposalAcceptanceTests(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.user, self.entrepreneur = create_entrepreneur()
+        investor_user = User.objects.create(username='investor@example.com', email='investor@example.com',
+                                            role='investor')
+        investor = Investor.objects.create(user=investor_user, first_name='Jean', last_name='Mballa')
+        project = create_projects(self.user, self.entrepreneur, 1)[0]
+        help_request = HelpRequest.objects.create(project=project, entrepreneur=self.entrepreneur,
+                                                  request_type='financial', specific_need='Seeds',
+                                                  description='Seeds')
+        FinancialRequest.objects.create(help_request=help_request, amount_requested=2000000, duration_months=12)
+        self.proposal = FinancialProposal.objects.create(help_request=help_request, investor=investor,
+                                                         investment_amount=500000, investment_type='loan',
+                                                         payment_schedule='monthly', expected_return='5%',
+                                                         timeline='12 months')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def test_acceptance_commits_before_pdf_is_rendered(self):
+        with mock.patch.object(ContractHandler, 'generate_pdf_content') as generate_pdf, \
+                mock.patch.object(ContractHandler, 'schedule_render') as schedule_render, \
+                self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch(f'/api/entrepreneur/proposals/financial/{self.proposal.pk}/',
+                                         {'status': 'accepted'}, format='json')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['render_status'], 'pending_render')
+        generate_pdf.assert_not_called()
+        schedule_render.assert_called_once_with(response.data['contract_id'])
+
+        view_url = f"/api/contracts/{response.data['contract_id']}/view/"
+        self.assertEqual(self.client.get(view_url).status_code, 202)
+
+        with mock.patch.object(ContractHandler, 'generate_pdf_content', return_value=b'%PDF-1.4'):
+            ContractHandler.render_contract_pdf(response.data['contract_id'])
+
+        contract = Contract.objects.get(pk=response.data['contract_id'])
+        self.assertEqual(contract.render_status, 'rendered')
+        self.assertEqual(contract.pdf_file.read(), b'%PDF-1.4')
+        self.assertEqual(self.client.get(view_url).status_code, 200)
+
+    def test_failed_render_of_a_contract_with_a_pdf_keeps_it(self):
+        with mock.patch.object(ContractHandler, 'schedule_render'), self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch(f'/api/entrepreneur/proposals/financial/{self.proposal.pk}/',
+                                         {'status': 'accepted'}, format='json')
+        contract = Contract.objects.get(pk=response.data['contract_id'])
+        contract.pdf_file.save('contract.pdf', ContentFile(b'%PDF-1.4 signed'), save=False)
+        contract.save()
+
+        jobs.enqueue('contracts.render_pdf', {'contract_id': contract.pk})
+        with mock.patch.object(ContractHandler, 'generate_pdf_content', side_effect=RuntimeError('boom')):
+            jobs.Worker().run(burst=True)
+
+        contract.refresh_from_db()
+        self.assertEqual((contract.render_status, contract.render_error), ('rendered', 'boom'))
+        self.assertEqual(contract.pdf_file.read(), b'%PDF-1.4 signed')
+        self.assertEqual(Job.objects.get(task='contracts.render_pdf').status, 'done')
+        self.assertEqual(self.client.get(f'/api/contracts/{contract.pk}/view/').status_code, 200)
+
+    def test_missing_renderer_keeps_the_contract_pending(self):
+        with mock.patch.object(ContractHandler, 'schedule_render'), self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch(f'/api/entrepreneur/proposals/financial/{self.proposal.pk}/',
+                                         {'status': 'accepted'}, format='json')
+
+        missing = RendererUnavailable('PDF generation tool (wkhtmltopdf) not found')
+        with mock.patch('main.pdf.get_renderer', side_effect=missing), self.assertRaises(RendererUnavailable):
+            ContractHandler.render_contract_pdf(response.data['contract_id'])
+        contract = Contract.objects.get(pk=response.data['contract_id'])
+        self.assertEqual((contract.render_status, contract.render_error), ('pending_render', ''))
+
+
+    def test_contract_templates(self):
+        self.entrepreneur.first_name = '<Awa>'
+        html = ContractHandler.generate_html_content(self.proposal, 'financial')
+        self.assertIn('Financial Investment Agreement', html)
+        self.assertIn('500,000.00', html)
+        self.assertIn('&lt;Awa&gt; Ngono', html)
+        self.assertNotIn('Expertise Area', html)
+
+        context = ContractHandler.contract_context(self.proposal, 'financial')
+        context.update(contract_type='Technical Support Agreement', expertise='Irrigation',
+                       support_duration='3 months', support_type='mentoring')
+        html = ContractHandler.render_html(context, 'technical')
+        self.assertIn('<p>Irrigation</p>', html)
+        self.assertNotIn('Investment Amount', html)
+
+
+class PDFRendererTests(TestCase):
+    html = '<html><head><style>body { color: red; }</style></head><body><h1>Loan (A)</h1><p>Awa &amp; Jean</p></body></html>'
+
+    def test_text_backend(self):
+        pdf_content = TextBackend().render(self.html)
+        self.assertTrue(pdf_content.startswith(b'%PDF-1.4'))
+        self.assertTrue(pdf_content.rstrip().endswith(b'%%EOF'))
+        self.assertIn(b'(Loan \\(A\\)) Tj', pdf_content)
+        self.assertIn(b'(Awa & Jean) Tj', pdf_content)
+        self.assertNotIn(b'color', pdf_content)
+
+    def test_wkhtmltopdf_writes_to_stdout(self):
+        backend = WkhtmltopdfBackend('/usr/bin/wkhtmltopdf')
+        completed = subprocess.CompletedProcess([], 1, stdout=b'%PDF-1.4 ...', stderr=b'Warning')
+        with mock.patch('main.pdf.subprocess.run', return_value=completed) as run:
+            self.assertEqual(backend.render(self.html), b'%PDF-1.4 ...')
+        self.assertEqual(run.call_args.args[0][-2:], ['-', '-'])
+        self.assertEqual(run.call_args.kwargs['input'], self.html.encode())
+
+        completed = subprocess.CompletedProcess([], 1, stdout=b'', stderr=b'Exit with code 1')
+        with mock.patch('main.pdf.subprocess.run', return_value=completed), self.assertRaises(RuntimeError):
+            backend.render(self.html)
+
+    def test_missing_wkhtmltopdf_fails_unless_text_is_chosen(self):
+        with mock.patch.object(WkhtmltopdfBackend, 'find_binary', return_value=None):
+            with override_settings(PDF_RENDER_BACKEND='wkhtmltopdf'), self.assertRaises(RendererUnavailable):
+                create_backend()
+            with override_settings(PDF_RENDER_BACKEND='text'):
+                self.assertIsInstance(create_backend(), TextBackend)
+
+    def test_pool_bounds_concurrency(self):
+        running, peak, lock = [0], [0], threading.Lock()
+
+        class SlowBackend:
+            name = 'slow'
+
+            def render(self, html_content):
+                with lock:
+                    running[0] += 1
+                    peak[0] = max(peak[0], running[0])
+                time.sleep(0.02)
+                with lock:
+                    running[0] -= 1
+                return html_content.encode()
+
+        renderer = PDFRenderer(SlowBackend(), concurrency=2)
+        self.assertEqual(renderer.render_many([str(i) for i in range(6)]), [str(i).encode() for i in range(6)])
+        self.assertEqual(peak[0], 2)
+
+        stats = renderer.stats()
+        self.assertEqual((stats['renders'], stats['failures'], stats['bytes']), (6, 0, 6))
+        self.assertGreater(stats['renders_per_second'], 0)
+
+
+@override_settings(PDF_RENDER_BACKEND='text')
+class RerenderContractsTests(TestCase):
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        settings_override = override_settings(MEDIA_ROOT=media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        seed_dataset(users=10)
+        self.contract_ids = list(Contract.objects.order_by('pk').values_list('pk', flat=True))
+
+    def rerender(self, **options):
+        out = StringIO()
+        call_command('rerender_contracts', stdout=out, **options)
+        return out.getvalue()
+
+    def test_rerenders_every_contract(self):
+        Contract.objects.update(created_at=timezone.now() - timedelta(days=400))
+        created = Contract.objects.first().created_at.strftime("%B %d, %Y")
+        output = self.rerender(processes=2, batch_size=2)
+
+        self.assertIn(f'Rendered {len(self.contract_ids)} contracts, 0 failed', output)
+        for contract in Contract.objects.all():
+            self.assertEqual(contract.render_status, 'rendered')
+            self.assertIn('Agreement Details', contract.html_content)
+            # Still dated as signed
+            self.assertIn(f'Date: {created}', contract.html_content)
+            self.assertTrue(contract.pdf_file.read().startswith(b'%PDF'))
+
+    def test_failed_render_keeps_the_previous_pdf(self):
+        rendered, pending = Contract.objects.order_by('pk')[:2]
+        rendered.pdf_file.save('contract.pdf', ContentFile(b'%PDF-1.4 signed'), save=False)
+        rendered.render_status = 'rendered'
+        rendered.save()
+
+        with mock.patch('main.management.commands.rerender_contracts.render_pdf', return_value=(None, 'boom')):
+            output = self.rerender(processes=0, batch_size=2)
+        self.assertIn(f'Rendered 0 contracts, {len(self.contract_ids)} failed', output)
+
+        rendered.refresh_from_db()
+        self.assertEqual((rendered.render_status, rendered.render_error), ('rendered', 'boom'))
+        self.assertEqual(rendered.html_content, '<p>Seeded contract</p>')
+        self.assertEqual(rendered.pdf_file.read(), b'%PDF-1.4 signed')
+        pending.refresh_from_db()
+        self.assertEqual((pending.render_status, pending.render_error), ('failed', 'boom'))
+
+    def test_resumes_from_checkpoint(self):
+        checkpoint = os.path.join(tempfile.mkdtemp(), 'checkpoint')
+        self.addCleanup(shutil.rmtree, os.path.dirname(checkpoint))
+        with open(checkpoint, 'w') as f:
+            f.write(str(self.contract_ids[1]))
+
+        self.assertIn(f'{len(self.contract_ids) - 2} contracts would be rendered',
+                      self.rerender(checkpoint=checkpoint, dry_run=True))
+        self.assertFalse(Contract.objects.filter(render_status='rendered').exists())
+
+        self.rerender(processes=0, checkpoint=checkpoint, keep_html=True)
+        rendered = Contract.objects.filter(render_status='rendered').values_list('pk', flat=True)
+        self.assertEqual(sorted(rendered), self.contract_ids[2:])
+        self.assertEqual(Contract.objects.get(pk=self.contract_ids[2]).html_content, '<p>Seeded contract</p>')
+        self.assertFalse(os.path.exists(checkpoint))
+
+
+class ContractDeliveryTests(TestCase):
+    pdf_content = b'%PDF-1.4 contract body'
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        settings_override = override_settings(MEDIA_ROOT=media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        seeded = seed_dataset(users=10)
+        self.contract = seeded['contract']
+        self.contract.pdf_file.save('contract.pdf', ContentFile(self.pdf_content), save=False)
+        self.contract.render_status = 'rendered'
+        self.contract.save()
+        self.url = f'/api/contracts/{self.contract.pk}/view/'
+        self.client = APIClient()
+        self.client.force_authenticate(user=seeded['users']['investor'])
+
+    def test_revalidates_with_etag(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), self.pdf_content)
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertIn('private', response['Cache-Control'])
+
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+
+    def test_byte_ranges(self):
+        size = len(self.pdf_content)
+        response = self.client.get(self.url, HTTP_RANGE='bytes=0-3')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(b''.join(response.streaming_content), b'%PDF')
+        self.assertEqual(response['Content-Range'], f'bytes 0-3/{size}')
+
+        response = self.client.get(self.url, HTTP_RANGE='bytes=-4')
+        self.assertEqual(b''.join(response.streaming_content), b'body')
+
+        response = self.client.get(self.url, HTTP_RANGE=f'bytes={size}-')
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response['Content-Range'], f'bytes */{size}')
+
+        response = self.client.get(self.url, HTTP_RANGE='bytes=0-3', HTTP_IF_RANGE='"stale"')
+        self.assertEqual(response.status_code, 200)
+
+    def test_front_server_delivery(self):
+        with override_settings(FILE_DELIVERY='nginx'):
+            response = self.client.get(f'/api/contracts/{self.contract.pk}/download/')
+        self.assertEqual(response['X-Accel-Redirect'], f'/protected/{self.contract.pdf_file.name}')
+        self.assertEqual(response.content, b'')
+        self.assertIn('attachment; filename=', response['Content-Disposition'])
+        self.assertIn('ETag', response)
+
+        with override_settings(FILE_DELIVERY='sendfile'):
+            response = self.client.get(self.url)
+        self.assertEqual(response['X-Sendfile'], self.contract.pdf_file.path)
+
+    def test_access_check_is_one_query(self):
+        project_name = self.contract.financial_proposal.help_request.project.project_name
+        with self.assertNumQueries(1):
+            response = self.client.get(f'/api/contracts/{self.contract.pk}/download/')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(f'filename="{project_name}_financial.pdf"', response['Content-Disposition'])
+
+        other = Investor.objects.exclude(pk=self.contract.financial_proposal.investor_id).first()
+        self.client.force_authenticate(user=other.user)
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+
+class AcceptedLedgerTests(TestCase):
+    def setUp(self):
+        self.user, self.entrepreneur = create_entrepreneur()
+        investor_user = User.objects.create(username='investor@example.com', email='investor@example.com',
+                                            role='investor')
+        self.investor = Investor.objects.create(user=investor_user, first_name='Jean', last_name='Mballa')
+        project = create_projects(self.user, self.entrepreneur, 1)[0]
+        self.help_request = HelpRequest.objects.create(project=project, entrepreneur=self.entrepreneur,
+                                                       request_type='financial', specific_need='Seeds',
+                                                       description='Seeds')
+        FinancialRequest.objects.create(help_request=self.help_request, amount_requested=2000000,
+                                        duration_months=12)
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def create_proposal(self, amount):
+        return FinancialProposal.objects.create(help_request=self.help_request, investor=self.investor,
+                                                investment_amount=amount, investment_type='loan',
+                                                payment_schedule='monthly', expected_return='5%',
+                                                timeline='12 months')
+
+    def accept(self, proposal):
+        return self.client.patch(f'/api/entrepreneur/proposals/financial/{proposal.pk}/',
+                                 {'status': 'accepted'}, format='json')
+
+    def test_acceptance_updates_ledger_and_enforces_capacity(self):
+        first, second, third = self.create_proposal(500000), self.create_proposal(1500000), self.create_proposal(1)
+
+        self.assertEqual(self.accept(first).status_code, 200)
+        self.assertEqual(self.accept(second).status_code, 200)
+        response = self.accept(third)
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['error'], 'Accepting this proposal would exceed the requested amount')
+        third.refresh_from_db()
+        self.assertEqual(third.status, 'pending')
+
+        with self.assertNumQueries(1):
+            response = self.client.get(f'/api/help-requests/{self.help_request.pk}/accepted-amount/')
+        self.assertEqual(response.data, {'accepted_amount': 2000000.0, 'requested_amount': 2000000.0,
+                                         'remaining_amount': 0.0})
+
+        self.help_request.refresh_from_db()
+        self.assertEqual((self.help_request.accepted_amount, self.help_request.accepted_count), (2000000, 2))
+
+    def test_accepted_proposal_amount_cannot_change(self):
+        proposal = self.create_proposal(500000)
+        self.assertEqual(self.accept(proposal).status_code, 200)
+
+        client = APIClient()
+        client.force_authenticate(user=self.investor.user)
+        response = client.patch(f'/api/proposals/financial/{proposal.pk}/', {'investment_amount': 5000000},
+                                format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('investment_amount', response.data)
+
+        proposal = FinancialProposal.objects.get(pk=proposal.pk)
+        proposal.investment_amount = 5000000
+        with self.assertRaises(ValidationError):
+            proposal.save()
+        self.help_request.refresh_from_db()
+        self.assertEqual(self.help_request.accepted_amount, 500000)
+
+    def test_refusing_and_deleting_release_the_amount(self):
+        proposal = self.create_proposal(500000)
+        proposal.status = 'accepted'
+        proposal.save()
+
+        proposal = FinancialProposal.objects.get(pk=proposal.pk)
+        proposal.status = 'refused'
+        proposal.save()
+        self.help_request.refresh_from_db()
+        self.assertEqual((self.help_request.accepted_amount, self.help_request.accepted_count), (0, 0))
+
+        proposal.status = 'accepted'
+        proposal.save()
+        FinancialProposal.objects.get(pk=proposal.pk).delete()
+        self.help_request.refresh_from_db()
+        self.assertEqual((self.help_request.accepted_amount, self.help_request.accepted_count), (0, 0))
+
+    def test_model_save_rejects_over_capacity(self):
+        proposal = self.create_proposal(2000001)
+        proposal.status = 'accepted'
+        with self.assertRaises(ValidationError):
+            proposal.save()
+
+    def test_stale_help_request_does_not_overwrite_ledger(self):
+        stale = HelpRequest.objects.get(pk=self.help_request.pk)
+        proposal = self.create_proposal(500000)
+        proposal.status = 'accepted'
+        proposal.save()
+
+        stale.description = 'Updated'
+        stale.save()
+        self.help_request.refresh_from_db()
+        self.assertEqual((self.help_request.description, self.help_request.accepted_amount), ('Updated', 500000))
+
+    def test_repair_command(self):
+        proposal = self.create_proposal(500000)
+        FinancialProposal.objects.filter(pk=proposal.pk).update(status='accepted')
+
+        out = StringIO()
+        call_command('repair_accepted_amounts', '--dry-run', stdout=out)
+        self.assertIn('1 help requests need repair', out.getvalue())
+        self.help_request.refresh_from_db()
+        self.assertEqual(self.help_request.accepted_amount, 0)
+
+        call_command('repair_accepted_amounts', stdout=StringIO())
+        self.help_request.refresh_from_db()
+        self.assertEqual((self.help_request.accepted_amount, self.help_request.accepted_count), (500000, 1))
+
+
+class SeedScaleTests(TestCase):
+    def seed(self):
+        call_command('seed_scale', users=20, months=3, seed=7, stdout=StringIO())
+        return list(FinancialRequest.objects.order_by('id').values_list('amount_requested', flat=True))
+
+    def test_seeded_data_is_consistent_and_deterministic(self):
+        amounts = self.seed()
+
+        self.assertEqual(User.objects.filter(role='entrepreneur').count(), 10)
+        self.assertEqual(Project.objects.count(), 20)
+        self.assertEqual(HelpRequest.objects.count(), 40)
+        self.assertEqual(Contract.objects.count(), 40)
+        self.assertEqual(AnalyticsRollup.objects.aggregate(total=Sum('projects'))['total'], 20)
+
+        out = StringIO()
+        call_command('repair_accepted_amounts', '--dry-run', stdout=out)
+        self.assertIn('0 help requests need repair', out.getvalue())
+
+        User.objects.all().delete()
+        self.assertEqual(self.seed(), amounts)
+
+    def test_rows_are_spread_over_the_months(self):
+        self.seed()
+
+        self.assertEqual(Project.objects.dates('created_at', 'month').count(), 3)
+        self.assertEqual(AnalyticsRollup.objects.values('month').distinct().count(), 3)
+        for contract in Contract.objects.select_related('financial_proposal__help_request__project',
+                                                        'technical_proposal__help_request__project'):
+            project = contract.get_proposal().help_request.project
+            self.assertEqual(contract.created_at, project.created_at)
+
+    def test_backdate_touches_only_the_given_rows(self):
+        user, entrepreneur = create_entrepreneur()
+        first, middle, last = create_projects(user, entrepreneur, 3)
+        created_at = timezone.now() - timedelta(days=400)
+
+        Seeder().backdate(Project, [first, last], [created_at, created_at])
+
+        self.assertEqual(Project.objects.filter(created_at=created_at).count(), 2)
+        self.assertNotEqual(Project.objects.get(pk=middle.pk).created_at, created_at)
+
+    def test_seeding_again_adds_a_separate_run(self):
+        call_command('seed_scale', users=10, stdout=StringIO())
+        out = StringIO()
+        call_command('seed_scale', users=10, requests_per_project=0, stdout=out)
+
+        self.assertIn('start with "run2-"', out.getvalue())
+        self.assertEqual(User.objects.filter(email__startswith='run2-').count(), 11)
+        self.assertEqual(HelpRequest.objects.count(), 20)
+
+
+def use_shared_cache(test):
+    """Run the test on a file-based cache: feeds are only cached in a cache shared by processes"""
+    location = tempfile.mkdtemp()
+    test.addCleanup(shutil.rmtree, location, ignore_errors=True)
+    settings_override = override_settings(
+        CACHES={'default': {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': location}}
+    )
+    settings_override.enable()
+    test.addCleanup(settings_override.disable)
+
+
+class ConditionalFeedTests(TestCase):
+    def setUp(self):
+        use_shared_cache(self)
+        self.seeded = seed_dataset(users=10)
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.seeded['users']['investor'])
+
+    def assert_revalidates(self, url, change):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        etag, last_modified = response['ETag'], response['Last-Modified']
+
+        # The validators come from the cached page
+        with self.assertNumQueries(0):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+        # A delete keeps the newest date: If-Modified-Since alone never gives a 304
+        self.assertEqual(self.client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified).status_code, 200)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            change()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(self.client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified).status_code, 200)
+
+    def test_announcements(self):
+        self.assert_revalidates('/api/public/announcements/?type=funding',
+                                lambda: Announcement.objects.filter(pk=self.seeded['announcement'].pk).delete())
+
+    def test_events(self):
+        event = self.seeded['event']
+
+        def change():
+            event.title = 'Renamed'
+            event.save()
+
+        self.assert_revalidates('/api/public/events/', change)
+
+    def test_pages_have_their_own_etag(self):
+        first = self.client.get('/api/public/events/', {'page_size': 1})
+        second = self.client.get(first['Link'].split(';')[0].strip('<>'))
+        self.assertNotEqual(first['ETag'], second['ETag'])
+
+
+class FeedCacheTests(TestCase):
+    def setUp(self):
+        use_shared_cache(self)
+        self.seeded = seed_dataset(users=10)
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.seeded['users']['investor'])
+
+    def assert_cached(self, url, change):
+        first = self.client.get(url)
+        with self.assertNumQueries(0):
+            cached = self.client.get(url)
+        self.assertEqual(cached.data, first.data)
+        self.assertEqual(cached['ETag'], first['ETag'])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            change()
+        with CaptureQueriesContext(connection) as queries:
+            fresh = self.client.get(url)
+        self.assertTrue(queries)
+        self.assertNotEqual(fresh.data, first.data)
+
+    def test_saving_an_announcement_invalidates_the_feed(self):
+        announcement = self.seeded['announcement']
+
+        def change():
+            announcement.title = 'Renamed'
+            announcement.save()
+
+        self.assert_cached('/api/public/announcements/', change)
+
+    def test_deleting_an_event_invalidates_the_feed(self):
+        self.assert_cached('/api/public/events/', lambda: self.seeded['event'].delete())
+
+    def test_filters_and_pages_are_cached_apart(self):
+        self.client.get('/api/public/announcements/', {'type': 'funding'})
+        response = self.client.get('/api/public/announcements/', {'type': 'training'})
+        self.assertEqual(response.data, [])
+
+        first = self.client.get('/api/public/events/', {'page_size': 1})
+        second = self.client.get(first['Link'].split(';')[0].strip('<>'))
+        self.assertEqual(len(second.data), 1)
+        self.assertNotEqual(second.data, first.data)
+        self.assertIn('Link', self.client.get('/api/public/events/', {'page_size': 1}))
+
+    def test_process_local_cache_is_not_used(self):
+        with override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}):
+            first = self.client.get('/api/public/events/')
+            with CaptureQueriesContext(connection) as queries:
+                second = self.client.get('/api/public/events/')
+        self.assertTrue(queries)
+        self.assertEqual(second.data, first.data)
+        self.assertEqual(second['ETag'], first['ETag'])
+
+    def test_evicted_version_is_reseeded_above_the_old_one(self):
+        cache.set('feed_version:events', 2, timeout=None)
+        stale = self.client.get('/api/public/events/')
+        # Evicted, then an event changes while its old pages are still cached
+        cache.delete('feed_version:events')
+        bump_feed_version('events')
+        self.assertGreater(feed_version('events'), 2)
+
+        Event.objects.filter(pk=self.seeded['event'].pk).delete()
+        self.assertNotEqual(self.client.get('/api/public/events/').data, stale.data)
+
+
+class SignedMediaTests(TestCase):
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        settings_override = override_settings(MEDIA_ROOT=media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        cache.clear()
+        seeded = seed_dataset(users=10)
+        self.announcement = seeded['announcement']
+        self.announcement.image.save('banner.png', ContentFile(b'png bytes'))
+        self.client = APIClient()
+        self.client.force_authenticate(user=seeded['users']['investor'])
+
+    def test_names_carry_the_content_hash(self):
+        digest = hashlib.sha256(b'png bytes').hexdigest()[:12]
+        self.assertEqual(self.announcement.image.name, f'announcements/banner.{digest}.png')
+
+    def test_serialized_urls_are_signed_and_served_without_queries(self):
+        response = self.client.get('/api/public/announcements/')
+        url = next(item['image'] for item in response.data if item['id'] == self.announcement.pk)
+        self.assertIn('signature=', url)
+
+        client = Client()
+        with self.assertNumQueries(0):
+            response = client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), b'png bytes')
+        self.assertIn('immutable', response['Cache-Control'])
+
+        self.assertEqual(client.get(url.replace('signature=', 'signature=x')).status_code, 403)
+        self.assertEqual(client.get(url.split('?')[0]).status_code, 403)
+        with mock.patch('main.media.time.time', return_value=time.time() + 3 * settings.MEDIA_URL_TTL):
+            self.assertEqual(client.get(url).status_code, 403)
+
+    @override_settings(FILE_DELIVERY='nginx')
+    def test_front_server_delivery(self):
+        response = Client().get(self.announcement.image.url)
+        self.assertEqual(response['X-Accel-Redirect'], f'/protected/{self.announcement.image.name}')
+        self.assertEqual(response['Content-Type'], 'image/png')
+
+#Image variants
+def image_file(size, mode='RGB', image_format='JPEG'):
+    buffer = BytesIO()
+    Image.new(mode, size, 'red').save(buffer, image_format)
+    return ContentFile(buffer.getvalue())
+
+
+class ImageVariantTests(TestCase):
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        settings_override = override_settings(MEDIA_ROOT=media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        cache.clear()
+        seeded = seed_dataset(users=10)
+        self.event = seeded['event']
+        self.client = APIClient()
+        self.client.force_authenticate(user=seeded['users']['investor'])
+        self.worker = jobs.Worker()
+
+    def open_variant(self, instance, key):
+        return Image.open(instance.image.storage.open(instance.image_variants[key]))
+
+    def test_upload_queues_variants_made_by_the_worker(self):
+        self.event.image.save('poster.jpg', image_file((1600, 1000)))
+        self.assertEqual(Job.objects.filter(task='images.generate_variants').count(), 1)
+        saved_at = self.event.updated_at
+
+        self.worker.run(burst=True)
+        self.event.refresh_from_db()
+        self.assertEqual(self.event.image_variants['source'], self.event.image.name)
+        # Lists revalidated on updated_at see the new variants
+        self.assertGreater(self.event.updated_at, saved_at)
+        self.assertEqual(self.open_variant(self.event, 'thumb').size, (320, 320))
+        self.assertEqual(self.open_variant(self.event, 'medium').size, (1024, 640))
+        self.assertEqual(self.open_variant(self.event, 'medium_webp').format, 'WEBP')
+
+        response = self.client.get('/api/public/events/')
+        variants = next(item['image_variants'] for item in response.data if item['id'] == self.event.pk)
+        self.assertEqual(set(variants), {'thumb', 'thumb_webp', 'medium', 'medium_webp'})
+        self.assertIn('signature=', variants['thumb_webp'])
+
+    def test_replaced_image_gets_new_variants(self):
+        self.event.image.save('poster.png', image_file((400, 400), 'RGBA', 'PNG'))
+        self.worker.run(burst=True)
+        self.event.refresh_from_db()
+        old_thumb = self.event.image_variants['thumb']
+        self.assertTrue(old_thumb.endswith('.png'))
+
+        self.event.image.save('poster.jpg', image_file((400, 400)))
+        self.worker.run(burst=True)
+        self.event.refresh_from_db()
+        self.assertTrue(self.event.image_variants['thumb'].endswith('.jpg'))
+        self.assertFalse(self.event.image.storage.exists(old_thumb))
+
+    def test_legacy_images_are_backfilled_by_one_job(self):
+        storage = self.event.image.storage
+        names = [storage.save(f'events/legacy_{i}.jpg', image_file((500, 500))) for i in range(2)]
+        Event.objects.filter(pk=self.event.pk).update(image=names[0])
+        Announcement.objects.filter(organization__events=self.event).update(image=names[1])
+
+        for url in ('/api/public/events/', '/api/public/events/', '/api/public/announcements/'):
+            response = self.client.get(url)
+            self.assertTrue(all(item['image_variants'] is None for item in response.data))
+        self.assertEqual(list(Job.objects.values_list('task', flat=True)), ['images.backfill_variants'])
+
+        self.worker.run(burst=True)
+        self.event.refresh_from_db()
+        self.assertEqual(self.open_variant(self.event, 'thumb').size, (320, 320))
+        self.assertFalse(Announcement.objects.filter(image__in=names, image_variants={}).exists())
+
+    def test_unreadable_image_is_not_retried(self):
+        self.event.image.save('poster.jpg', ContentFile(b'not an image'))
+        self.worker.run(burst=True)
+
+        self.event.refresh_from_db()
+        self.assertEqual(self.event.image_variants, {'source': self.event.image.name})
+        self.assertEqual(Job.objects.get().status, 'done')
+        self.assertIsNone(self.client.get('/api/public/events/').data[0]['image_variants'])
+        self.assertEqual(Job.objects.count(), 1)
+
+
+class EventImageUploadTests(TestCase):
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        settings_override = override_settings(MEDIA_ROOT=media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.seeded = seed_dataset(users=10)
+        self.client = APIClient()
+        token = UserToken.for_user(self.seeded['users']['ONG-Association']).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        self.fields = {
+            'title': 'Forum', 'type': 'forum', 'description': 'Annual forum', 'location': 'Yaounde',
+            'capacity': 50, 'date': '2030-05-10', 'time': '10:00', 'registration_deadline': '2030-05-01'
+        }
+        self.image = image_file((600, 400), image_format='PNG').read()
+
+    def test_multipart_image_is_streamed_to_a_temporary_file(self):
+        upload = SimpleUploadedFile('poster.png', self.image, content_type='image/png')
+        with mock.patch('django.core.files.uploadhandler.TemporaryUploadedFile',
+                        wraps=TemporaryUploadedFile) as temporary_file:
+            response = self.client.post('/api/events/', {**self.fields, 'image': upload}, format='multipart')
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertTrue(temporary_file.called)
+
+        event = Event.objects.get(pk=response.data['id'])
+        self.assertTrue(event.image.name.startswith('events/poster.'))
+        self.assertEqual(event.image.read(), self.image)
+
+    @override_settings(EVENT_IMAGE_MAX_SIZE=1024)
+    def test_oversized_multipart_image_is_refused_while_read(self):
+        upload = SimpleUploadedFile('poster.png', b'x' * 70 * 1024, content_type='image/png')
+        with mock.patch('django.core.files.uploadhandler.TemporaryFileUploadHandler.receive_data_chunk') as store:
+            response = self.client.post('/api/events/', {**self.fields, 'image': upload}, format='multipart')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('should not exceed', response.data['error'])
+        self.assertFalse(store.called)
+        self.assertFalse(Event.objects.filter(title='Forum').exists())
+
+    def test_base64_image_is_still_accepted(self):
+        response = self.client.post('/api/events/', {**self.fields, 'image': base64.b64encode(self.image).decode()},
+                                    format='json')
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertEqual(Event.objects.get(pk=response.data['id']).image.read(), self.image)
+
+    @override_settings(EVENT_IMAGE_MAX_SIZE=1024)
+    def test_oversized_base64_image_is_refused_before_decoding(self):
+        image = 'QUFB' * 1024
+        with mock.patch('base64.b64decode', wraps=base64.b64decode) as b64decode:
+            response = self.client.post('/api/events/', {**self.fields, 'image': image}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('should not exceed', response.data['error'])
+        self.assertNotIn(mock.call(image), b64decode.call_args_list)
+
+
+#Background jobs
+calls = []
+
+
+@jobs.task('tests.record')
+def record_task(value, fail=False):
+    calls.append(value)
+    if fail:
+        raise RuntimeError('boom')
+
+
+class JobQueueTests(TestCase):
+    def setUp(self):
+        calls.clear()
+        self.worker = jobs.Worker()
+
+    def test_worker_runs_due_jobs_in_order(self):
+        jobs.enqueue('tests.record', {'value': 1})
+        jobs.enqueue('tests.record', {'value': 2})
+        later = jobs.enqueue('tests.record', {'value': 3}, run_at=timezone.now() + timedelta(hours=1))
+
+        self.worker.run(burst=True)
+
+        self.assertEqual(calls, [1, 2])
+        self.assertEqual(Job.objects.filter(status='done').count(), 2)
+        later.refresh_from_db()
+        self.assertEqual(later.status, 'queued')
+
+    def test_failed_job_is_retried_with_backoff_then_dead(self):
+        job = jobs.enqueue('tests.record', {'value': 1, 'fail': True}, max_attempts=2)
+
+        self.worker.run_once()
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), ('queued', 1))
+        self.assertGreater(job.run_at, timezone.now())
+        self.assertIn('boom', job.last_error)
+        self.assertFalse(self.worker.run_once())
+
+        Job.objects.filter(pk=job.pk).update(run_at=timezone.now())
+        self.worker.run_once()
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), ('dead', 2))
+
+    def test_claimed_job_is_not_claimed_twice(self):
+        jobs.enqueue('tests.record', {'value': 1})
+
+        self.assertEqual(len(jobs.claim_jobs('worker-a')), 1)
+        self.assertEqual(jobs.claim_jobs('worker-b'), [])
+
+    def test_stale_running_job_is_requeued(self):
+        job = jobs.enqueue('tests.record', {'value': 1})
+        jobs.claim_jobs('worker-a')
+        Job.objects.filter(pk=job.pk).update(locked_at=timezone.now() - timedelta(hours=1))
+
+        self.assertEqual(jobs.requeue_stale_jobs(), 1)
+        self.worker.run(burst=True)
+        self.assertEqual(calls, [1])
+
+
+#Email outbox
+class EmailOutboxTests(TestCase):
+    def setUp(self):
+        reset_smtp_connection()
+
+    def test_password_reset_request_only_stores_the_email(self):
+        User.objects.create(username='reset@example.com', email='reset@example.com', role='investor')
+
+        response = APIClient().post('/api/password/reset/request/', {'email': 'reset@example.com'}, format='json')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(mail.outbox), 0)
+        email = OutboxEmail.objects.get()
+        self.assertEqual((email.recipient, email.status), ('reset@example.com', 'pending'))
+        self.assertTrue(Job.objects.filter(task='emails.flush_outbox', status='queued').exists())
+
+    def test_flush_sends_batches_over_one_connection(self):
+        for i in range(5):
+            queue_email(f'user{i}@example.com', 'Subject', ['Line 1', 'Line 2'])
+
+        with mock.patch('main.mail.get_connection', wraps=mail.get_connection) as get_connection:
+            self.assertEqual(flush_outbox(batch_size=2), (5, 0))
+            self.assertEqual(flush_outbox(), (0, 0))
+
+        get_connection.assert_called_once()
+        self.assertEqual([m.to for m in mail.outbox], [[f'user{i}@example.com'] for i in range(5)])
+        self.assertEqual(mail.outbox[0].body, 'Line 1\nLine 2')
+        self.assertFalse(OutboxEmail.objects.exclude(status='sent').exists())
+
+    @override_settings(EMAIL_MAX_ATTEMPTS=2)
+    def test_failed_email_is_retried_then_marked_failed(self):
+        email = queue_email('user@example.com', 'Subject', ['Body'])
+
+        with mock.patch('main.mail.send_email', side_effect=ConnectionRefusedError('refused')):
+            with self.assertRaises(RuntimeError):
+                jobs.get_task('emails.flush_outbox')()
+            email.refresh_from_db()
+            self.assertEqual((email.status, email.attempts), ('pending', 1))
+
+            self.assertEqual(flush_outbox(), (0, 0))
+            email.refresh_from_db()
+            self.assertEqual((email.status, email.attempts), ('failed', 2))
+
+    @override_settings(EMAIL_BACKEND='django.core.mail.backends.smtp.EmailBackend', EMAIL_HOST='smtp.example.com',
+                       EMAIL_HOST_USER='', EMAIL_HOST_PASSWORD='')
+    def test_smtp_account_is_required(self):
+        email = queue_email('user@example.com', 'Subject', ['Body'])
+
+        with self.assertRaises(ImproperlyConfigured):
+            jobs.get_task('emails.flush_outbox')()
+        email.refresh_from_db()
+        self.assertEqual((email.status, email.attempts), ('pending', 0))
+
+
+#Startup
+class StartupTests(TestCase):
+    def test_heavy_modules_are_not_loaded_at_startup(self):
+        out = StringIO()
+        call_command('bench_startup', repeat=1, stdout=out)
+        self.assertIn('Heavy modules loaded at startup: none', out.getvalue())
+
+
+#Performance instrumentation
+class PerformanceMiddlewareTests(TestCase):
+    def setUp(self):
+        self.user, entrepreneur = create_entrepreneur()
+        create_projects(self.user, entrepreneur, 3)
+
+    def get_projects(self):
+        client = APIClient()
+        client.force_authenticate(user=self.user)
+        return client.get('/api/projects/')
+
+    @override_settings(PERF_INSTRUMENTATION=True)
+    def test_server_timing_header(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.get_projects()
+
+        self.assertEqual(response.status_code, 200)
+        timing = dict(entry.split(';', 1) for entry in response['Server-Timing'].split(', '))
+        self.assertEqual(set(timing), {'db', 'serialize', 'render', 'total'})
+        self.assertIn(f'desc="{len(queries)} queries"', timing['db'])
+
+    @override_settings(PERF_INSTRUMENTATION=True, PERF_SAMPLE_RATE=0)
+    def test_unsampled_requests_are_not_measured(self):
+        self.assertNotIn('Server-Timing', self.get_projects())
+
+    def test_disabled_by_default(self):
+        self.assertNotIn('Server-Timing', self.get_projects())
+
+
+#Authentication
+class StatelessAuthenticationTests(TestCase):
+    def setUp(self):
+        use_shared_cache(self)
+        self.user, self.entrepreneur = create_entrepreneur()
+        self.user.set_password('secret')
+        self.user.save()
+        self.client = APIClient()
+
+    def login(self):
+        response = self.client.post('/api/login/', {'email': self.user.email, 'password': 'secret'})
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {response.data['tokens']['access']}")
+
+    def test_token_claims_replace_the_user_query(self):
+        self.login()
+        self.client.get('/api/public/events/')
+
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/public/events/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.wsgi_request.user.role, 'entrepreneur')
+        self.assertEqual(response.wsgi_request.user.profile_id, self.entrepreneur.pk)
+        self.assertFalse(response.wsgi_request.user.loaded)
+
+    def test_user_is_loaded_when_a_view_needs_it(self):
+        self.login()
+        create_projects(self.user, self.entrepreneur, 2)
+
+        response = self.client.get('/api/projects/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data), 2)
+
+    def test_blocked_user_is_denied(self):
+        self.login()
+        with self.captureOnCommitCallbacks(execute=True):
+            User.objects.filter(pk=self.user.pk).update(is_blocked=True, is_active=False)
+            self.user.refresh_from_db()
+            self.user.save()
+        self.assertEqual(self.client.get('/api/public/events/').status_code, 401)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.is_blocked, self.user.is_active = False, True
+            self.user.save()
+        self.assertEqual(self.client.get('/api/public/events/').status_code, 200)
+
+    def test_changed_role_or_staff_flag_refuses_old_tokens(self):
+        self.login()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.is_staff = True
+            self.user.save()
+        self.assertEqual(self.client.get('/api/public/events/').status_code, 401)
+
+        # A new login carries the new claims
+        self.login()
+        self.assertEqual(self.client.get('/api/public/events/').status_code, 200)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.last_login = timezone.now()
+            self.user.save()
+        self.assertEqual(self.client.get('/api/public/events/').status_code, 200)
+
+    def test_process_local_cache_checks_the_user_row(self):
+        self.login()
+        with override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}):
+            # Blocked by another process: this process' cache never heard of it
+            User.objects.filter(pk=self.user.pk).update(is_blocked=True)
+            self.assertEqual(self.client.get('/api/public/events/').status_code, 401)
+
+            User.objects.filter(pk=self.user.pk).update(is_blocked=False, role='investor')
+            response = self.client.get('/api/public/events/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.wsgi_request.user.role, 'investor')
+
+    def test_tokens_without_claims_load_the_user(self):
+        token = RefreshToken.for_user(self.user).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/public/events/')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(any('"users"' in query['sql'] for query in queries))
+
+
+class ProfileMiddlewareTests(TestCase):
+    def setUp(self):
+        use_shared_cache(self)
+        self.seeded = seed_dataset(users=10)
+        self.client = APIClient()
+
+    def login(self, role):
+        token = UserToken.for_user(self.seeded['users'][role]).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+
+    def test_profile_and_user_come_from_one_query(self):
+        self.login('investor')
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/contracts/')
+        self.assertEqual(response.status_code, 200)
+
+        profile = response.wsgi_request.profile
+        self.assertIsInstance(profile, Investor)
+        self.assertEqual(profile.user_id, self.seeded['users']['investor'].pk)
+        self.assertIn('JOIN "users"', queries[0]['sql'])
+        self.assertFalse(any(query['sql'].startswith('SELECT "users"') for query in queries))
+
+    def test_admin_has_no_profile(self):
+        self.login('admin')
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/contracts/')
+        self.assertEqual(response.data, [])
+
+    def test_proposal_permission_uses_the_profile(self):
+        proposal = self.seeded['financial_proposal']
+        permission = IsProposalOwnerOrRequestEntrepreneur()
+
+        def allowed(profile):
+            return permission.has_object_permission(SimpleNamespace(profile=profile), None, proposal)
+
+        investor, entrepreneur = proposal.investor, proposal.help_request.entrepreneur
+        # Profiles are compared by id, nothing more is loaded
+        with self.assertNumQueries(0):
+            self.assertTrue(allowed(investor))
+            self.assertTrue(allowed(entrepreneur))
+        self.assertFalse(allowed(Investor.objects.exclude(pk=proposal.investor_id).first()))
+        self.assertFalse(allowed(None))
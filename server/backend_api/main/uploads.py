@@ -0,0 +1,45 @@
+#uploads.py
+
+#Streamed multipart uploads with a size limit
+from django.conf import settings
+from django.core.files.uploadhandler import FileUploadHandler, TemporaryFileUploadHandler
+from django.http.multipartparser import MultiPartParserError
+
+
+class UploadTooLarge(MultiPartParserError):
+    """Raised while parsing; DRF's MultiPartParser turns it into a 400 ParseError"""
+
+
+def size_limit_message(max_size):
+    return f"Image size should not exceed {max_size // (1024 * 1024)}MB"
+
+
+class LimitedUploadHandler(FileUploadHandler):
+    """
+    Refuses a file as soon as more than max_size bytes of it were read, before they reach the
+    next handler, and a whole request whose announced length cannot fit the limit before anything
+    is read. Put it first, before the handler storing the data.
+    """
+
+    def __init__(self, request=None, max_size=5 * 1024 * 1024):
+        super().__init__(request)
+        self.max_size = max_size
+
+    def handle_raw_input(self, input_data, META, content_length, boundary, encoding=None):
+        # Room for the other fields, which Django caps at DATA_UPLOAD_MAX_MEMORY_SIZE
+        fields_size = settings.DATA_UPLOAD_MAX_MEMORY_SIZE
+        if fields_size is not None and content_length > self.max_size + fields_size:
+            raise UploadTooLarge(size_limit_message(self.max_size))
+
+    def receive_data_chunk(self, raw_data, start):
+        if start + len(raw_data) > self.max_size:
+            raise UploadTooLarge(size_limit_message(self.max_size))
+        return raw_data
+
+    def file_complete(self, file_size):
+        return None
+
+
+def limited_upload_handlers(request, max_size):
+    """Upload handlers streaming files to temporary files on disk, at most max_size bytes each"""
+    return [LimitedUploadHandler(request, max_size), TemporaryFileUploadHandler(request)]
@@ -1,6 +1,4 @@
 from django.urls import path
-from django.conf import settings
-from django.conf.urls.static import static
 from . import views
 from .views import RegisterView, LoginView, LogoutView, UserManagementView, UserStatsView, AdminSignupView, \
     ProjectAPIView, ProjectUploadDocumentAPIView, ProjectUpdateStatusAPIView, HelpRequestAPIView, \
@@ -79,4 +77,4 @@ urlpatterns = [
     path('admin/users/<int:user_id>', UserManagementView.as_view(), name='admin-user-update'),
     path('admin/users/stats', UserStatsView.as_view(), name='admin-user-stats'),
     path('admin/analytics/', AdminAnalyticsAPIView.as_view(), name='admin-analytics'),
-] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
\ No newline at end of file
+]
\ No newline at end of file
@@ -1,18 +1,14 @@
 import base64
 import json
-import os
 import random
 import traceback
 import uuid
-from collections import defaultdict
 
-import yagmail
 from django.contrib.auth.password_validation import validate_password
 from django.core.cache import cache
 from django.core.files.base import ContentFile
 from django.core.files.storage import default_storage
-from django.db.models.functions import TruncMonth
-from django.http import FileResponse
+from django.core.files.uploadedfile import UploadedFile
 from django.shortcuts import render
 
 # Create your views here.
@@ -21,30 +17,38 @@ from django.template.loader import render_to_string
 from rest_framework import status
 from rest_framework.response import Response
 from rest_framework.views import APIView
+from rest_framework.exceptions import NotFound, ParseError
 from django.db import transaction
 from django.contrib.auth.hashers import make_password
 from rest_framework.permissions import AllowAny, IsAuthenticated, IsAdminUser
 from rest_framework_simplejwt.tokens import RefreshToken
 from django.contrib.auth import authenticate
-from django.db.models import Count, Q, Sum, When, Case, F, ExpressionWrapper, FloatField  # Added Q here
+from django.db.models import Q, Sum
 from django.shortcuts import get_object_or_404
 from django.core.exceptions import ValidationError
 from django.contrib.auth.hashers import check_password, make_password
 
+from .authentication import UserToken
+from .caching import feed_response
 from .contract import ContractHandler
+from .delivery import file_response
+from .mail import queue_email
+from .uploads import limited_upload_handlers, size_limit_message
 from rest_framework.parsers import MultiPartParser, FormParser
-from django.db.models.functions import TruncMonth, ExtractMonth
+from django.db.models.functions import Coalesce
 from django.utils import timezone
 from datetime import timedelta
-import pdfkit
 import logging
 
 
 
 from django.contrib.auth import get_user_model
 from django.conf import settings
+from .analytics import month_of
+from .pagination import KeysetPagination, paginated_response
 from .models import Organization, Entrepreneur, Investor, ProjectDocument, Project, HelpRequest, TechnicalRequest, \
-    FinancialRequest, FinancialProposal, TechnicalProposal, Collaboration, Contract, User, Announcement, Event
+    FinancialRequest, FinancialProposal, TechnicalProposal, Collaboration, Contract, User, Announcement, Event, \
+    AnalyticsRollup
 from .permission import IsProposalOwnerOrRequestEntrepreneur
 from .serializers import OrganizationSerializer, EntrepreneurSerializer, UserUpdateSerializer, UserListSerializer, \
     UserCreateSerializer, InvestorSerializer, ProjectSerializer, FinancialRequestSerializer, TechnicalRequestSerializer, \
@@ -126,7 +130,7 @@ class LoginView(APIView):
         user = authenticate(username=email, password=password)
 
         if user is not None:
-            refresh = RefreshToken.for_user(user)
+            refresh = UserToken.for_user(user)
 
             return Response({
                 'tokens': {
@@ -176,10 +180,6 @@ class LogoutView(APIView):
                 )
 
 #Forgot Password
-# Email configuration
-username = "yvangodimomo@gmail.com"
-password = "pzls apph esje cgdl"
-yag = yagmail.SMTP(username, password)
 
 def generate_reset_code():
     return ''.join([str(random.randint(0, 9)) for _ in range(6)])
@@ -212,7 +212,7 @@ class RequestPasswordResetView(APIView):
                     "If you didn't request this reset, please ignore this email."
                 ]
 
-                yag.send(to=email, subject=subject, contents=contents)
+                queue_email(email, subject, contents)
 
                 return Response({
                     'message': 'Reset code sent successfully',
@@ -287,7 +287,7 @@ class ResetPasswordView(APIView):
                         "Your password has been successfully reset.",
                         "If you didn't make this change, please contact support immediately."
                     ]
-                    yag.send(to=email, subject=subject, contents=contents)
+                    queue_email(email, subject, contents)
 
                     return Response({'message': 'Password reset successful'})
                 except CustomUser.DoesNotExist:
@@ -507,7 +507,8 @@ class UserManagementView(APIView):
             return Response(serializer.data)
 
 
-        users = User.objects.all()
+        # Join the three profiles so UserListSerializer.get_name reads them from memory
+        users = User.objects.select_related('entrepreneur', 'investor', 'organization')
 
         # Handle role filtering
         role = request.query_params.get('role')
@@ -524,8 +525,10 @@ class UserManagementView(APIView):
                 Q(organization__organization_name__icontains=search)
             )
 
-        serializer = UserListSerializer(users, many=True)
-        return Response(serializer.data)
+        paginator = KeysetPagination()
+        page = paginator.paginate_queryset(users, request, view=self)
+        serializer = UserListSerializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
 
     @transaction.atomic
     def post(self, request):
@@ -653,24 +656,16 @@ class ProjectAPIView(APIView):
         if user.is_staff:
             projects = Project.objects.all()
         else:
-            try:
-                entrepreneur = Entrepreneur.objects.get(user=user)
-                projects = Project.objects.filter(entrepreneur=entrepreneur)
-            except Entrepreneur.DoesNotExist:
-                projects = Project.objects.none()
+            projects = Project.objects.filter(entrepreneur__user=user)
 
-        serializer = ProjectSerializer(projects, many=True, context={'request': request})
-        data = serializer.data
+        # Load the entrepreneur with the project and every document in one extra
+        # query, so the serializer never goes back to the database per row
+        projects = projects.select_related('entrepreneur').prefetch_related('documents')
 
-        # Add debugging
-        for project in data:
-            if project.get('project_image'):
-                print(f"Project {project['project_name']} image URL: {project['project_image']}")
-            for doc in project.get('documents', []):
-                if doc['document_type'] == 'project_photos':
-                    print(f"Project {project['project_name']} document URL: {doc['file']}")
-
-        return Response(data)
+        paginator = KeysetPagination()
+        page = paginator.paginate_queryset(projects, request, view=self)
+        serializer = ProjectSerializer(page, many=True, context={'request': request})
+        return paginator.get_paginated_response(serializer.data)
 
     def post(self, request):
         try:
@@ -800,11 +795,20 @@ class ProjectUpdateStatusAPIView(APIView):
 class HelpRequestAPIView(APIView):
     permission_classes = [IsAuthenticated]
 
+    def get_queryset(self):
+        # Everything HelpRequestSerializer reads, loaded up front
+        return HelpRequest.objects.select_related(
+            'project', 'entrepreneur__user', 'financialrequest', 'technicalrequest'
+        ).prefetch_related('project__documents')
+
     def get(self, request, pk=None):
         """Get a single help request or list of help requests"""
+        if pk and request.resolver_match.url_name == 'help-request-accepted-amount':
+            return self.get_accepted_amount(request, pk)
+
         if pk:
             try:
-                help_request = HelpRequest.objects.get(pk=pk)
+                help_request = self.get_queryset().get(pk=pk)
                 serializer = HelpRequestSerializer(help_request, context={'request': request})
                 return Response(serializer.data)
             except HelpRequest.DoesNotExist:
@@ -815,34 +819,24 @@ class HelpRequestAPIView(APIView):
 
         # Filter requests based on user role
         if request.user.role == 'entrepreneur':
-            help_requests = HelpRequest.objects.filter(entrepreneur__user=request.user)
+            help_requests = self.get_queryset().filter(entrepreneur__user=request.user)
         else:
-            help_requests = HelpRequest.objects.all()
+            help_requests = self.get_queryset()
 
-        serializer = HelpRequestSerializer(help_requests, many=True, context={'request': request})
-        return Response(serializer.data)
+        paginator = KeysetPagination()
+        page = paginator.paginate_queryset(help_requests, request, view=self)
+        serializer = HelpRequestSerializer(page, many=True, context={'request': request})
+        return paginator.get_paginated_response(serializer.data)
 
     def get_accepted_amount(self, request, pk):
         """Get total accepted amount for a financial help request"""
         try:
-            help_request = HelpRequest.objects.get(
+            help_request = HelpRequest.objects.select_related('financialrequest').get(
                 pk=pk,
-                entrepreneur=request.user.entrepreneur
+                entrepreneur__user=request.user
             )
 
-            # Get all accepted financial proposals
-            accepted_proposals = FinancialProposal.objects.filter(
-                help_request=help_request,
-                status='accepted'
-            )
-
-            # Calculate total accepted amount
-            total_accepted = sum(
-                proposal.investment_amount
-                for proposal in accepted_proposals
-            )
-
-            # Get total requested amount
+            total_accepted = help_request.accepted_amount
             total_requested = help_request.financialrequest.amount_requested
 
             return Response({
@@ -856,6 +850,11 @@ class HelpRequestAPIView(APIView):
                 {"error": "Help request not found"},
                 status=status.HTTP_404_NOT_FOUND
             )
+        except FinancialRequest.DoesNotExist:
+            return Response(
+                {"error": "Not a financial help request"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
 
     @transaction.atomic
     def post(self, request, *args, **kwargs):
@@ -1006,13 +1005,23 @@ class HelpUpdateStatusAPIView(APIView):
             }, status=status.HTTP_404_NOT_FOUND)
 
 
+# Relations read by the proposal, contract and collaboration serializers, fetched with the rows
+PROPOSAL_RELATIONS = ('investor', 'help_request__project', 'help_request__financialrequest')
+CONTRACT_RELATIONS = tuple(
+    f'{proposal}__{relation}' for proposal in ('financial_proposal', 'technical_proposal')
+    for relation in ('investor', 'help_request__project')
+)
+COLLABORATION_RELATIONS = ('project', 'entrepreneur__user', 'investor__user') + tuple(
+    f'contract__{relation}' for relation in CONTRACT_RELATIONS
+)
+
+
 class HelpProposalView(APIView):
     permission_classes = [IsAuthenticated, IsProposalOwnerOrRequestEntrepreneur]
 
     def post(self, request, proposal_type):
-        try:
-            investor = request.user.investor
-        except Investor.DoesNotExist:
+        investor = request.profile
+        if not isinstance(investor, Investor):
             return Response(
                 {"error": "Only investors can submit proposals"},
                 status=status.HTTP_403_FORBIDDEN
@@ -1034,19 +1043,18 @@ class HelpProposalView(APIView):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
     def get(self, request, proposal_type, pk=None):
-        try:
-            investor = request.user.investor
-        except Investor.DoesNotExist:
+        investor = request.profile
+        if not isinstance(investor, Investor):
             return Response(
                 {"error": "Only investors can view proposals"},
                 status=status.HTTP_403_FORBIDDEN
             )
 
         if proposal_type == 'financial':
-            proposals = investor.financial_proposals.all()
+            proposals = investor.financial_proposals.select_related(*PROPOSAL_RELATIONS)
             serializer_class = FinancialProposalSerializer
         elif proposal_type == 'technical':
-            proposals = investor.technical_proposals.all()
+            proposals = investor.technical_proposals.select_related(*PROPOSAL_RELATIONS)
             serializer_class = TechnicalProposalSerializer
         else:
             return Response(
@@ -1064,14 +1072,16 @@ class HelpProposalView(APIView):
                     status=status.HTTP_404_NOT_FOUND
                 )
         else:
-            serializer = serializer_class(proposals, many=True)
+            paginator = KeysetPagination()
+            page = paginator.paginate_queryset(proposals, request, view=self)
+            serializer = serializer_class(page, many=True)
+            return paginator.get_paginated_response(serializer.data)
 
         return Response(serializer.data)
 
     def patch(self, request, proposal_type, pk):
-        try:
-            investor = request.user.investor
-        except Investor.DoesNotExist:
+        investor = request.profile
+        if not isinstance(investor, Investor):
             return Response(
                 {"error": "Only investors can update proposals"},
                 status=status.HTTP_403_FORBIDDEN
@@ -1108,9 +1118,8 @@ class HelpProposalView(APIView):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
     def delete(self, request, proposal_type, pk):
-        try:
-            investor = request.user.investor
-        except Investor.DoesNotExist:
+        investor = request.profile
+        if not isinstance(investor, Investor):
             return Response(
                 {"error": "Only investors can delete proposals"},
                 status=status.HTTP_403_FORBIDDEN
@@ -1147,9 +1156,8 @@ class EntrepreneurProposalView(APIView):
 
     def get(self, request, proposal_type=None):
         """Get all proposals for entrepreneur's help requests"""
-        try:
-            entrepreneur = request.user.entrepreneur
-        except Entrepreneur.DoesNotExist:
+        entrepreneur = request.profile
+        if not isinstance(entrepreneur, Entrepreneur):
             return Response(
                 {"error": "Only entrepreneurs can view their request proposals"},
                 status=status.HTTP_403_FORBIDDEN
@@ -1157,25 +1165,36 @@ class EntrepreneurProposalView(APIView):
 
         # Get all help requests from this entrepreneur
         help_requests = HelpRequest.objects.filter(entrepreneur=entrepreneur)
+        financial_proposals = FinancialProposal.objects.filter(
+            help_request__in=help_requests
+        ).select_related(*PROPOSAL_RELATIONS)
+        technical_proposals = TechnicalProposal.objects.filter(
+            help_request__in=help_requests
+        ).select_related(*PROPOSAL_RELATIONS)
+
+        if proposal_type in ('financial', 'technical'):
+            if proposal_type == 'financial':
+                proposals = financial_proposals
+                serializer_class = FinancialProposalSerializer
+            else:
+                proposals = technical_proposals
+                serializer_class = TechnicalProposalSerializer
 
-        if proposal_type == 'financial':
-            proposals = FinancialProposal.objects.filter(help_request__in=help_requests)
-            serializer = FinancialProposalSerializer(proposals, many=True)
-        elif proposal_type == 'technical':
-            proposals = TechnicalProposal.objects.filter(help_request__in=help_requests)
-            serializer = TechnicalProposalSerializer(proposals, many=True)
-        else:
-            # If no type specified, get both types
-            financial_proposals = FinancialProposal.objects.filter(help_request__in=help_requests)
-            technical_proposals = TechnicalProposal.objects.filter(help_request__in=help_requests)
+            paginator = KeysetPagination()
+            page = paginator.paginate_queryset(proposals, request, view=self)
+            return paginator.get_paginated_response(serializer_class(page, many=True).data)
 
-            response_data = {
-                'financial_proposals': FinancialProposalSerializer(financial_proposals, many=True).data,
-                'technical_proposals': TechnicalProposalSerializer(technical_proposals, many=True).data
-            }
-            return Response(response_data)
+        # If no type specified, get both types, each list paged with its own cursor
+        financial_paginator = KeysetPagination(cursor_query_param='financial_cursor', link_rel='next-financial')
+        technical_paginator = KeysetPagination(cursor_query_param='technical_cursor', link_rel='next-technical')
+        financial_proposals = financial_paginator.paginate_queryset(financial_proposals, request, view=self)
+        technical_proposals = technical_paginator.paginate_queryset(technical_proposals, request, view=self)
 
-        return Response(serializer.data)
+        response_data = {
+            'financial_proposals': FinancialProposalSerializer(financial_proposals, many=True).data,
+            'technical_proposals': TechnicalProposalSerializer(technical_proposals, many=True).data
+        }
+        return paginated_response(response_data, financial_paginator, technical_paginator)
 
     def patch(self, request, proposal_type, pk):
         """Update proposal status and handle contract/collaboration creation"""
@@ -1183,9 +1202,8 @@ class EntrepreneurProposalView(APIView):
 
         try:
             # Validate user is entrepreneur
-            try:
-                entrepreneur = request.user.entrepreneur
-            except Entrepreneur.DoesNotExist:
+            entrepreneur = request.profile
+            if not isinstance(entrepreneur, Entrepreneur):
                 return Response(
                     {"error": "Only entrepreneurs can update proposal status"},
                     status=status.HTTP_403_FORBIDDEN
@@ -1238,40 +1256,20 @@ class EntrepreneurProposalView(APIView):
                         status=status.HTTP_400_BAD_REQUEST
                     )
 
-                if new_status == 'accepted':
-                    if proposal_type == 'financial':
-                        # Validate total accepted amount
-                        accepted_proposals = FinancialProposal.objects.filter(
-                            help_request=proposal.help_request,
-                            status='accepted'
-                        )
-                        total_accepted = sum(p.investment_amount for p in accepted_proposals)
-                        total_with_current = total_accepted + proposal.investment_amount
-
-                        if total_with_current > proposal.help_request.financialrequest.amount_requested:
-                            return Response(
-                                {"error": "Accepting this proposal would exceed the requested amount"},
-                                status=status.HTTP_400_BAD_REQUEST
-                            )
-                    else:  # technical
-                        # Check if there's already an accepted technical proposal
-                        existing_accepted = TechnicalProposal.objects.filter(
-                            help_request=proposal.help_request,
-                            status='accepted'
-                        ).exists()
-
-                        if existing_accepted:
-                            return Response(
-                                {"error": "Another technical proposal is already accepted"},
-                                status=status.HTTP_400_BAD_REQUEST
-                            )
-
-                        # Refuse other technical proposals
-                        proposal.help_request.technical_proposals.exclude(pk=pk).update(status='refused')
-
-                # Update proposal status
+                # Update proposal status; accepting checks the help request ledger
+                # (requested amount, single technical proposal) in one conditional update
                 proposal.status = new_status
-                proposal.save()
+                try:
+                    proposal.save()
+                except ValidationError as e:
+                    return Response(
+                        {"error": e.messages[0]},
+                        status=status.HTTP_400_BAD_REQUEST
+                    )
+
+                if new_status == 'accepted' and proposal_type == 'technical':
+                    # Refuse other technical proposals
+                    proposal.help_request.technical_proposals.exclude(pk=pk).update(status='refused')
 
                 # If accepted, create contract and collaboration
                 if new_status == 'accepted':
@@ -1288,6 +1286,7 @@ class EntrepreneurProposalView(APIView):
                         'proposal': ProposalSerializer(proposal).data,
                         'contract_id': contract.id,
                         'collaboration_id': collaboration.id,
+                        'render_status': contract.render_status,
                         'message': 'Proposal accepted. Contract and collaboration created.'
                     })
 
@@ -1314,9 +1313,9 @@ class CollaborationAPIView(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
-        user = request.user
-        if hasattr(user, 'entrepreneur'):
-            collaborations = Collaboration.objects.filter(entrepreneur=user.entrepreneur)
+        profile = request.profile
+        if isinstance(profile, Entrepreneur):
+            collaborations = Collaboration.objects.filter(entrepreneur=profile)
 
             # Calculate statistics
             stats = {
@@ -1329,8 +1328,8 @@ class CollaborationAPIView(APIView):
                     total=Sum('contract__financial_proposal__investment_amount')
                 )['total'] or 0
             }
-        elif hasattr(user, 'investor'):
-            collaborations = Collaboration.objects.filter(investor=user.investor)
+        elif isinstance(profile, Investor):
+            collaborations = Collaboration.objects.filter(investor=profile)
 
             # Calculate statistics
             stats = {
@@ -1346,7 +1345,12 @@ class CollaborationAPIView(APIView):
         else:
             collaborations = Collaboration.objects.none()
 
-        serializer = CollaborationSerializer(collaborations, many=True)
+        # Stats cover every collaboration, only the list itself is paged
+        paginator = KeysetPagination(ordering_field='start_date')
+        page = paginator.paginate_queryset(
+            collaborations.select_related(*COLLABORATION_RELATIONS), request, view=self
+        )
+        serializer = CollaborationSerializer(page, many=True)
         stats_serializer = CollaborationStatsSerializer(stats)
 
         response_data = {
@@ -1354,23 +1358,23 @@ class CollaborationAPIView(APIView):
             'collaborations': serializer.data
         }
 
-        return Response(response_data, status=status.HTTP_200_OK)
+        return paginator.get_paginated_response(response_data, status=status.HTTP_200_OK)
 
 class ContractAPIView(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request, proposal_type=None, proposal_id=None):
-        user = request.user
-        if hasattr(user, 'entrepreneur'):
+        profile = request.profile
+        if isinstance(profile, Entrepreneur):
             # Modify this query to correctly filter contracts for the entrepreneur
             contracts = Contract.objects.filter(
-                Q(financial_proposal__help_request__entrepreneur=user.entrepreneur) |
-                Q(technical_proposal__help_request__entrepreneur=user.entrepreneur)
+                Q(financial_proposal__help_request__entrepreneur=profile) |
+                Q(technical_proposal__help_request__entrepreneur=profile)
             )
-        elif hasattr(user, 'investor'):
+        elif isinstance(profile, Investor):
             contracts = Contract.objects.filter(
-                Q(financial_proposal__investor=user.investor) |
-                Q(technical_proposal__investor=user.investor)
+                Q(financial_proposal__investor=profile) |
+                Q(technical_proposal__investor=profile)
             )
         else:
             contracts = Contract.objects.none()
@@ -1381,45 +1385,34 @@ class ContractAPIView(APIView):
                 Q(technical_proposal__type=proposal_type, technical_proposal_id=proposal_id)
             )
 
-        serializer = ContractSerializer(contracts, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        paginator = KeysetPagination()
+        contracts = contracts.select_related(*CONTRACT_RELATIONS)
+        page = paginator.paginate_queryset(contracts, request, view=self)
+        serializer = ContractSerializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data, status=status.HTTP_200_OK)
 
 
 class ContractViewDownloadAPIView(APIView):
     permission_classes = [IsAuthenticated]
 
     def get_contract(self, contract_id):
-        try:
-            contract = Contract.objects.get(id=contract_id)
-            # Check if user has permission to access this contract
-            user = self.request.user
-            if hasattr(user, 'entrepreneur'):
-                # Handle both financial and technical proposals
-                if contract.financial_proposal:
-                    has_access = contract.financial_proposal.help_request.entrepreneur == user.entrepreneur
-                elif contract.technical_proposal:
-                    has_access = contract.technical_proposal.help_request.entrepreneur == user.entrepreneur
-                else:
-                    return None
-
-                if not has_access:
-                    return None
-
-            elif hasattr(user, 'investor'):
-                # Handle both financial and technical proposals
-                if contract.financial_proposal:
-                    has_access = contract.financial_proposal.investor == user.investor
-                elif contract.technical_proposal:
-                    has_access = contract.technical_proposal.investor == user.investor
-                else:
-                    return None
-
-                if not has_access:
-                    return None
+        """The contract with its project name if the user may access it, in one query; else None"""
+        user = self.request.user
+        if user.role == 'entrepreneur':
+            access = Q(financial_proposal__help_request__entrepreneur__user_id=user.pk) | \
+                Q(technical_proposal__help_request__entrepreneur__user_id=user.pk)
+        elif user.role == 'investor':
+            access = Q(financial_proposal__investor__user_id=user.pk) | \
+                Q(technical_proposal__investor__user_id=user.pk)
+        else:
+            access = Q()
 
-            return contract
-        except Contract.DoesNotExist:
-            return None
+        return Contract.objects.filter(access, id=contract_id).annotate(
+            project_name=Coalesce(
+                'financial_proposal__help_request__project__project_name',
+                'technical_proposal__help_request__project__project_name'
+            )
+        ).first()
 
     def get(self, request, contract_id, action):
         contract = self.get_contract(contract_id)
@@ -1430,48 +1423,40 @@ class ContractViewDownloadAPIView(APIView):
             )
 
         try:
+            # The PDF is rendered in the background after the proposal is accepted
+            if contract.render_status == 'pending_render':
+                return Response(
+                    {"render_status": contract.render_status, "message": "Contract PDF is being generated"},
+                    status=status.HTTP_202_ACCEPTED
+                )
+            if contract.render_status == 'failed':
+                return Response(
+                    {"render_status": contract.render_status, "error": "Contract PDF generation failed"},
+                    status=status.HTTP_500_INTERNAL_SERVER_ERROR
+                )
+
             if not contract.pdf_file:
                 return Response(
                     {"error": "PDF file not found"},
                     status=status.HTTP_404_NOT_FOUND
                 )
 
-            # Get the file path
-            file_path = contract.pdf_file.path
-
-            if not os.path.exists(file_path):
+            if not contract.pdf_file.storage.exists(contract.pdf_file.name):
                 return Response(
                     {"error": "PDF file not found on server"},
                     status=status.HTTP_404_NOT_FOUND
                 )
 
-            # Open the file
-            pdf_file = open(file_path, 'rb')
-
             if action == "view":
-                response = FileResponse(pdf_file, content_type='application/pdf')
-                response['Content-Disposition'] = 'inline'
-                # Add headers to prevent caching
-                response['Cache-Control'] = 'no-cache, no-store, must-revalidate'
-                response['Pragma'] = 'no-cache'
-                response['Expires'] = '0'
-                return response
+                # Cached privately, revalidated against the file's ETag
+                return file_response(request, contract.pdf_file, 'application/pdf', 'inline')
 
             elif action == "download":
-                # Get the appropriate proposal based on contract type
-                proposal = contract.financial_proposal or contract.technical_proposal
-                if proposal and proposal.help_request:
-                    project_name = proposal.help_request.project.project_name
-                else:
-                    project_name = 'unknown_project'
-
-                filename = f"{project_name}_{contract.contract_type}.pdf"
-                response = FileResponse(pdf_file, content_type='application/pdf')
-                response['Content-Disposition'] = f'attachment; filename="{filename}"'
-                return response
+                filename = f"{contract.project_name or 'unknown_project'}_{contract.contract_type}.pdf"
+                return file_response(request, contract.pdf_file, 'application/pdf',
+                                     f'attachment; filename="{filename}"')
 
             else:
-                pdf_file.close()
                 return Response(
                     {"error": "Invalid action"},
                     status=status.HTTP_400_BAD_REQUEST
@@ -1571,8 +1556,10 @@ class AnnouncementAPIView(APIView):
         if announcement_type:
             queryset = queryset.filter(type=announcement_type)
 
-        serializer = AnnouncementSerializer(queryset, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        paginator = KeysetPagination()
+        page = paginator.paginate_queryset(queryset, request, view=self)
+        serializer = AnnouncementSerializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data, status=status.HTTP_200_OK)
 
     def delete(self, request, pk):
         """
@@ -1714,21 +1701,53 @@ class AnnouncementAPIView(APIView):
 
 #Organisation event
 class EventManagementView(APIView):
+    """
+    Events of the requesting organization. The image comes as a file of a multipart request,
+    streamed to a temporary file and refused as soon as it passes EVENT_IMAGE_MAX_SIZE, or as a
+    base64 string in a JSON body (older clients).
+    """
     permission_classes = [IsAuthenticated]
 
+    def initialize_request(self, request, *args, **kwargs):
+        # Upload handlers can only be changed before the body is read
+        request.upload_handlers = limited_upload_handlers(request, self.image_max_size())
+        return super().initialize_request(request, *args, **kwargs)
+
+    @staticmethod
+    def image_max_size():
+        return getattr(settings, 'EVENT_IMAGE_MAX_SIZE', 5 * 1024 * 1024)
+
     def get_organization(self, request):
         if request.user.role != 'ONG-Association':
             raise PermissionError("Only organizations can manage events")
-        return request.user.organization
+        return request.profile
 
-    def process_image(self, base64_data):
+    def event_data(self, request):
+        """The request's event fields, the image ready for EventSerializer; ValueError if it is refused"""
         try:
-            if not base64_data:
-                return None
+            # QueryDict.copy() would deep-copy the uploaded file
+            data = request.data.dict() if hasattr(request.data, 'dict') else request.data.copy()
+        except ParseError as e:
+            raise ValueError(str(e.detail))
 
-            image_data = base64.b64decode(base64_data)
-            if len(image_data) > 5 * 1024 * 1024:
-                raise ValueError("Image size should not exceed 5MB")
+        image = data.pop('image', None)
+        if image:
+            data['image'] = self.process_image(image)
+        return data
+
+    def process_image(self, image):
+        if isinstance(image, UploadedFile):
+            # Already limited while it was read
+            return image
+
+        try:
+            # Decoded data is 3/4 of the base64 length: refuse it before decoding
+            if len(image) * 3 // 4 > self.image_max_size() + 2:
+                raise ValueError(size_limit_message(self.image_max_size()))
+
+            image_data = base64.b64decode(image)
+            if len(image_data) > self.image_max_size():
+                raise ValueError(size_limit_message(self.image_max_size()))
 
             filename = f"event_image_{uuid.uuid4()}.png"
             return ContentFile(image_data, name=filename)
@@ -1738,14 +1757,8 @@ class EventManagementView(APIView):
     def post(self, request):
         try:
             organization = self.get_organization(request)
-            data = request.data.copy()
-
-            # Process image if present
-            image_data = data.pop('image', None)
             try:
-                if image_data:
-                    image_file = self.process_image(image_data)
-                    data['image'] = image_file
+                data = self.event_data(request)
             except ValueError as e:
                 return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
@@ -1768,7 +1781,9 @@ class EventManagementView(APIView):
                 return Response(EventSerializer(event).data)
 
             events = Event.objects.filter(organization=organization)
-            return Response(EventSerializer(events, many=True).data)
+            paginator = KeysetPagination()
+            page = paginator.paginate_queryset(events, request, view=self)
+            return paginator.get_paginated_response(EventSerializer(page, many=True).data)
         except PermissionError as e:
             return Response({"error": str(e)}, status=status.HTTP_403_FORBIDDEN)
 
@@ -1776,18 +1791,12 @@ class EventManagementView(APIView):
         try:
             organization = self.get_organization(request)
             event = get_object_or_404(Event, id=event_id, organization=organization)
-            data = request.data.copy()
-
-            # Process image if present
-            image_data = data.pop('image', None)
             try:
-                if image_data:
-                    image_file = self.process_image(image_data)
-                    if event.image:
-                        event.image.delete(save=False)
-                    data['image'] = image_file
+                data = self.event_data(request)
             except ValueError as e:
                 return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+            if 'image' in data and event.image:
+                event.image.delete(save=False)
 
             serializer = EventSerializer(event, data=data, context={'request': request})
             if serializer.is_valid():
@@ -1802,18 +1811,12 @@ class EventManagementView(APIView):
         try:
             organization = self.get_organization(request)
             event = get_object_or_404(Event, id=event_id, organization=organization)
-            data = request.data.copy()
-
-            # Process image if present
-            image_data = data.pop('image', None)
             try:
-                if image_data:
-                    image_file = self.process_image(image_data)
-                    if event.image:
-                        event.image.delete(save=False)
-                    data['image'] = image_file
+                data = self.event_data(request)
             except ValueError as e:
                 return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+            if 'image' in data and event.image:
+                event.image.delete(save=False)
 
             serializer = EventSerializer(event, data=data, partial=True, context={'request': request})
             if serializer.is_valid():
@@ -1847,7 +1850,12 @@ class PublicEventView(APIView):
 
             # Get all published events
             events = Event.objects.filter(status='published')
-            return Response(EventSerializer(events, many=True).data)
+
+            # Served from the cache until an event is saved or deleted
+            return feed_response(request, 'events', events, EventSerializer)
+        except NotFound:
+            # Invalid cursor
+            raise
         except Exception as e:
             return Response(
                 {"error": str(e)},
@@ -1869,8 +1877,11 @@ class PublicAnnouncementView(APIView):
             if announcement_type:
                 queryset = queryset.filter(type=announcement_type)
 
-            serializer = AnnouncementSerializer(queryset, many=True)
-            return Response(serializer.data, status=status.HTTP_200_OK)
+            # Served from the cache until an announcement is saved or deleted
+            return feed_response(request, 'announcements', queryset, AnnouncementSerializer)
+        except NotFound:
+            # Invalid cursor
+            raise
         except Exception as e:
             return Response(
                 {"error": str(e)},
@@ -1887,118 +1898,71 @@ class AdminAnalyticsAPIView(APIView):
             # Get the last 6 months for timeline analysis
             end_date = timezone.now()
             start_date = end_date - timedelta(days=180)
-
-            # Monthly statistics
-            monthly_stats = HelpRequest.objects.filter(
-                created_at__range=(start_date, end_date)
-            ).annotate(
-                month=TruncMonth('created_at')
-            ).values('month').annotate(
-                projects=Count('project', distinct=True),
-                financial=Count('id', filter=Q(request_type='financial')),
-                technical=Count('id', filter=Q(request_type='technical')),
-                total_requests=Count('id'),
-                transactions=Sum(
-                    Case(
-                        When(
-                            request_type='financial',
-                            then=F('financialrequest__amount_requested')
-                        ),
-                        default=0,
-                        output_field=FloatField(),
-                    )
-                )
-            ).order_by('month')
-
-            # Technical statistics
-            technical_stat = TechnicalProposal.objects.filter(
-                created_at__range=(start_date, end_date)
-            ).annotate(
-                month=TruncMonth('created_at')
-            ).values('month').annotate(
-                technical_proposal=Count('id'),
-            ).order_by('month')
-
-            # Financial statistics
-            financial_stat = FinancialProposal.objects.filter(
-                created_at__range=(start_date, end_date)
-            ).annotate(
-                month=TruncMonth('created_at')
-            ).values('month').annotate(
-                financial_proposal=Count('id'),
-            ).order_by('month')
-
-            # Merge results
-            merged_stats = defaultdict(lambda: {'technical_proposal': 0, 'financial_proposal': 0, 'total_requests': 0})
-
-            # Format month to "Month Year"
-            def format_month(month):
-                return month.strftime('%b %y')
-
-            # Add technical stats
-            for stat in technical_stat:
-                formatted_month = format_month(stat['month'])
-                merged_stats[formatted_month]['technical_proposal'] = stat['technical_proposal']
-
-            # Add financial stats
-            for stat in financial_stat:
-                formatted_month = format_month(stat['month'])
-                merged_stats[formatted_month]['financial_proposal'] = stat['financial_proposal']
-
-            # Add total_request stats
-            for stat in monthly_stats:
-                formatted_month = format_month(stat['month'])
-                merged_stats[formatted_month]['total_requests'] = stat['total_requests']
+            start_month = month_of(start_date)
+
+            # Everything below is summed by the database from the monthly rollup, one row per
+            # (month, sector): three queries whatever the number of months and sectors
+            rollups = AnalyticsRollup.objects.order_by()
+            totals = {
+                key: value or 0 for key, value in rollups.aggregate(
+                    projects=Sum('projects'),
+                    financing=Sum('accepted_investment'),
+                    technical_help=Sum('accepted_technical_proposals'),
+                    financial_help=Sum('accepted_financial_proposals'),
+                    completed=Sum('completed_requests'),
+                    requests=Sum('help_requests'),
+                    previous_year=Sum('help_requests', filter=Q(month__lt=start_month)),
+                    current_year=Sum('help_requests', filter=Q(month__gte=start_month)),
+                ).items()
+            }
+            previous_year = totals['previous_year']
+            current_year = totals['current_year']
+
+            sector_counts = rollups.values('sector').annotate(value=Sum('projects')).filter(
+                value__gt=0
+            ).order_by('-value', 'sector')
+
+            monthly_rows = rollups.filter(month__gte=start_month).values('month').annotate(
+                projects=Sum('requested_projects'),
+                financial=Sum('financial_requests'),
+                technical=Sum('technical_requests'),
+                total_requests=Sum('help_requests'),
+                transactions=Sum('amount_requested'),
+                technical_proposal=Sum('technical_proposals'),
+                financial_proposal=Sum('financial_proposals'),
+            )
+            monthly_stats = {row['month']: row for row in monthly_rows}
 
             # Overall statistics
-            total_projects = Project.objects.count()
-            total_financing = FinancialProposal.objects.filter(
-                status='accepted'
-            ).aggregate(
-                total=Sum('investment_amount')
-            )['total'] or 0
-
-            technical_help = TechnicalProposal.objects.filter(
-                #request_type='technical',
-                status='accepted'
-            ).count()
-
-            financial_help = FinancialProposal.objects.filter(
-                # request_type='technical',
-                status='accepted'
-            ).count()
+            total_projects = totals['projects']
+            total_financing = totals['financing']
+            technical_help = totals['technical_help']
+            financial_help = totals['financial_help']
 
             # Calculate success rate
-            total_completed = HelpRequest.objects.filter(
-                status='completed'
-            ).count()
-            total_requests = HelpRequest.objects.count()
-            success_rate = (total_completed / total_requests * 100) if total_requests > 0 else 0
+            total_requests = totals['requests']
+            success_rate = (totals['completed'] / total_requests * 100) if total_requests > 0 else 0
 
             # Year over year growth
-            previous_year = HelpRequest.objects.filter(
-                created_at__lt=start_date
-            ).count()
-            current_year = HelpRequest.objects.filter(
-                created_at__range=(start_date, end_date)
-            ).count()
             yoy_growth = ((current_year - previous_year) / previous_year * 100) if previous_year > 0 else 0
 
-            # Sector distribution
-            sector_counts = Project.objects.values('sector').annotate(
-                value=Count('id')
-            ).order_by('-value')
-
             # Convert sector codes to display names using dict comprehension
             sector_display_names = dict(Project.SECTOR_CHOICES)
             sector_data = [
                 {
-                    'name': sector_display_names.get(item['sector'], item['sector']),
-                    'value': item['value']
+                    'name': sector_display_names.get(sector['sector'], sector['sector']),
+                    'value': sector['value']
                 }
-                for item in sector_counts
+                for sector in sector_counts
             ]
 
+            # Format month to "Month Year"
+            def format_month(month):
+                return month.strftime('%b %y')
+
+            months = sorted(month for month, stat in monthly_stats.items() if stat['total_requests'] or
+                            stat['technical_proposal'] or stat['financial_proposal'])
+
             # Format stats data
             stats_data = {
                 'overview': {
@@ -2040,16 +2004,22 @@ class AdminAnalyticsAPIView(APIView):
                 },
                 'monthly_stats': [
                     {
-                        'month': stat['month'].strftime('%b %y'),  # Short month name
-                        'projects': stat['projects'],
-                        'financial': stat['financial'],
-                        'technical': stat['technical'],
-                        'transactions': float(stat['transactions'] or 0)
+                        'month': format_month(month),  # Short month name
+                        'projects': monthly_stats[month]['projects'],
+                        'financial': monthly_stats[month]['financial'],
+                        'technical': monthly_stats[month]['technical'],
+                        'transactions': float(monthly_stats[month]['transactions'])
                     }
-                    for stat in monthly_stats
+                    for month in months if monthly_stats[month]['total_requests']
                 ],
                 'proposal_stats': [
-                        {'month': month, **data} for month, data in sorted(merged_stats.items())
+                    {
+                        'month': format_month(month),
+                        'technical_proposal': monthly_stats[month]['technical_proposal'],
+                        'financial_proposal': monthly_stats[month]['financial_proposal'],
+                        'total_requests': monthly_stats[month]['total_requests']
+                    }
+                    for month in months
                 ],
                 'sector_data': list(sector_data)
             }